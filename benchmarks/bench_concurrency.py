@@ -0,0 +1,123 @@
+"""
+Simulate several desks saving to one database file at the same time.
+
+    python -m benchmarks.bench_concurrency --desks 1 2 4 8 --saves 200
+
+Each desk is a separate process with its own connection, like separate copies
+of the exe pointed at a shared database.db. Every desk loops over read-then-save
+of random beneficiaries (plus some adds), the way the edit form does. The report
+gives saves per second for each desk count, how many edits were refused as
+conflicts, and how many failed outright (e.g. "database is locked").
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate_data import populate
+from utils.connection import set_database_path, close_all
+from utils import beneficiary_calls
+
+DEFAULT_DESKS = [1, 2, 4, 8]
+ADD_RATIO = 0.2
+# Rows the desks fight over; small, so that conflicts actually happen
+HOT_ROWS = 50
+
+
+def desk(path, saves, seed, run, start, results):
+    set_database_path(path)
+    rng = random.Random(seed)
+    saved = conflicts = errors = 0
+
+    start.wait()
+    started = time.perf_counter()
+    for i in range(saves):
+        if rng.random() < ADD_RATIO:
+            ok, msg = beneficiary_calls.save_beneficiary(
+                None, f"DESK {run}", f"{seed} {i}", 1, gender="MALE", barangay="BENCH"
+            )
+        else:
+            beneficiary_id = rng.randint(1, HOT_ROWS)
+            row = beneficiary_calls.get_beneficiary_by_id(beneficiary_id)
+            if row is None:
+                continue
+            lname, fname, mname, suffix, gender, street, barangay, contactno, project_id, row_version = row
+            ok, msg = beneficiary_calls.save_beneficiary(
+                beneficiary_id, lname, fname, project_id, mname, suffix, gender,
+                street, barangay, f"09{rng.randrange(10 ** 9):09d}",
+                row_version=row_version
+            )
+
+        if ok:
+            saved += 1
+        elif msg == beneficiary_calls.CONFLICT_MESSAGE:
+            conflicts += 1
+        else:
+            errors += 1
+            print(f"desk {seed}: {msg}", file=sys.stderr)
+    elapsed = time.perf_counter() - started
+
+    close_all()
+    results.put((saved, conflicts, errors, elapsed))
+
+
+def bench_desks(path, desks, saves):
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=desk, args=(path, saves, seed, desks, start, results))
+        for seed in range(desks)
+    ]
+    for process in processes:
+        process.start()
+    start.set()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    saved = sum(outcome[0] for outcome in outcomes)
+    wall = max(outcome[3] for outcome in outcomes)
+    return {
+        "saves": saved,
+        "conflicts": sum(outcome[1] for outcome in outcomes),
+        "errors": sum(outcome[2] for outcome in outcomes),
+        "saves_per_s": round(saved / wall),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark concurrent saves from several desks.")
+    parser.add_argument("--desks", type=int, nargs="+", default=DEFAULT_DESKS,
+                        help="numbers of simultaneous desks to test")
+    parser.add_argument("--saves", type=int, default=200, help="saves per desk")
+    parser.add_argument("--rows", type=int, default=10000, help="beneficiaries in the test database")
+    parser.add_argument("--json", help="write the report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="peso_bench_")
+    path = os.path.join(workdir, "shared.db")
+    populate(path, args.rows)
+
+    report = {"sqlite": sqlite3.sqlite_version, "saves_per_desk": args.saves, "desks": {}}
+    for desks in args.desks:
+        print(f"{desks} desk(s)", flush=True)
+        report["desks"][str(desks)] = bench_desks(path, desks, args.saves)
+
+    output = json.dumps(report, indent=2)
+    if args.json:
+        with open(args.json, "w") as file:
+            file.write(output)
+        print(f"Report written to {args.json}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
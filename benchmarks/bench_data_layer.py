@@ -0,0 +1,199 @@
+"""
+Time the data layer against generated databases and write a JSON report.
+
+    python -m benchmarks.bench_data_layer --scales 10000 100000 --json report.json
+
+Each scale gets its own scratch database (kept in --workdir when given, so
+later runs can reuse it). Timings are in milliseconds. Exits with status 1
+when the columnar store holds rows in less than MIN_MEMORY_RATIO times less
+memory than tuples.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate_data import populate, generate_beneficiaries
+from utils.connection import set_database_path, close_all
+from utils import beneficiary_calls, project_calls, csv_calls, pivot_calls
+from utils.columnar import BeneficiaryColumns
+
+DEFAULT_SCALES = [10000, 100000]
+# Rows per fetchMore in the beneficiaries table
+PAGE_SIZE = 200
+# Tuple bytes per row over columnar bytes per row, at the least
+MIN_MEMORY_RATIO = 5
+
+
+def measure(fn, repeat):
+    """Run fn repeat times and return timing stats in ms."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "runs": repeat,
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def held_memory(fn):
+    """Bytes still allocated by what fn returns, per row."""
+    tracemalloc.start()
+    result = fn()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(held / max(1, len(result)), 1)
+
+
+def load_columns():
+    """Every beneficiary, paged into the columnar store the way the table model scrolls."""
+    columns = BeneficiaryColumns()
+    while True:
+        after = columns.ids[-1] if columns else None
+        rows, _ = beneficiary_calls.query_beneficiaries(None, None, False, len(columns), PAGE_SIZE,
+                                                        with_total=False, after=after)
+        columns.extend(rows)
+        if len(rows) < PAGE_SIZE:
+            return columns
+
+
+def database_for(scale, workdir):
+    path = os.path.join(workdir, f"bench_{scale}.db")
+    if not os.path.exists(path):
+        print(f"  generating {scale} rows ...", flush=True)
+        populate(path, scale)
+    return path
+
+
+def write_import_file(path, rows, project_names, seed):
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Last Name", "First Name", "Middle Name", "Suffix", "Gender",
+                         "Street", "Barangay", "Contact No.", "Projects"])
+        for row in generate_beneficiaries(rng, rows, project_names):
+            writer.writerow(row)
+
+
+def bench_scale(scale, workdir, repeat, import_rows):
+    path = database_for(scale, workdir)
+    set_database_path(path)
+    results = {}
+
+    # Work on a copy so add/import runs don't grow the cached database
+    work_path = os.path.join(workdir, f"bench_{scale}_work.db")
+    source = sqlite3.connect(path)
+    target = sqlite3.connect(work_path)
+    source.backup(target)
+    source.close()
+    target.close()
+    set_database_path(work_path)
+
+    results["get_beneficiaries"] = measure(beneficiary_calls.get_beneficiaries, max(1, repeat // 5))
+    tuples = held_memory(beneficiary_calls.get_beneficiaries)
+    columns = held_memory(load_columns)
+    results["memory_per_row"] = {"tuples_bytes": tuples, "columns_bytes": columns,
+                                 "ratio": round(tuples / columns, 1)}
+    results["query_first_page"] = measure(
+        lambda: beneficiary_calls.query_beneficiaries(None, None, False, 0, 200), repeat)
+    results["query_deep_page"] = measure(
+        lambda: beneficiary_calls.query_beneficiaries(None, 1, False, scale // 2, 200, with_total=False), repeat)
+    previous, _ = beneficiary_calls.query_beneficiaries(None, 1, False, scale // 2 - 200, 200, with_total=False)
+    results["query_deep_page_keyset"] = measure(
+        lambda: beneficiary_calls.query_beneficiaries(None, 1, False, scale // 2, 200, with_total=False,
+                                                      after=previous[-1][0]), repeat)
+    results["search_two_terms"] = measure(
+        lambda: beneficiary_calls.query_beneficiaries("DELA POBLACION", None, False, 0, 200), repeat)
+    results["validate_beneficiary"] = measure(
+        lambda: beneficiary_calls.validate_beneficiary("SANTOS", "JUAN 1", "-", 1, "REYES"), repeat)
+
+    counter = iter(range(10 ** 9))
+    results["add_beneficiary"] = measure(
+        lambda: beneficiary_calls.add_beneficiary("BENCH", f"ROW {next(counter)}", 1), repeat)
+
+    project_calls.invalidate_project_catalog()
+    results["get_projects_map_cold"] = measure(
+        lambda: (project_calls.invalidate_project_catalog(), project_calls.get_projects_map()), repeat)
+    results["get_projects_map_warm"] = measure(project_calls.get_projects_map, repeat)
+
+    results["pivot_project_barangay_cold"] = measure(
+        lambda: (pivot_calls._cache.clear(), pivot_calls.pivot("project", "barangay")), repeat)
+    results["pivot_project_barangay_cached"] = measure(
+        lambda: pivot_calls.pivot("project", "barangay"), repeat)
+
+    export_path = os.path.join(workdir, f"bench_{scale}_export.csv")
+    results["export_csv"] = measure(lambda: csv_calls.export_beneficiaries_csv(export_path), 1)
+    results["export_csv"]["rows_per_s"] = round(scale / (results["export_csv"]["median_ms"] / 1000))
+
+    project_names = [name for _, name, _ in project_calls.get_projects_list()]
+    import_path = os.path.join(workdir, f"bench_{scale}_import.csv")
+    write_import_file(import_path, import_rows, project_names, seed=scale)
+    results["import_csv"] = measure(lambda: csv_calls.import_beneficiaries_csv(import_path), 1)
+    results["import_csv"]["rows"] = import_rows
+    results["import_csv"]["rows_per_s"] = round(import_rows / (results["import_csv"]["median_ms"] / 1000))
+
+    close_all()
+    for leftover in (work_path, work_path + "-wal", work_path + "-shm", export_path, import_path):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the PESO data layer.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="beneficiary counts to test, e.g. 10000 100000 1000000")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per timed call")
+    parser.add_argument("--import-rows", type=int, default=20000, help="rows in the import test file")
+    parser.add_argument("--workdir", help="where scratch databases are kept (default: temp dir)")
+    parser.add_argument("--json", help="write the report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="peso_bench_")
+    os.makedirs(workdir, exist_ok=True)
+
+    report = {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "scales": {},
+    }
+    over_budget = []
+    for scale in args.scales:
+        print(f"scale {scale}", flush=True)
+        results = report["scales"][str(scale)] = bench_scale(scale, workdir, args.repeat, args.import_rows)
+        ratio = results["memory_per_row"]["ratio"]
+        if ratio < MIN_MEMORY_RATIO:
+            over_budget.append(f"{scale}: columns hold rows in {ratio}x less memory (budget {MIN_MEMORY_RATIO}x)")
+
+    report["over_budget"] = over_budget
+
+    output = json.dumps(report, indent=2)
+    if args.json:
+        with open(args.json, "w") as file:
+            file.write(output)
+        print(f"Report written to {args.json}")
+    else:
+        print(output)
+
+    for line in over_budget:
+        print("OVER BUDGET:", line)
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Measure user-visible latencies of the windows against generated databases,
+without a display, and fail when they go over budget.
+
+    python -m benchmarks.bench_gui --scales 10000 100000 --json gui.json
+
+Exits with status 1 when any measurement exceeds its budget for that scale.
+Timings are in milliseconds.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QObject, QEvent, QEventLoop, Qt
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.bench_data_layer import database_for
+from utils.connection import set_database_path, close_all
+from utils.helpers import resource_path
+from utils import beneficiary_calls
+
+# Budget per scale; the first scale at or above the dataset size applies
+BUDGETS = {
+    10000: {
+        "first_paint_login": 300, "first_paint_menu": 300,
+        "first_paint_beneficiaries": 600, "first_rows_beneficiaries": 800,
+        "first_paint_projects": 400,
+        "keystroke": 30, "search_results": 600, "sort": 500, "refresh_after_save": 200,
+        "navigation_switch": 100, "navigation_widget_growth": 0,
+    },
+    100000: {
+        "first_paint_login": 300, "first_paint_menu": 300,
+        "first_paint_beneficiaries": 600, "first_rows_beneficiaries": 1000,
+        "first_paint_projects": 400,
+        "keystroke": 30, "search_results": 800, "sort": 1500, "refresh_after_save": 250,
+        "navigation_switch": 100, "navigation_widget_growth": 0,
+    },
+    1000000: {
+        "first_paint_login": 300, "first_paint_menu": 300,
+        "first_paint_beneficiaries": 600, "first_rows_beneficiaries": 1500,
+        "first_paint_projects": 400,
+        "keystroke": 30, "search_results": 1500, "sort": 8000, "refresh_after_save": 400,
+        "navigation_switch": 100, "navigation_widget_growth": 0,
+    },
+}
+
+SEARCH_TEXT = "DELA CRUZ POBLACION"
+NAVIGATION_ROUNDS = 20
+TIMEOUT_MS = 30000
+
+
+def budgets_for(scale):
+    for limit in sorted(BUDGETS):
+        if scale <= limit:
+            return BUDGETS[limit]
+    return BUDGETS[max(BUDGETS)]
+
+
+class PaintProbe(QObject):
+    """Notes the time of the first paint event delivered after reset()."""
+
+    def __init__(self):
+        super().__init__()
+        self.painted_at = None
+
+    def reset(self):
+        self.painted_at = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.painted_at is None:
+            self.painted_at = time.perf_counter()
+        return False
+
+
+def wait_until(condition, timeout_ms=TIMEOUT_MS):
+    deadline = time.perf_counter() + timeout_ms / 1000
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("GUI benchmark step timed out")
+        QApplication.processEvents(QEventLoop.AllEvents, 10)
+
+
+class SignalRecorder:
+    """Connect before triggering an action, then wait() for the signal to fire."""
+
+    def __init__(self, signal):
+        self.signal = signal
+        self.fired_at = None
+        signal.connect(self._record)
+
+    def _record(self, *args):
+        if self.fired_at is None:
+            self.fired_at = time.perf_counter()
+
+    def wait(self, timeout_ms=TIMEOUT_MS):
+        try:
+            wait_until(lambda: self.fired_at is not None, timeout_ms)
+        finally:
+            self.signal.disconnect(self._record)
+        return self.fired_at
+
+
+def ms_since(started, ended=None):
+    return round(((ended or time.perf_counter()) - started) * 1000, 3)
+
+
+def time_first_paint(probe, factory):
+    probe.reset()
+    started = time.perf_counter()
+    window = factory()
+    window.show()
+    wait_until(lambda: probe.painted_at is not None)
+    return window, ms_since(started, probe.painted_at)
+
+
+def bench_scale(app, probe, scale, workdir):
+    set_database_path(database_for(scale, workdir))
+    results = {}
+
+    from ui.login_page import LoginWindow
+    from ui.menu_page import MenuWindow
+    from ui.beneficiaries.main_beneficiaries import BeneficiariesWindow
+    from ui.projects.main_projects import ProjectsWindow
+
+    for name, factory in (("login", LoginWindow), ("menu", MenuWindow), ("projects", ProjectsWindow)):
+        window, results[f"first_paint_{name}"] = time_first_paint(probe, factory)
+        window.close()
+
+    # Beneficiaries: first paint, then the first page of rows
+    probe.reset()
+    started = time.perf_counter()
+    window = BeneficiariesWindow()
+    loaded = SignalRecorder(window.model.modelReset)
+    window.show()
+    wait_until(lambda: probe.painted_at is not None)
+    results["first_paint_beneficiaries"] = ms_since(started, probe.painted_at)
+    results["first_rows_beneficiaries"] = ms_since(started, loaded.wait())
+
+    # Typing: time the GUI thread spends on each keystroke, then until results land
+    keystrokes = []
+    searched = SignalRecorder(window.model.modelReset)
+    for char in SEARCH_TEXT:
+        started = time.perf_counter()
+        QTest.keyClick(window.search_input, char)
+        keystrokes.append(ms_since(started))
+    started = time.perf_counter()
+    results["keystroke"] = max(keystrokes)
+    results["keystroke_median"] = statistics.median(keystrokes)
+    results["search_results"] = ms_since(started, searched.wait())
+
+    # Sorting by a column, with the search cleared
+    cleared = SignalRecorder(window.model.modelReset)
+    window.search_input.clear()
+    window.search_timer.stop()
+    window.apply_filter()
+    cleared.wait()
+
+    sorted_ = SignalRecorder(window.model.modelReset)
+    started = time.perf_counter()
+    window.tableView.sortByColumn(1, Qt.DescendingOrder)
+    results["sort"] = ms_since(started, sorted_.wait())
+
+    # Refresh after a save: from the write until the new row is in the model
+    inserted = SignalRecorder(window.model.rowsInserted)
+    started = time.perf_counter()
+    beneficiary_calls.add_beneficiary("BENCH", "REFRESH", 1)
+    results["refresh_after_save"] = ms_since(started, inserted.wait())
+
+    window.close()
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    results.update(bench_navigation())
+    close_all()
+    return results
+
+
+def bench_navigation():
+    """Time switching between the navigator's live screens and check nothing piles up."""
+    from ui.others.navigator import navigator, SCREENS, FORMS
+    nav = navigator()
+    for name in ("menu", "projects", "beneficiaries"):
+        nav.show(name)
+    if nav.screen("beneficiaries").model.is_loading:
+        SignalRecorder(nav.screen("beneficiaries").model.modelReset).wait()
+    for name in FORMS:
+        nav.open_form(name).close()
+    QApplication.processEvents()
+    before = nav.footprint()["app_widgets"]
+
+    switches = []
+    for _ in range(NAVIGATION_ROUNDS):
+        for name in ("menu", "beneficiaries", "menu", "projects"):
+            started = time.perf_counter()
+            nav.show(name)
+            QApplication.processEvents()
+            switches.append(ms_since(started))
+        for name in FORMS:
+            nav.open_form(name).close()
+    QApplication.processEvents()
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    after = nav.footprint()["app_widgets"]
+
+    for name in list(SCREENS) + list(FORMS):
+        nav.release(name)
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    return {
+        "navigation_switch": max(switches),
+        "navigation_switch_median": statistics.median(switches),
+        "navigation_widget_growth": after - before,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PESO window latencies offscreen.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--workdir", help="where scratch databases are kept (default: temp dir)")
+    parser.add_argument("--json", help="write the report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="peso_bench_")
+    os.makedirs(workdir, exist_ok=True)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    with open(resource_path("assets/styles.qss"), "r") as f:
+        app.setStyleSheet(f.read())
+    probe = PaintProbe()
+    app.installEventFilter(probe)
+
+    report = {"platform": os.environ["QT_QPA_PLATFORM"], "scales": {}}
+    over_budget = []
+
+    for scale in args.scales:
+        print(f"scale {scale}", flush=True)
+        results = bench_scale(app, probe, scale, workdir)
+        budgets = budgets_for(scale)
+        for name, budget in budgets.items():
+            if results.get(name, 0) > budget:
+                over_budget.append(f"{scale}: {name} took {results[name]} ms (budget {budget} ms)")
+        report["scales"][str(scale)] = {"results": results, "budgets": budgets}
+
+    report["over_budget"] = over_budget
+    output = json.dumps(report, indent=2)
+    if args.json:
+        with open(args.json, "w") as file:
+            file.write(output)
+        print(f"Report written to {args.json}")
+    else:
+        print(output)
+
+    for line in over_budget:
+        print("OVER BUDGET:", line)
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Fill a scratch database with realistic-looking beneficiaries and projects.
+
+    python -m benchmarks.generate_data --rows 100000 --out scratch.db
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.connection import get_connection, set_database_path
+from utils.migrations import migrate, refresh_counters, refresh_projects_text
+
+SURNAMES = [
+    "DELA CRUZ", "SANTOS", "REYES", "GARCIA", "MENDOZA", "BAUTISTA", "OCAMPO", "CASTILLO",
+    "VILLANUEVA", "RAMOS", "AQUINO", "NAVARRO", "TORRES", "FLORES", "GONZALES", "DE LEON",
+    "DEL ROSARIO", "MERCADO", "PASCUAL", "SORIANO", "MANALO", "SALAZAR", "CRUZ", "LOPEZ",
+    "DIZON", "TOLENTINO", "MAGBANUA", "MACARAEG", "DIMAANO", "PANGILINAN", "SAN JUAN", "LACSON",
+]
+# A town's surnames run into the tens of thousands, a few common and most rare.
+# SURNAMES lead; the long tail is built from these syllables and drawn with
+# Zipf-like weights, so about 3% of people are DELA CRUZ and most surnames
+# belong to a handful of families
+SURNAME_SYLLABLES = [
+    "MA", "BA", "CA", "DA", "LA", "PA", "SA", "TA", "GA", "NA", "VI", "LO", "RE", "SO", "TO",
+    "MI", "BU", "CU", "DI", "GU", "LI", "NI", "PI", "RI", "SI", "TI", "YA", "AN", "AL", "AR",
+    "AS", "IN", "ON", "UN", "LES", "NOS", "RIN", "TAN", "GON", "LAN", "BAN", "NEZ", "RAL",
+]
+SURNAME_POOL = 20000
+SURNAME_SKEW = 0.8
+MALE_NAMES = [
+    "JUAN", "JOSE", "MARK", "JOHN PAUL", "CARLO", "RAMON", "ANTONIO", "MIGUEL", "ROMMEL",
+    "JERICHO", "RENATO", "EDUARDO", "ALVIN", "NOEL", "DANILO", "ARNEL", "JOMAR", "KENNETH",
+]
+FEMALE_NAMES = [
+    "MARIA", "ANA", "KRISTINE", "MARY JOY", "LIZA", "ROSALIE", "JENNIFER", "MARICEL",
+    "LORNA", "CHERRY", "ANGELICA", "JOCELYN", "MA. THERESA", "RIZA", "DIANE", "GRACE",
+]
+BARANGAYS = [
+    "POBLACION", "SAN ISIDRO", "SAN JOSE", "SANTA CRUZ", "BAGONG SILANG", "MALANDAY",
+    "SAN ROQUE", "SANTO NIÑO", "MABINI", "RIZAL", "BONIFACIO", "SAN ANTONIO", "BAGUMBAYAN",
+    "CALOOCAN", "LIBIS", "MAYBUNGA", "SAN MIGUEL", "STA. LUCIA", "PINAGBUHATAN", "KALAWAAN",
+]
+STREETS = [
+    "RIZAL ST", "MABINI ST", "BONIFACIO AVE", "LUNA ST", "P. BURGOS ST", "QUEZON AVE",
+    "AGUINALDO ST", "DEL PILAR ST", "MAGSAYSAY BLVD", "JP LAUREL ST", "SAMPAGUITA ST",
+]
+SUFFIXES = ["-"] * 12 + ["JR.", "SR.", "II", "III, IV, V, etc."]
+CATEGORIES = [
+    "SPECIAL PROGRAM FOR THE EMPLOYMENT OF STUDENTS AND OUT-SCHOOL YOUTH (SPES) IMPLEMENTATION",
+    "LIVELIHOOD ASSISTANCE REGISTRATION",
+    "OFW/MGIRANT DESK ASSISTANCE",
+    "SKILLS TRAINING PROGRAM REGISTRATION",
+    "GOVERNEMENT INTERNSHIP PROGRAM (GIP) APPLICATION",
+    "JOB REFERRAL ISSUANCE",
+    "ESTABLISHMENT ACCREDITATION",
+]
+PROJECT_WORDS = [
+    "SINULID", "BALUT", "KABUHAYAN", "NEGOSYO", "BIGASAN", "SARI-SARI", "TAHI", "GULAYAN",
+    "PANDAYAN", "KAKANIN", "PALENGKE", "TRAINING", "SPES", "GIP", "TUPAD", "JOB FAIR",
+]
+
+
+def surname_pool(size=SURNAME_POOL, seed=0):
+    """SURNAMES followed by made-up ones, most common first, with cumulative draw weights."""
+    rng = random.Random(seed)
+    names = list(SURNAMES)
+    seen = set(names)
+    while len(names) < size:
+        name = "".join(rng.choice(SURNAME_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names, list(accumulate(rank ** -SURNAME_SKEW for rank in range(1, size + 1)))
+
+
+def generate_projects(rng, count):
+    """Yield (project_name, category) pairs with unique names."""
+    for number in range(1, count + 1):
+        yield f"PROJECT {rng.choice(PROJECT_WORDS)} {number}", rng.choice(CATEGORIES)
+
+
+def generate_beneficiaries(rng, count, project_ids):
+    """Yield rows in the column order lname, fname, mname, suffix, gender, street, barangay, contactno, project_id."""
+    surnames, weights = surname_pool()
+    for _ in range(count):
+        gender = rng.choice(("MALE", "FEMALE", "FEMALE", "MALE", "-"))
+        first_names = MALE_NAMES if gender == "MALE" else FEMALE_NAMES
+        # The middle name is the mother's surname, so it follows the same spread
+        lname, mname = rng.choices(surnames, cum_weights=weights, k=2)
+        yield (
+            lname,
+            f"{rng.choice(first_names)} {rng.randint(1, 9999)}",   # keeps most names unique
+            mname if rng.random() < 0.85 else "",
+            rng.choice(SUFFIXES),
+            gender,
+            f"{rng.randint(1, 999)} {rng.choice(STREETS)}",
+            rng.choice(BARANGAYS),
+            "09" + "".join(rng.choice("0123456789") for _ in range(9)),
+            rng.choice(project_ids),
+        )
+
+
+def populate(path, rows, projects=20, seed=2024, batch_size=10000):
+    """Create (or extend) the database at path and add the generated rows."""
+    rng = random.Random(seed)
+    set_database_path(path)
+    conn = get_connection()
+    migrate(conn)
+
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany(
+        "INSERT INTO projects (project_name, category) VALUES (?, ?)",
+        generate_projects(rng, projects)
+    )
+    project_ids = [row[0] for row in conn.execute("SELECT project_id FROM projects")]
+
+    # Same bulk path as the CSV importer: skip the per-row triggers, index, enroll and count once
+    conn.execute("INSERT INTO bulk_load (active) VALUES (1)")
+    rows_left = rows
+    generator = generate_beneficiaries(rng, rows, project_ids)
+    while rows_left > 0:
+        batch = [next(generator) for _ in range(min(batch_size, rows_left))]
+        conn.executemany("""
+            INSERT INTO beneficiaries
+            (lname, fname, mname, suffix, gender, street, barangay, contactno, project_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, batch)
+        rows_left -= len(batch)
+    conn.execute("INSERT INTO beneficiaries_fts (beneficiaries_fts) VALUES ('rebuild')")
+    conn.execute("""
+        INSERT OR IGNORE INTO beneficiary_projects (beneficiary_id, project_id)
+        SELECT beneficiary_id, project_id FROM beneficiaries WHERE project_id IS NOT NULL
+    """)
+    # About one in ten beneficiaries is enrolled in a second project
+    conn.executemany(
+        "INSERT OR IGNORE INTO beneficiary_projects (beneficiary_id, project_id) VALUES (?, ?)",
+        ((beneficiary_id, rng.choice(project_ids)) for (beneficiary_id,) in
+         conn.execute("SELECT beneficiary_id FROM beneficiaries WHERE beneficiary_id % 10 = 0").fetchall())
+    )
+    refresh_counters(conn)
+    refresh_projects_text(conn)
+    conn.execute("DELETE FROM bulk_load")
+
+    if conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+        conn.execute("INSERT INTO users (username, password) VALUES ('admin', 'admin123')")
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a scratch PESO database.")
+    parser.add_argument("--rows", type=int, default=10000, help="number of beneficiaries")
+    parser.add_argument("--projects", type=int, default=20, help="number of projects")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--out", default="scratch.db", help="database file to create")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.out):
+        parser.error(f"{args.out} already exists")
+
+    started = time.perf_counter()
+    populate(args.out, args.rows, args.projects, args.seed)
+    print(f"Wrote {args.rows} beneficiaries and {args.projects} projects to {args.out} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Command-line access to the PESO database for batch jobs. Uses the same data
+layer as the app but never imports PyQt5, so it starts in milliseconds and
+runs without a display.
+
+    python cli.py import beneficiaries.csv
+    python cli.py export all.csv --search "SAN JOSE" --snapshot
+    python cli.py stats --pivot barangay gender
+    python cli.py dedupe --merge
+    python cli.py backup
+    python cli.py vacuum
+    python cli.py serve --port 8765
+
+--db points at another database file (default: the app's database.db).
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+
+def _progress(label):
+    # One updating line on stderr, only when someone is watching
+    if not sys.stderr.isatty():
+        return None
+
+    def report(done, total):
+        percent = 100 * done // total if total else 100
+        print(f"\r{label} {percent}%", end="", file=sys.stderr, flush=True)
+    return report
+
+
+def _table(rows, headers):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    for row in [headers, *rows]:
+        print("  ".join(str(value).ljust(width) for value, width in zip(row, widths)).rstrip())
+
+
+def cmd_import(args):
+    from utils.csv_calls import import_beneficiaries_csv
+
+    imported, rejections = import_beneficiaries_csv(args.path, progress=_progress("Importing"))
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+    for row_number, reason in rejections:
+        print(f"Row {row_number}: {reason}", file=sys.stderr)
+    print(f"Imported {imported} beneficiaries, rejected {len(rejections)} rows.")
+    return 1 if args.strict and rejections else 0
+
+
+def cmd_export(args):
+    from utils.csv_calls import export_beneficiaries_csv
+    from utils.beneficiary_calls import DISPLAY_HEADERS
+
+    sort_column = None
+    if args.sort:
+        headers = [header.lower() for header in DISPLAY_HEADERS]
+        if args.sort.lower() not in headers:
+            print(f"Unknown column: {args.sort} (one of: {', '.join(DISPLAY_HEADERS)})", file=sys.stderr)
+            return 2
+        sort_column = headers.index(args.sort.lower())
+
+    conn = None
+    if args.snapshot:
+        from utils.backup_calls import reporting_snapshot
+        conn = reporting_snapshot(args.snapshot_age * 60)
+    try:
+        written = export_beneficiaries_csv(
+            args.path, args.search, sort_column, args.desc,
+            progress=_progress("Exporting"), conn=conn
+        )
+    finally:
+        if conn is not None:
+            conn.close()
+
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+    print(f"Exported {written} beneficiaries to {args.path}.")
+    return 0
+
+
+def cmd_stats(args):
+    if args.pivot:
+        from utils.pivot_calls import pivot, export_pivot_csv, DIMENSIONS, DIMENSION_LABELS
+
+        unknown = [dim for dim in args.pivot if dim not in DIMENSIONS]
+        if unknown or len(args.pivot) > 2:
+            print(f"--pivot takes one or two of: {', '.join(DIMENSIONS)}", file=sys.stderr)
+            return 2
+
+        table = pivot(*args.pivot)
+        if args.csv:
+            export_pivot_csv(args.csv, table)
+            print(f"Wrote {len(table.row_labels)} rows to {args.csv}.")
+        elif args.json:
+            print(json.dumps(table._asdict(), indent=2))
+        else:
+            rows = [[label, *cells, total] for label, cells, total
+                    in zip(table.row_labels, table.cells, table.row_totals)]
+            rows.append(["Total", *table.col_totals, table.total])
+            _table(rows, [DIMENSION_LABELS[table.rows], *table.col_labels, "Total"])
+        return 0
+
+    from utils.stats_calls import get_dashboard_stats
+
+    stats = get_dashboard_stats()
+    if args.json:
+        print(json.dumps(stats._asdict(), indent=2))
+        return 0
+
+    print(f"Beneficiaries: {stats.total}")
+    for title, pairs in (("Gender", stats.by_gender), ("Barangay", stats.by_barangay),
+                         ("Category", stats.by_category)):
+        print()
+        _table(pairs, [title, "Count"])
+    print()
+    _table(stats.by_project, ["Project", "Category", "Enrollments"])
+    return 0
+
+
+def cmd_dedupe(args):
+    from utils.beneficiary_calls import find_duplicate_groups, merge_duplicates, get_beneficiary_row
+
+    groups = find_duplicate_groups()
+    for ids in groups:
+        name = " ".join(str(value) for value in get_beneficiary_row(ids[0])[1:5] if value != "-")
+        if args.merge:
+            kept = merge_duplicates(ids)
+            print(f"{name}: kept {kept}, merged {', '.join(str(i) for i in ids if i != kept)}")
+        else:
+            print(f"{name}: {', '.join(str(i) for i in ids)}")
+
+    duplicates = sum(len(ids) - 1 for ids in groups)
+    if args.merge:
+        print(f"Merged {duplicates} duplicates in {len(groups)} groups.")
+        return 0
+    print(f"Found {duplicates} duplicates in {len(groups)} groups." + (" Use --merge to merge them." if groups else ""))
+    return 1 if groups and args.strict else 0
+
+
+def cmd_backup(args):
+    from utils import backup_calls
+
+    if args.list:
+        for path in backup_calls.list_backups():
+            print(path)
+        return 0
+
+    if args.verify:
+        ok, message = backup_calls.quick_check(args.verify)
+        print(f"{args.verify}: {message}")
+        return 0 if ok else 1
+
+    path, message = backup_calls.backup_database(progress=_progress("Backing up"), keep=args.keep)
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+    print(path or message)
+    return 0 if path else 1
+
+
+def cmd_vacuum(args):
+    from utils.maintenance_calls import vacuum_database
+
+    before, after = vacuum_database()
+    print(f"Database compacted from {before / 2 ** 20:.1f} MB to {after / 2 ** 20:.1f} MB.")
+    return 0
+
+
+def cmd_serve(args):
+    from utils.server import serve, DEFAULT_PORT, DEFAULT_THREADS
+
+    serve(args.host, args.port or DEFAULT_PORT, args.threads or DEFAULT_THREADS, args.verbose)
+    return 0
+
+
+def build_parser():
+    from utils.backup_calls import KEEP_BACKUPS
+
+    parser = argparse.ArgumentParser(prog="cli.py", description="PESO Tracker batch tools.")
+    parser.add_argument("--db", help="database file (default: the app's database.db)")
+    parser.add_argument("--time", action="store_true", help="print how long the command took")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("import", help="import beneficiaries from a CSV file")
+    command.add_argument("path")
+    command.add_argument("--strict", action="store_true", help="exit with 1 if any row was rejected")
+    command.set_defaults(run=cmd_import)
+
+    command = commands.add_parser("export", help="export beneficiaries to a CSV file")
+    command.add_argument("path")
+    command.add_argument("--search", help="only rows matching these search terms")
+    command.add_argument("--sort", help="column to sort by, e.g. \"Last Name\"")
+    command.add_argument("--desc", action="store_true", help="sort descending")
+    command.add_argument("--snapshot", action="store_true",
+                         help="read from a backup instead of the live database")
+    command.add_argument("--snapshot-age", type=int, default=60,
+                         help="minutes before --snapshot makes a fresh backup (default 60)")
+    command.set_defaults(run=cmd_export)
+
+    command = commands.add_parser("stats", help="print beneficiary counts")
+    command.add_argument("--pivot", nargs="+", metavar="DIMENSION",
+                         help="cross-tab by one or two of barangay, gender, project, category")
+    command.add_argument("--csv", help="with --pivot, write the table to this CSV file")
+    command.add_argument("--json", action="store_true", help="print JSON")
+    command.set_defaults(run=cmd_stats)
+
+    command = commands.add_parser("dedupe", help="find beneficiaries registered more than once")
+    command.add_argument("--merge", action="store_true",
+                         help="keep the oldest record of each and move the enrollments onto it")
+    command.add_argument("--strict", action="store_true", help="exit with 1 if duplicates exist")
+    command.set_defaults(run=cmd_dedupe)
+
+    command = commands.add_parser("backup", help="make a verified backup")
+    command.add_argument("--keep", type=int, default=KEEP_BACKUPS, help="backups to keep")
+    command.add_argument("--list", action="store_true", help="list backups, newest first")
+    command.add_argument("--verify", metavar="PATH", help="check a backup file instead")
+    command.set_defaults(run=cmd_backup)
+
+    command = commands.add_parser("vacuum", help="compact the database (when nobody is saving)")
+    command.set_defaults(run=cmd_vacuum)
+
+    command = commands.add_parser("serve", help="serve the database to desks over HTTP (see PESO_SERVER)")
+    command.add_argument("--host", default="127.0.0.1", help="address to listen on (default: this machine only)")
+    command.add_argument("--port", type=int, help="port to listen on (default 8765)")
+    command.add_argument("--threads", type=int, help="request threads, each with its own connection (default 8)")
+    command.add_argument("--verbose", action="store_true", help="log every request")
+    command.set_defaults(run=cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    started = time.perf_counter()
+    args = build_parser().parse_args(argv)
+
+    from utils.connection import set_database_path
+    from utils.migrations import migrate
+
+    if args.db:
+        set_database_path(args.db)
+
+    try:
+        migrate()
+        status = args.run(args)
+    except BrokenPipeError:
+        # Whoever read our output (e.g. head) has stopped; flushing again at exit would fail too
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (sqlite3.Error, OSError, ValueError) as e:   # ValueError covers UnicodeDecodeError
+        print(f"{args.command.capitalize()} Error:", e, file=sys.stderr)
+        status = 1
+
+    if args.time:
+        print(f"{args.command} took {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
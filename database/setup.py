@@ -1,15 +1,17 @@
-import sqlite3
+import os
+import sys
 
-conn = sqlite3.connect('database/database.db')
-cursor = conn.cursor()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.connection import get_connection, set_database_path
+from utils.migrations import migrate
 
-# Create tables
-cursor.executescript("""
-CREATE TABLE IF NOT EXISTS users (
-    username TEXT,
-    password TEXT
-);
-""")
+set_database_path('database/database.db')
+conn = get_connection()
+
+# Create tables and indexes
+migrate(conn)
+cursor = conn.cursor()
 
 # Insert dummy beneficiaries if table is empty
 cursor.execute("SELECT COUNT(*) FROM users")
@@ -23,4 +25,3 @@ if cursor.fetchone()[0] == 0:
     """, dummy_users)
 
 conn.commit()
-conn.close()
@@ -1,20 +1,51 @@
 import sys
-import os
-from PyQt5.QtWidgets import QApplication
-from ui.login_page import LoginWindow
-from utils.helpers import resource_path
-# from ui.menu_page import MenuWindow
+from utils import startup   # first, so the startup clock covers the imports below
+
+# Time from here until the login window has painted
+STARTUP_BUDGET_MS = 1500
+
 
 if __name__ == "__main__":
+    report = "--startup-report" in sys.argv
+
+    from PyQt5.QtWidgets import QApplication
+    from utils.helpers import resource_path
+    startup.mark("import PyQt5")
+
     app = QApplication(sys.argv)
-    
+    startup.mark("QApplication")
+
     stylesheet_path = resource_path("assets/styles.qss")
     with open(stylesheet_path, "r") as f:
         app.setStyleSheet(f.read())
+    startup.mark("stylesheet")
 
     db_path = resource_path("assets/database.db")
     print("Database path:", db_path)
 
-    window = LoginWindow()
-    window.show()
+    # Create missing tables and indexes before any window touches the database
+    # (a PESO service, when PESO_SERVER is set, does this for its own file)
+    from utils.api import REMOTE, SERVER_URL
+    if REMOTE:
+        print("PESO service:", SERVER_URL)
+    else:
+        from utils.migrations import migrate
+        try:
+            print("Schema version:", migrate())
+        except Exception as e:
+            print("Migration Error:", e)
+    startup.mark("migrations")
+
+    # The table windows are imported later, from the menu (see ui.others.warmup)
+    from ui.others.navigator import navigator
+    startup.mark("import navigator")
+
+    navigator().show("login")
+    startup.mark("login window built")
+
+    if report:
+        app.processEvents()
+        startup.mark("login window painted")
+        sys.exit(0 if startup.report(STARTUP_BUDGET_MS) else 1)
+
     sys.exit(app.exec_())
@@ -1,11 +1,14 @@
+from functools import partial
+
 from PyQt5.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QMessageBox
 )
 from PyQt5.QtCore import Qt, pyqtSignal
 from ui.others.window import Window
 from ui.others.uppercase import UpperCaseLineEdit
-from utils.beneficiary_calls import add_beneficiary, validate_beneficiary, edit_beneficiary, get_beneficiary_by_id
-from utils.project_calls import get_projects_list
+from ui.others.db_executor import db_executor
+from utils.api import save_beneficiary, get_beneficiary_by_id, get_projects_list
+from utils.beneficiary_calls import DUPLICATE_MESSAGE
 
 
 class AddEditBeneficiaryForm(Window):
@@ -50,14 +53,6 @@ class AddEditBeneficiaryForm(Window):
         self.gender_combo.addItems(["- GENDER -", "MALE", "FEMALE", "OTHER"])
         self.suffix_combo.addItems(["- SUFFIX -", "SR.", "JR.", "II", "III, IV, V, etc."])
 
-        self.projects_combo.clear()
-
-        self.projects_combo.addItem("- PROJECTS -", None)
-        self.projects_combo.setItemData(0, 0, Qt.UserRole - 1)
-        for project_id, project_name, category in get_projects_list():
-            display_text = f"{project_name}"
-            self.projects_combo.addItem(display_text, project_id)
-
         # Name rows
         name1 = QHBoxLayout()
         name1.addWidget(self.lname_input)
@@ -79,13 +74,13 @@ class AddEditBeneficiaryForm(Window):
 
         # Buttons
         btn_layout = QHBoxLayout()
-        self.submit_btn = QPushButton("Save" if is_edit else "Add")
+        self.submit_btn = QPushButton()
         cancel_btn = QPushButton("Cancel")
 
         self.submit_btn.setObjectName("buttons")
         cancel_btn.setObjectName("buttons")
 
-        self.submit_btn.clicked.connect(self.handle_submit)
+        self.submit_btn.clicked.connect(lambda: self.handle_submit())
         self.submit_btn.setShortcut("Return")
         cancel_btn.clicked.connect(self.close)
 
@@ -101,12 +96,56 @@ class AddEditBeneficiaryForm(Window):
 
         self.content.addLayout(layout)
 
+        self._resets = 0   # bumped by reset_form, so stale project lists are dropped
+        self.reset_form(beneficiary, is_edit)
+
+    # The navigator keeps one form alive and resets it for every add/edit
+    def reset_form(self, beneficiary=None, is_edit=False):
         self.beneficiary_id = beneficiary
-        self.populate_field(self.beneficiary_id)
+        self.row_version = None   # set once the row is loaded, checked on save
         self.isEdit = is_edit
+        self.submit_btn.setText("Save" if is_edit else "Add")
+        self.submit_btn.setEnabled(False)   # until the projects are in
+
+        for w in (self.fname_input, self.lname_input, self.mname_input,
+                  self.street_input, self.barangay_input, self.contactno_input):
+            w.clear()
+        self.gender_combo.setCurrentIndex(0)
+        self.suffix_combo.setCurrentIndex(0)
+
+        # Projects may have changed since the last time (served from the catalog cache)
+        self.projects_combo.clear()
+
+        self.projects_combo.addItem("- PROJECTS -", None)
+        self.projects_combo.setItemData(0, 0, Qt.UserRole - 1)
+
+        self._resets += 1
+        db_executor().submit(
+            get_projects_list,
+            on_result=partial(self.fill_projects, self._resets),
+            on_error=partial(self.projects_failed, self._resets)
+        )
+
+    def fill_projects(self, reset, projects):
+        # The form may have been reset again meanwhile
+        if reset != self._resets:
+            return
+
+        for project_id, project_name, category in projects:
+            display_text = f"{project_name}"
+            self.projects_combo.addItem(display_text, project_id)
+        self.submit_btn.setEnabled(True)
+
+        # Loaded after the projects so the beneficiary's project can be selected
+        self.populate_field(self.beneficiary_id)
+
+    def projects_failed(self, reset, error):
+        if reset == self._resets:
+            self.submit_btn.setEnabled(True)
+            QMessageBox.warning(self, "Database Error", error)
 
     # SUBMIT HANDLER
-    def handle_submit(self):
+    def handle_submit(self, enroll_duplicate=False):
         def normalize_combo(combo):
             return "-" if combo.currentIndex() == 0 else combo.currentText()
         
@@ -121,34 +160,54 @@ class AddEditBeneficiaryForm(Window):
         contactno = self.contactno_input.text().strip()
         project_id = self.projects_combo.currentData()
 
-        if self.isEdit:
-            valid, msg = validate_beneficiary(
-                lname, fname, suffix, project_id, mname, beneficiary_id
-            )
-        else:
-            valid, msg = validate_beneficiary(lname, fname, suffix, project_id, mname)
+        self.submit_btn.setEnabled(False)
+        db_executor().submit(
+            save_beneficiary,
+            beneficiary_id if self.isEdit else None, lname, fname, project_id,
+            mname, suffix, gender, street, barangay, contactno,
+            enroll_duplicate=enroll_duplicate,
+            row_version=self.row_version if self.isEdit else None,
+            on_result=self.submit_finished,
+            on_error=self.submit_failed
+        )
+
+    def submit_finished(self, result):
+        self.submit_btn.setEnabled(True)
+        valid, msg = result
 
         if valid:
-            if self.isEdit:
-                edit_beneficiary(
-                    self.beneficiary_id, lname, fname, project_id,
-                    mname, suffix, gender, street, barangay, contactno
-                )
-            else:
-                add_beneficiary(
-                    lname, fname, project_id,
-                    mname, suffix, gender, street, barangay, contactno
-                )
             self.beneficiary_added.emit()
             self.close()
+        elif msg == DUPLICATE_MESSAGE and not self.isEdit:
+            # Same person signing up for another program: enroll instead of duplicating
+            confirm = QMessageBox.question(
+                self,
+                "Duplicate Beneficiary",
+                "This beneficiary already exists.\n"
+                f"Enroll them in {self.projects_combo.currentText()} instead?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if confirm == QMessageBox.Yes:
+                self.handle_submit(enroll_duplicate=True)
         else:
             QMessageBox.warning(self, "Notification", msg)
 
+    def submit_failed(self, error):
+        self.submit_btn.setEnabled(True)
+        QMessageBox.warning(self, "Database Error", error)
+
 
     def populate_field(self, beneficiary_id):
-        data = get_beneficiary_by_id(beneficiary_id)
-        if data:
-            lname, fname, mname, suffix, gender, street, barangay, contactno, project = data
+        if beneficiary_id is not None:
+            db_executor().submit(
+                get_beneficiary_by_id, beneficiary_id,
+                on_result=partial(self.fill_fields, beneficiary_id)
+            )
+
+    def fill_fields(self, beneficiary_id, data):
+        # The form may have been reset for another beneficiary meanwhile
+        if data and beneficiary_id == self.beneficiary_id:
+            lname, fname, mname, suffix, gender, street, barangay, contactno, project, self.row_version = data
             
             self.lname_input.setText(lname)
             self.fname_input.setText(fname)
@@ -0,0 +1,230 @@
+from functools import partial
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+from ui.others.db_executor import db_executor
+from ui.others.change_notifier import change_notifier
+from utils.events import INSERTED, UPDATED, DELETED, RELOADED
+from utils.api import query_beneficiaries
+from utils.beneficiary_calls import DISPLAY_HEADERS
+from utils.columnar import BeneficiaryColumns
+
+
+class BeneficiaryTableModel(QAbstractTableModel):
+    """
+    Table model that pulls beneficiaries from the database one batch at a time.
+    Loaded rows are kept column-wise (see utils.columnar), so scrolling deep
+    into a large registry costs far less memory than a list of tuples.
+    """
+
+    HEADERS = DISPLAY_HEADERS
+    BATCH_SIZE = 200
+
+    loading = pyqtSignal(bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = BeneficiaryColumns()
+        self._total = 0
+        self._worker = None         # pending reload
+        self._fetch_worker = None   # pending fetchMore
+        self._generation = 0
+        self._search = ""
+        self._sort_column = None    # None = best match first when searching, else by ID
+        self._descending = False
+
+        change_notifier().changed.connect(self.apply_change)
+
+    # Query state
+    @property
+    def total(self):
+        return self._total
+
+    @property
+    def search(self):
+        return self._search
+
+    @property
+    def sort_column(self):
+        return self._sort_column
+
+    @property
+    def descending(self):
+        return self._descending
+
+    def set_search(self, text):
+        text = text.strip()
+        if text != self._search:
+            self._search = text
+            self.reload()
+
+    @property
+    def is_loading(self):
+        return self._worker is not None
+
+    def reload(self):
+        """Re-run the query in the background; only the newest request gets applied."""
+        for pending in (self._worker, self._fetch_worker):
+            if pending is not None:
+                pending.cancel()
+        self._fetch_worker = None
+
+        self._generation += 1
+        self._worker = db_executor().submit(
+            query_beneficiaries,
+            self._search, self._sort_column, self._descending, 0, self.BATCH_SIZE,
+            on_result=partial(self._apply_reload, self._generation),
+            on_error=partial(self._reload_failed, self._generation)
+        )
+        self.loading.emit(True)
+
+    def _apply_reload(self, generation, result):
+        if generation != self._generation:
+            return
+
+        self._worker = None
+        self.beginResetModel()
+        rows, self._total = result
+        self._rows = BeneficiaryColumns(rows)
+        self.endResetModel()
+        self.loading.emit(False)
+
+    def _reload_failed(self, generation, error):
+        if generation != self._generation:
+            return
+
+        self._worker = None
+        print("Search Error:", error)
+        self.loading.emit(False)
+
+    def trim(self, rows=BATCH_SIZE):
+        """Drop loaded rows past the first `rows`; they are fetched again on scroll."""
+        if self._worker is not None or len(self._rows) <= rows:
+            return
+        if self._fetch_worker is not None:
+            self._fetch_worker.cancel()
+            self._fetch_worker = None
+
+        self.beginRemoveRows(QModelIndex(), rows, len(self._rows) - 1)
+        del self._rows[rows:]
+        self.endRemoveRows()
+
+    def beneficiary_id(self, row):
+        return self._rows.ids[row]
+
+    def find_row(self, beneficiary_id):
+        return self._rows.find(beneficiary_id)
+
+    # Patch single rows after add/edit/delete instead of reloading everything
+    def apply_change(self, event):
+        if event.table == "projects":
+            # Project names are shown on every row, so refresh what is loaded
+            if event.kind != INSERTED:
+                self.reload()
+            return
+        if event.table != "beneficiaries":
+            return
+
+        if event.kind == RELOADED:
+            self.reload()
+            return
+
+        if self._worker is not None:
+            # The pending query may have started before this change was committed
+            self.reload()
+            return
+
+        row = self.find_row(event.key)
+
+        if event.kind == DELETED:
+            if row != -1:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+                self._total -= 1
+
+        elif event.kind == UPDATED:
+            if row != -1 and event.row:
+                self._rows[row] = event.row
+                self.dataChanged.emit(
+                    self.index(row, 0), self.index(row, len(self.HEADERS) - 1)
+                )
+
+        elif event.kind == INSERTED:
+            # New rows go on top so they are visible right away; a search
+            # result set is left alone since the row may not match it
+            if row == -1 and event.row and not self._search:
+                self.beginInsertRows(QModelIndex(), 0, 0)
+                self._rows.insert(0, event.row)
+                self.endInsertRows()
+                self._total += 1
+
+    # Qt model interface
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return str(self._rows.value(index.row(), index.column()))
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        # Rows on screen belong to the previous query until the reload lands
+        if parent.isValid() or self._worker is not None or self._fetch_worker is not None:
+            return False
+        return len(self._rows) < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self.canFetchMore():
+            return
+
+        # Continue from the last loaded row through the sort index (keyset paging)
+        offset = len(self._rows)
+        self._fetch_worker = db_executor().submit(
+            query_beneficiaries,
+            self._search, self._sort_column, self._descending,
+            offset, self.BATCH_SIZE, with_total=False,
+            after=self._rows.ids[offset - 1] if offset else None,
+            on_result=partial(self._apply_fetch, self._generation, offset),
+            on_error=partial(self._fetch_failed, self._generation)
+        )
+
+    def _apply_fetch(self, generation, offset, result):
+        if generation != self._generation:
+            return
+        self._fetch_worker = None
+
+        # A row was added or removed meanwhile; let the view ask again
+        if offset != len(self._rows):
+            return
+
+        batch, _ = result
+        if not batch:
+            self._total = len(self._rows)
+            return
+
+        self.beginInsertRows(QModelIndex(), offset, offset + len(batch) - 1)
+        self._rows.extend(batch)
+        self.endInsertRows()
+
+    def _fetch_failed(self, generation, error):
+        if generation == self._generation:
+            self._fetch_worker = None
+        print("Fetch Error:", error)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort_column = column if column >= 0 else None
+        self._descending = order == Qt.DescendingOrder
+        self.reload()
@@ -1,23 +1,28 @@
+import os
+from functools import partial
+
 from PyQt5.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QPushButton, QTableView,
-    QSizePolicy, QHeaderView, QMessageBox, QLabel, QFileDialog
+    QSizePolicy, QHeaderView, QMessageBox, QLabel, QFileDialog, QProgressDialog
 )
-from PyQt5.QtGui import QStandardItemModel, QStandardItem, QIcon
-from PyQt5.QtCore import Qt, QSortFilterProxyModel
+from PyQt5.QtCore import Qt, QTimer, QThreadPool
 
 from ui.others.window import Window
-from utils.beneficiary_calls import get_beneficiaries, delete_beneficiary
-from utils.project_calls import get_projects_map
+from ui.beneficiaries.beneficiary_model import BeneficiaryTableModel
+from ui.others.worker import QueryWorker
+from ui.others.db_executor import db_executor
+from ui.others.navigator import navigator
+from utils.api import delete_beneficiary, export_beneficiaries_csv, import_beneficiaries_csv
+from utils.csv_calls import write_rejection_report
 from ui.others.uppercase import UpperCaseLineEdit
-from utils.helpers import resource_path
-import csv
+from ui.others.assets import cached_icon
 
 
 class BeneficiariesWindow(Window):
     def __init__(self):
         super().__init__(draggable=True, topbar=True)
         self.showMaximized()
-        self.setWindowIcon(QIcon(resource_path("assets/peso.ico")))
+        self.setWindowIcon(cached_icon("assets/peso.ico"))
 
         main_layout = QVBoxLayout()
         main_layout.setSpacing(15)
@@ -28,7 +33,13 @@ class BeneficiariesWindow(Window):
         self.search_input = UpperCaseLineEdit()
         self.search_input.setPlaceholderText("Search ...")
         self.search_input.setObjectName("inputField")
-        self.search_input.textChanged.connect(self.apply_filter)
+
+        # Wait for a pause in typing before searching
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.apply_filter)
+        self.search_input.textChanged.connect(lambda: self.search_timer.start())
 
         self.total_beneficiaries = QLabel()
         self.total_beneficiaries.setObjectName("inputFieldWhite")
@@ -47,17 +58,16 @@ class BeneficiariesWindow(Window):
         self.tableView.setSortingEnabled(True)
         self.tableView.verticalHeader().setVisible(False)
 
-        # Model
-        self.model = QStandardItemModel()
-
-        # Proxy model for filtering
-        self.proxyModel = QSortFilterProxyModel(self)
-        self.proxyModel.setFilterCaseSensitivity(Qt.CaseInsensitive)
-        self.proxyModel.setSourceModel(self.model)
+        # Model (rows are fetched from the database as the view scrolls)
+        self.model = BeneficiaryTableModel(self)
+        self.model.modelReset.connect(self.update_total)
+        self.model.rowsInserted.connect(self.update_total)
+        self.model.rowsRemoved.connect(self.update_total)
+        self.model.loading.connect(self.show_loading)
 
-        self.proxyModel.setFilterKeyColumn(-1)
-
-        self.tableView.setModel(self.proxyModel)
+        # No sort indicator until a header is clicked: search results stay ranked by relevance
+        self.tableView.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.tableView.setModel(self.model)
 
         # Buttons
         btn_layout = QHBoxLayout()
@@ -65,11 +75,11 @@ class BeneficiariesWindow(Window):
         self.edit_btn = QPushButton("&Edit")
         self.delete_btn = QPushButton("&Delete")
         self.export_btn = QPushButton("E&xport")
-        # self.import_btn = QPushButton("&Import")
+        self.import_btn = QPushButton("&Import")
         self.return_btn = QPushButton("&Return to Menu")
 
-        for btn in (self.add_btn, self.edit_btn, self.delete_btn, self.return_btn, self.export_btn, 
-                    # self.import_btn
+        for btn in (self.add_btn, self.edit_btn, self.delete_btn, self.return_btn, self.export_btn,
+                    self.import_btn
                     ):
             btn.setObjectName("buttons")
 
@@ -77,7 +87,7 @@ class BeneficiariesWindow(Window):
         btn_layout.addWidget(self.edit_btn)
         btn_layout.addWidget(self.delete_btn)
         btn_layout.addWidget(self.export_btn)
-        # btn_layout.addWidget(self.import_btn)
+        btn_layout.addWidget(self.import_btn)
         btn_layout.addStretch()
         btn_layout.addWidget(self.return_btn)
 
@@ -94,7 +104,7 @@ class BeneficiariesWindow(Window):
         self.edit_btn.clicked.connect(self.edit_beneficiary)
         self.delete_btn.clicked.connect(self.delete_beneficiary)
         self.export_btn.clicked.connect(self.export_csv)
-        # self.import_btn.clicked.connect(self.import_csv)
+        self.import_btn.clicked.connect(self.import_csv)
 
         # Load table
         self.setup_headers()
@@ -102,13 +112,7 @@ class BeneficiariesWindow(Window):
 
     # Setup table headers (one time only)
     def setup_headers(self):
-        headers = [
-        "ID", "Last Name", "First Name", "Middle Name", "Suffix",
-        "Gender", "Street", "Barangay", "Contact No.", "Projects"
-        ]
-
-        self.model.setColumnCount(len(headers))
-        self.model.setHorizontalHeaderLabels(headers)
+        headers = BeneficiaryTableModel.HEADERS
 
         fixed_cols = {0, 1, 2, 3, 4, 5, 7, 8}
 
@@ -135,49 +139,35 @@ class BeneficiariesWindow(Window):
             if col not in fixed_cols:
                 header.setSectionResizeMode(col, QHeaderView.Stretch)
 
-        # Load All Data
+        # Load Data (first batch only, the rest is fetched on scroll)
     def load_beneficiaries(self):
-        data = get_beneficiaries()
-        projects_map = get_projects_map()
-
-        self.model.setRowCount(0)
-        self.model.setRowCount(len(data))
+        self.model.reload()
 
+    def update_total(self):
         self.total_beneficiaries.setText(
-            f"Total Beneficiaries: {len(data)}"
+            f"Total Beneficiaries: {self.model.total}"
         )
 
-        PROJECT_COL = self.model.columnCount() - 1
-
-        for row_idx, row_data in enumerate(data):
-            for col_idx, col_value in enumerate(row_data):
-
-                if col_idx == PROJECT_COL:
-                    col_value = projects_map.get(col_value, "-")
-
-                item = QStandardItem(str(col_value))
-                item.setEditable(False)
-                item.setTextAlignment(Qt.AlignCenter)
-
-                self.model.setItem(row_idx, col_idx, item)
+    def show_loading(self, loading):
+        if loading:
+            self.total_beneficiaries.setText("Searching ...")
+        else:
+            self.update_total()
 
         # Filtering
     def apply_filter(self):
-        text = self.search_input.text().strip()
-        self.proxyModel.setFilterFixedString(text)
+        self.model.set_search(self.search_input.text())
 
         # Buttons
     def return_to_menu(self):
-        self.close()
-        from ui.menu_page import MenuWindow
-        menu_window = MenuWindow()
-        menu_window.show()
+        navigator().show("menu")
+
+    # Left for another screen: keep the first page, the rest is fetched again on scroll
+    def trim(self):
+        self.model.trim()
 
     def add_beneficiary(self):
-        from ui.beneficiaries.addedit_beneficiary import AddEditBeneficiaryForm
-        self.add_window = AddEditBeneficiaryForm(is_edit=False)
-        self.add_window.show()
-        self.add_window.beneficiary_added.connect(self.load_beneficiaries)
+        navigator().open_form("beneficiary")
 
     def edit_beneficiary(self):
         selection = self.tableView.selectionModel()
@@ -186,27 +176,15 @@ class BeneficiariesWindow(Window):
             return
 
         view_index = selection.selectedRows()[0]
-        source_index = self.proxyModel.mapToSource(view_index)
+        beneficiary_id = self.model.beneficiary_id(view_index.row())
 
-        beneficiary_id = int(
-            self.model.item(source_index.row(), 0).text()
-        )
-
-        from ui.beneficiaries.addedit_beneficiary import AddEditBeneficiaryForm
-        self.editwindow = AddEditBeneficiaryForm(
-            is_edit=True,
-            beneficiary=beneficiary_id
-        )
-        self.editwindow.show()
-        self.editwindow.beneficiary_added.connect(self.load_beneficiaries)
+        navigator().open_form("beneficiary", beneficiary_id, is_edit=True)
 
     def delete_beneficiary(self):
         selected = self.tableView.selectionModel().selectedRows()
         if selected:
             view_index = selected[0]
-            source_index = self.proxyModel.mapToSource(view_index)
-            row = source_index.row()
-            beneficiary_id = int(self.model.item(row, 0).text())
+            beneficiary_id = self.model.beneficiary_id(view_index.row())
 
             confirm = QMessageBox.question(
                 self,
@@ -216,14 +194,17 @@ class BeneficiariesWindow(Window):
             )
 
             if confirm == QMessageBox.Yes:
-                # Delete from database
-                delete_beneficiary(beneficiary_id)
-                # Remove from table
-                self.model.removeRow(row)
-                self.load_beneficiaries()
+                # Delete from database (the model drops the row itself)
+                db_executor().submit(
+                    delete_beneficiary, beneficiary_id,
+                    on_error=self.show_db_error
+                )
         else:
             QMessageBox.warning(self, "Warning", "Please select a beneficiary to delete.")
     
+    def show_db_error(self, error):
+        QMessageBox.warning(self, "Database Error", error)
+
     def export_csv(self):
         path, _ = QFileDialog.getSaveFileName(
             self, "Export CSV", "", "CSV Files (*.csv)"
@@ -231,103 +212,94 @@ class BeneficiariesWindow(Window):
         if not path:
             return
 
-        model = self.tableView.model()
-
-        with open(path, "w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-
-            # headers
-            headers = [
-                model.headerData(col, Qt.Horizontal)
-                for col in range(model.columnCount())
-            ]
-            writer.writerow(headers)
-
-            # data
-            for row in range(model.rowCount()):
-                row_data = [
-                    model.index(row, col).data() or ""
-                    for col in range(model.columnCount())
-                ]
-                writer.writerow(row_data)
-
-    # def import_csv(self):
-    #     path, _ = QFileDialog.getOpenFileName(
-    #         self, "Import CSV", "", "CSV Files (*.csv)"
-    #     )
-    #     if not path:
-    #         return
-
-    #     model = QStandardItemModel()
-    #     self.tableView.setModel(model)
-
-    #     success_count = 0
-    #     failed_rows = []
-
-    #     with open(path, "r", encoding="utf-8") as file:
-    #         reader = csv.reader(file)
-    #         headers = next(reader)
-
-    #         # Normalize headers
-    #         headers = [h.strip().lower() for h in headers]
-    #         model.setHorizontalHeaderLabels(headers)
-
-    #         conn = get_connection()
-    #         cursor = conn.cursor()
-
-    #         for row_number, row in enumerate(reader, start=2):
-    #             data = dict(zip(headers, row))
-
-    #             try:
-    #                 lname     = data.get("Last Name", "").strip()
-    #                 fname     = data.get("First Name", "").strip()
-    #                 mname     = data.get("Middle Name", "").strip()
-    #                 suffix    = data.get("Suffix", "-") or "-"
-    #                 gender    = data.get("Gender", "-") or "-"
-    #                 street    = data.get("Street", "").strip()
-    #                 barangay  = data.get("Barangay", "").strip()
-    #                 contactno = data.get("Contact No.", "").strip()
-
-    #                 # --- project_id MUST be int ---
-    #                 project_raw = data.get("Projects", "").strip()
-    #                 project_id = int(project_raw) if project_raw.isdigit() else None
-
-    #             except Exception:
-    #                 failed_rows.append(f"Row {row_number}: Invalid column format")
-    #                 continue
-
-    #             # --- VALIDATION ---
-    #             is_valid, error_msg = validate_beneficiary(
-    #                 lname, fname, suffix, project_id, mname
-    #             )
-    #             if not is_valid:
-    #                 failed_rows.append(f"Row {row_number}: {error_msg}")
-    #                 continue
-
-    #             # --- INSERT INTO DB ---
-    #             try:
-    #                 cursor.execute("""
-    #                     INSERT INTO beneficiaries
-    #                     (lname, fname, mname, suffix, gender, street, barangay, contactno, project_id)
-    #                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    #                 """, (
-    #                     lname, fname, mname, suffix,
-    #                     gender, street, barangay, contactno, project_id
-    #                 ))
-    #             except Exception as e:
-    #                 failed_rows.append(f"Row {row_number}: DB error ({e})")
-    #                 continue
-
-    #             # --- ADD TO TABLE ---
-    #             model.appendRow([QStandardItem(str(v)) for v in row])
-    #             success_count += 1
-
-    #         conn.commit()
-    #         conn.close()
-
-    #     msg = f"Imported {success_count} row(s) successfully."
-    #     if failed_rows:
-    #         msg += "\n\nFailed rows:\n" + "\n".join(failed_rows)
-
-    #     QMessageBox.information(self, "CSV Import", msg)
+        # Export what the table currently shows, straight from the database
+        worker = QueryWorker(
+            export_beneficiaries_csv, path,
+            self.model.search, self.model.sort_column, self.model.descending
+        )
+        worker.kwargs.update(
+            progress=worker.signals.progress.emit,
+            is_cancelled=worker.is_cancelled
+        )
+
+        self.export_dialog = QProgressDialog("Exporting beneficiaries ...", "Cancel", 0, 0, self)
+        self.export_dialog.setWindowModality(Qt.WindowModal)
+        self.export_dialog.setMinimumDuration(300)
+        self.export_dialog.canceled.connect(worker.cancel)
+        self.export_dialog.canceled.connect(lambda: self.export_btn.setEnabled(True))
+
+        worker.signals.progress.connect(self.update_export_progress)
+        worker.signals.finished.connect(self.export_finished)
+        worker.signals.failed.connect(self.export_failed)
+
+        self.export_btn.setEnabled(False)
+        self.export_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def update_export_progress(self, done, total):
+        self.export_dialog.setMaximum(total)
+        self.export_dialog.setValue(done)
+
+    def export_finished(self, count):
+        self.export_dialog.reset()
+        self.export_btn.setEnabled(True)
+        QMessageBox.information(self, "CSV Export", f"Exported {count} row(s).")
+
+    def export_failed(self, error):
+        self.export_dialog.reset()
+        self.export_btn.setEnabled(True)
+        QMessageBox.warning(self, "CSV Export", f"Export failed: {error}")
+
+    def import_csv(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import CSV", "", "CSV Files (*.csv)"
+        )
+        if not path:
+            return
+
+        worker = QueryWorker(import_beneficiaries_csv, path)
+        worker.kwargs.update(
+            progress=worker.signals.progress.emit,
+            is_cancelled=worker.is_cancelled
+        )
 
+        self.import_dialog = QProgressDialog("Importing beneficiaries ...", "Cancel", 0, 0, self)
+        self.import_dialog.setWindowModality(Qt.WindowModal)
+        self.import_dialog.setMinimumDuration(300)
+        self.import_dialog.canceled.connect(worker.cancel)
+        self.import_dialog.canceled.connect(lambda: self.import_btn.setEnabled(True))
+
+        worker.signals.progress.connect(self.update_import_progress)
+        worker.signals.finished.connect(partial(self.import_finished, path))
+        worker.signals.failed.connect(self.import_failed)
+
+        self.import_btn.setEnabled(False)
+        self.import_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def update_import_progress(self, done, total):
+        self.import_dialog.setMaximum(total)
+        self.import_dialog.setValue(done)
+
+    def import_finished(self, path, result):
+        self.import_dialog.reset()
+        self.import_btn.setEnabled(True)
+
+        imported, rejections = result
+        msg = f"Imported {imported} row(s) successfully."
+        if rejections:
+            report_path = os.path.splitext(path)[0] + "_rejected.csv"
+            write_rejection_report(report_path, rejections)
+
+            msg += f"\n\n{len(rejections)} row(s) were rejected:\n"
+            msg += "\n".join(f"Row {row}: {reason}" for row, reason in rejections[:15])
+            if len(rejections) > 15:
+                msg += "\n..."
+            msg += f"\n\nFull report saved to {report_path}"
+
+        QMessageBox.information(self, "CSV Import", msg)
+
+    def import_failed(self, error):
+        self.import_dialog.reset()
+        self.import_btn.setEnabled(True)
+        QMessageBox.warning(self, "CSV Import", f"Import failed: {error}")
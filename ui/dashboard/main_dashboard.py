@@ -0,0 +1,208 @@
+from PyQt5.QtWidgets import (
+    QVBoxLayout, QHBoxLayout, QGridLayout, QPushButton, QLabel, QComboBox, QWidget,
+    QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QFileDialog
+)
+from PyQt5.QtCore import Qt, QTimer
+
+from ui.others.window import Window
+from ui.others.assets import cached_icon
+from ui.others.change_notifier import change_notifier
+from ui.others.db_executor import db_executor
+from ui.others.navigator import navigator
+from utils.api import get_dashboard_stats, pivot
+from utils.pivot_calls import export_pivot_csv, DIMENSION_LABELS
+
+
+class DashboardWindow(Window):
+    def __init__(self):
+        super().__init__(draggable=True, topbar=True)
+        self.setFixedSize(1400, 900)
+        self.setWindowIcon(cached_icon("assets/peso.ico"))
+
+        main_layout = QVBoxLayout()
+        main_layout.setSpacing(15)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+
+        self.total_beneficiaries = QLabel("Total Beneficiaries: -")
+        self.total_beneficiaries.setObjectName("inputFieldWhite")
+
+        # Tables
+        self.project_table = self.make_table(["Project", "Category", "Beneficiaries"])
+        self.category_table = self.make_table(["Category", "Beneficiaries"])
+        self.barangay_table = self.make_table(["Barangay", "Beneficiaries"])
+        self.gender_table = self.make_table(["Gender", "Beneficiaries"])
+
+        summary_page = QWidget()
+        grid = QGridLayout(summary_page)
+        grid.setSpacing(15)
+        grid.addWidget(self.project_table, 0, 0)
+        grid.addWidget(self.category_table, 0, 1)
+        grid.addWidget(self.barangay_table, 1, 0)
+        grid.addWidget(self.gender_table, 1, 1)
+
+        # Cross-tab
+        crosstab_page = QWidget()
+        crosstab_layout = QVBoxLayout(crosstab_page)
+        crosstab_layout.setSpacing(15)
+
+        self.rows_combo = QComboBox()
+        self.cols_combo = QComboBox()
+        self.cols_combo.addItem("- NONE -", None)
+        for dim, label in DIMENSION_LABELS.items():
+            self.rows_combo.addItem(label.upper(), dim)
+            self.cols_combo.addItem(label.upper(), dim)
+        self.rows_combo.setCurrentIndex(self.rows_combo.findData("barangay"))
+        self.cols_combo.setCurrentIndex(self.cols_combo.findData("gender"))
+        self.export_btn = QPushButton("E&xport")
+
+        for w in (self.rows_combo, self.cols_combo):
+            w.setObjectName("inputField")
+        self.export_btn.setObjectName("buttons")
+
+        pivot_bar = QHBoxLayout()
+        pivot_bar.addWidget(self.rows_combo)
+        pivot_bar.addWidget(self.cols_combo)
+        pivot_bar.addWidget(self.export_btn)
+
+        self.pivot_table = QTableWidget()
+        self.pivot_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.pivot_table.setAlternatingRowColors(True)
+
+        crosstab_layout.addLayout(pivot_bar)
+        crosstab_layout.addWidget(self.pivot_table)
+
+        self.tabs = QTabWidget()
+        self.tabs.addTab(summary_page, "Summary")
+        self.tabs.addTab(crosstab_page, "Cross-tab")
+
+        # Buttons
+        btn_layout = QHBoxLayout()
+        self.refresh_btn = QPushButton("&Refresh")
+        self.return_btn = QPushButton("Return to &Menu")
+        for btn in (self.refresh_btn, self.return_btn):
+            btn.setObjectName("buttons")
+
+        btn_layout.addWidget(self.refresh_btn)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.return_btn)
+
+        main_layout.addWidget(self.total_beneficiaries)
+        main_layout.addWidget(self.tabs)
+        main_layout.addLayout(btn_layout)
+        self.content.addLayout(main_layout)
+
+        self.refresh_btn.clicked.connect(self.load_stats)
+        self.rows_combo.currentIndexChanged.connect(self.load_pivot)
+        self.cols_combo.currentIndexChanged.connect(self.load_pivot)
+        self.export_btn.clicked.connect(self.export_pivot)
+        self.return_btn.clicked.connect(self.return_to_menu)
+
+        # Counts change with every save; refresh once things settle
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(500)
+        self.refresh_timer.timeout.connect(self.load_stats)
+        change_notifier().changed.connect(self.schedule_refresh)
+
+        self.load_worker = None
+        self.pivot_worker = None
+        self.pivot_result = None
+        self.load_stats()
+
+    def make_table(self, headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectRows)
+        table.setAlternatingRowColors(True)
+        table.verticalHeader().setVisible(False)
+
+        header = table.horizontalHeader()
+        for col in range(len(headers) - 1):
+            header.setSectionResizeMode(col, QHeaderView.Stretch)
+        header.setSectionResizeMode(len(headers) - 1, QHeaderView.ResizeToContents)
+        return table
+
+    # Shown again from the menu
+    def reset(self):
+        self.load_stats()
+
+    def schedule_refresh(self, event):
+        if self.isVisible():
+            self.refresh_timer.start()
+
+    def load_stats(self):
+        if self.load_worker is not None:
+            self.load_worker.cancel()
+        self.load_worker = db_executor().submit(
+            get_dashboard_stats,
+            on_result=self.fill_stats,
+            on_error=self.show_db_error
+        )
+        self.load_pivot()
+
+    def load_pivot(self):
+        if self.pivot_worker is not None:
+            self.pivot_worker.cancel()
+        self.pivot_worker = db_executor().submit(
+            pivot, self.rows_combo.currentData(), self.cols_combo.currentData(),
+            on_result=self.fill_pivot,
+            on_error=self.show_db_error
+        )
+
+    def fill_pivot(self, table):
+        self.pivot_worker = None
+        self.pivot_result = table
+
+        # Matrix plus a totals row and column
+        self.pivot_table.clear()
+        self.pivot_table.setColumnCount(len(table.col_labels) + 1)
+        self.pivot_table.setRowCount(len(table.row_labels) + 1)
+        self.pivot_table.setHorizontalHeaderLabels(table.col_labels + ["Total"])
+        self.pivot_table.setVerticalHeaderLabels(table.row_labels + ["Total"])
+
+        rows = list(zip(table.cells, table.row_totals))
+        rows.append((table.col_totals, table.total))
+        for row_idx, (cells, total) in enumerate(rows):
+            for col_idx, value in enumerate(cells + [total]):
+                item = QTableWidgetItem(str(value))
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.pivot_table.setItem(row_idx, col_idx, item)
+
+    def export_pivot(self):
+        if self.pivot_result is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Cross-tab", "", "CSV Files (*.csv)"
+        )
+        if not path:
+            return
+        try:
+            export_pivot_csv(path, self.pivot_result)
+        except OSError as e:
+            QMessageBox.warning(self, "Cross-tab Export", f"Export failed: {e}")
+
+    def fill_stats(self, stats):
+        self.load_worker = None
+        self.total_beneficiaries.setText(f"Total Beneficiaries: {stats.total}")
+        self.fill_table(self.project_table, stats.by_project)
+        self.fill_table(self.category_table, stats.by_category)
+        self.fill_table(self.barangay_table, stats.by_barangay)
+        self.fill_table(self.gender_table, stats.by_gender)
+
+    def fill_table(self, table, rows):
+        table.setRowCount(len(rows))
+        for row_idx, row_data in enumerate(rows):
+            for col_idx, value in enumerate(row_data):
+                item = QTableWidgetItem(str(value))
+                if col_idx == len(row_data) - 1:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(row_idx, col_idx, item)
+
+    def show_db_error(self, error):
+        self.load_worker = None
+        self.pivot_worker = None
+        QMessageBox.warning(self, "Database Error", error)
+
+    def return_to_menu(self):
+        navigator().show("menu")
@@ -1,13 +1,13 @@
 from PyQt5.QtWidgets import (
     QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QCheckBox, QLabel, QSizePolicy, QSpacerItem
 )
-from PyQt5.QtGui import (
-    QPixmap, QFont, QIcon
-)
+from PyQt5.QtGui import QFont
 
-from utils.helpers import resource_path
+from ui.others.assets import cached_pixmap, cached_icon
 from ui.others.window import Window
-from utils.login_calls import validate_login
+from ui.others.db_executor import db_executor
+from ui.others.navigator import navigator
+from utils.api import REMOTE, validate_login
 
 class LoginWindow(Window):
     def __init__(self, db_path=None):
@@ -17,7 +17,7 @@ class LoginWindow(Window):
         self.setup_database()
 
         # Window Setup
-        self.setWindowIcon(QIcon(resource_path("assets/peso.ico")))
+        self.setWindowIcon(cached_icon("assets/peso.ico"))
         self.setFixedSize(520, 350)
 
         font = QFont("Segoe UI", 12)
@@ -25,9 +25,9 @@ class LoginWindow(Window):
 
         # Peso Image
         peso_img = QLabel()
-        peso_img.setPixmap(QPixmap(resource_path("assets/peso.png")))
         peso_img.setFixedSize(220, 220)
         peso_img.setContentsMargins(20, 20, 20, 20)
+        peso_img.setPixmap(cached_pixmap("assets/peso.png", 180, 180))   # 220 minus the margins
         peso_img.setScaledContents(True)
 
         # User and Pass Inputs
@@ -56,16 +56,16 @@ class LoginWindow(Window):
         self.showpass_chkbox.clicked.connect(self.toggle_password)
 
         # Login Button
-        login_btn = QPushButton("Login")
-        login_btn.setObjectName("loginBtn")
-        login_btn.setFont(font)
-        login_btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        login_btn.clicked.connect(self.handle_login)
-        login_btn.setShortcut("Return")
+        self.login_btn = QPushButton("Login")
+        self.login_btn.setObjectName("loginBtn")
+        self.login_btn.setFont(font)
+        self.login_btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.login_btn.clicked.connect(self.handle_login)
+        self.login_btn.setShortcut("Return")
 
         self.username_input.setObjectName("inputField")
         self.password_input.setObjectName("inputField")
-        login_btn.setObjectName("buttons")
+        self.login_btn.setObjectName("buttons")
 
         # Layouts
         main_layout = QHBoxLayout()
@@ -86,7 +86,7 @@ class LoginWindow(Window):
         input_layout.addWidget(self.password_input)
         input_layout.addWidget(self.password_validator)
         input_layout.addWidget(self.showpass_chkbox)
-        input_layout.addWidget(login_btn)
+        input_layout.addWidget(self.login_btn)
         input_layout.addSpacerItem(QSpacerItem(20, 20, QSizePolicy.Minimum, QSizePolicy.Expanding))
 
         self.content.addLayout(main_layout)
@@ -96,14 +96,42 @@ class LoginWindow(Window):
         username = self.username_input.text().strip()
         password = self.password_input.text().strip()
 
-        if validate_login(username, password):
-            self.close()
-            from ui.menu_page import MenuWindow
-            menu = MenuWindow()
-            menu.show()
+        self.login_btn.setEnabled(False)
+        self.password_validator.setText("")
+        db_executor().submit(
+            validate_login, username, password,
+            on_result=self.login_finished,
+            on_error=self.login_failed
+        )
+
+    def login_finished(self, valid):
+        self.login_btn.setEnabled(True)
+
+        if valid:
+            from ui.others.warmup import warm_up
+            from ui.others.change_watcher import change_watcher
+            from ui.others.backup_scheduler import backup_scheduler
+            navigator().show("menu")
+            warm_up()
+            change_watcher().start()
+            # Against a PESO service, backups are the service machine's job
+            if not REMOTE:
+                backup_scheduler().start()
         else:
             self.password_validator.setText("Username or Password is incorrect.")
 
+    def login_failed(self, error):
+        self.login_btn.setEnabled(True)
+        self.password_validator.setText("Cannot reach the database. Please try again.")
+        print("Login Error:", error)
+
+    # Shown again after a logout
+    def reset(self):
+        self.password_input.clear()
+        self.password_validator.setText("")
+        self.login_btn.setEnabled(True)
+        self.username_input.setFocus()
+
     # Password Visibility Toggling Function
     def toggle_password(self):
         if self.showpass_chkbox.isChecked():
@@ -1,61 +1,68 @@
 from PyQt5.QtWidgets import QVBoxLayout, QPushButton
-from PyQt5.QtGui import QIcon, QFont, QIcon
+from PyQt5.QtGui import QFont
 
 from ui.others.window import Window
-from utils.helpers import resource_path
+from ui.others.assets import cached_icon
+from ui.others.navigator import navigator
 
 class MenuWindow(Window):
     def __init__(self):
         super().__init__(draggable=True, topbar=True)
 
         # Window Setup
-        self.setWindowIcon(QIcon(resource_path("assets/peso.ico")))
-        self.setFixedSize(400, 315)
+        self.setWindowIcon(cached_icon("assets/peso.ico"))
+        self.setFixedSize(400, 400)
         main_layout = QVBoxLayout()
         
         font = QFont("Segoe UI", 12)
 
         # Buttons with Icons
         beneficiaries_btn = QPushButton("  Beneficiaries")
-        beneficiaries_btn.setIcon(QIcon(resource_path("assets/beneficiaries.svg")))
+        beneficiaries_btn.setIcon(cached_icon("assets/beneficiaries.svg"))
         beneficiaries_btn.setObjectName("menuButtons")
         beneficiaries_btn.setFont(font)
 
         projects_btn = QPushButton("  Projects")
-        projects_btn.setIcon(QIcon(resource_path("assets/projects.svg")))
+        projects_btn.setIcon(cached_icon("assets/projects.svg"))
         projects_btn.setObjectName("menuButtons")
         projects_btn.setFont(font)
 
+        dashboard_btn = QPushButton("  Dashboard")
+        dashboard_btn.setIcon(cached_icon("assets/dashboard.svg"))
+        dashboard_btn.setObjectName("menuButtons")
+        dashboard_btn.setFont(font)
+
         logout_btn = QPushButton("  Logout")
-        logout_btn.setIcon(QIcon(resource_path("assets/logout.svg")))
+        logout_btn.setIcon(cached_icon("assets/logout.svg"))
         logout_btn.setObjectName("menuButtons")
         logout_btn.setFont(font)
 
         beneficiaries_btn.clicked.connect(self.open_beneficiaries)
         projects_btn.clicked.connect(self.open_projects)
+        dashboard_btn.clicked.connect(self.open_dashboard)
         logout_btn.clicked.connect(self.logout)
 
         # Add buttons to layout
         main_layout.addWidget(beneficiaries_btn)
         main_layout.addWidget(projects_btn)
+        main_layout.addWidget(dashboard_btn)
         main_layout.addWidget(logout_btn)
         main_layout.setContentsMargins(15, 15, 15, 15)
         self.content.addLayout(main_layout)
 
     def open_beneficiaries(self):
-        from ui.beneficiaries.main_beneficiaries import BeneficiariesWindow
-        beneficiaries_window = BeneficiariesWindow()
-        beneficiaries_window.show()
-        self.close()
+        navigator().show("beneficiaries")
 
     def open_projects(self):
-        from ui.projects.main_projects import ProjectsWindow
-        projects_window = ProjectsWindow()
-        projects_window.show()
-        self.close()
+        navigator().show("projects")
+
+    def open_dashboard(self):
+        navigator().show("dashboard")
 
     def logout(self):
-        from ui.login_page import LoginWindow
-        login_window = LoginWindow()
-        login_window.show()
-        self.close()
+        from ui.others.change_watcher import change_watcher
+        from ui.others.backup_scheduler import backup_scheduler
+        # Started by the login window; a logged-out desk shouldn't poll or back up
+        change_watcher().stop()
+        backup_scheduler().stop()
+        navigator().show("login")
@@ -0,0 +1,35 @@
+from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtGui import QIcon, QImageReader, QPixmap, QPixmapCache, QGuiApplication
+
+from utils.helpers import resource_path
+
+_icons = {}
+
+
+def cached_icon(relative_path):
+    """QIcon for an asset, loaded once per run and shared by every window."""
+    icon = _icons.get(relative_path)
+    if icon is None:
+        icon = _icons[relative_path] = QIcon(resource_path(relative_path))
+    return icon
+
+
+def cached_pixmap(relative_path, width, height):
+    """
+    Pixmap of an asset decoded straight at the size it is shown, instead of
+    decoding the full image and scaling it on every paint.
+    """
+    app = QGuiApplication.instance()
+    ratio = app.devicePixelRatio() if app is not None else 1.0
+    size = QSize(round(width * ratio), round(height * ratio))
+
+    key = f"{relative_path}@{size.width()}x{size.height()}"
+    pixmap = QPixmapCache.find(key)
+    if pixmap is None or pixmap.isNull():
+        reader = QImageReader(resource_path(relative_path))
+        if reader.size().isValid():
+            reader.setScaledSize(reader.size().scaled(size, Qt.KeepAspectRatio))
+        pixmap = QPixmap.fromImage(reader.read())
+        pixmap.setDevicePixelRatio(ratio)
+        QPixmapCache.insert(key, pixmap)
+    return pixmap
@@ -0,0 +1,84 @@
+import os
+
+from PyQt5.QtCore import QObject, QThreadPool, QTimer
+
+from ui.others.worker import QueryWorker
+from utils.backup_calls import backup_age, backup_database
+
+
+def _backup_if_due(interval):
+    """backup_database() if the newest backup is older than interval seconds, else None."""
+    age = backup_age()
+    if age is None or age >= interval:
+        return backup_database()
+    return None
+
+
+class BackupScheduler(QObject):
+    """
+    Makes a verified backup (see utils/backup_calls.py) whenever the newest one
+    is older than BACKUP_INTERVAL. Backups live next to the shared database, so
+    with several desks whichever checks first makes it and the rest skip.
+    The copy runs on the global thread pool, not the db_executor, so saves
+    never queue behind it.
+    """
+
+    BACKUP_INTERVAL = float(os.environ.get("PESO_BACKUP_HOURS", 24)) * 3600   # s
+    CHECK_INTERVAL = 10 * 60 * 1000   # ms
+    FIRST_CHECK_DELAY = 60 * 1000     # ms, so it stays out of the way of startup
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._worker = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.CHECK_INTERVAL)
+        self._timer.timeout.connect(self.check)
+
+    def start(self):
+        if self.BACKUP_INTERVAL > 0 and not self._timer.isActive():
+            self._timer.start()
+            QTimer.singleShot(self.FIRST_CHECK_DELAY, self.check)
+
+    def stop(self):
+        self._timer.stop()
+
+    def check(self):
+        # The first check is a single shot that can land after stop()
+        if not self._timer.isActive():
+            return
+        # The backup folder may be on a slow share, so even listing it happens on the worker
+        self._start(_backup_if_due, self.BACKUP_INTERVAL)
+
+    def backup_now(self):
+        return self._start(backup_database)
+
+    def _start(self, fn, *args):
+        if self._worker is not None:
+            return self._worker
+        self._worker = QueryWorker(fn, *args)
+        self._worker.signals.finished.connect(self._finished)
+        self._worker.signals.failed.connect(self._failed)
+        QThreadPool.globalInstance().start(self._worker)
+        return self._worker
+
+    def _finished(self, result):
+        self._worker = None
+        if result is None:
+            return
+        path, message = result
+        print("Backup:", path or message)
+
+    def _failed(self, error):
+        self._worker = None
+        print("Backup Error:", error)
+
+
+_scheduler = None
+
+
+def backup_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = BackupScheduler()
+    return _scheduler
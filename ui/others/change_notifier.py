@@ -0,0 +1,25 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from utils.events import subscribe
+
+
+class ChangeNotifier(QObject):
+    """
+    Re-emits data layer change events as a Qt signal, so slots always run
+    on the GUI thread even when the change was made by a worker thread.
+    """
+    changed = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        subscribe(self.changed.emit)
+
+
+_notifier = None
+
+
+def change_notifier():
+    global _notifier
+    if _notifier is None:
+        _notifier = ChangeNotifier()
+    return _notifier
@@ -0,0 +1,82 @@
+from PyQt5.QtCore import QObject, QTimer
+
+from ui.others.db_executor import db_executor
+from utils.api import REMOTE, poll_changes
+from utils.connection import data_version
+
+
+def _poll_if_changed(version):
+    """(data version, changes published); change_log is only read once the version has moved."""
+    current = data_version()
+    if current == version:
+        return current, 0
+    return current, poll_changes()
+
+
+class ChangeWatcher(QObject):
+    """
+    Keeps open views current with what other desks save. A timer has the
+    db_executor read PRAGMA data_version, which only moves when another
+    connection commits and costs no disk read; only then are the changed rows
+    fetched from change_log and published like local changes. Against a PESO
+    service there is no local file, so the service is asked every time.
+    """
+
+    POLL_INTERVAL = 1000   # ms
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._version = None
+        self._worker = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.POLL_INTERVAL)
+        self._timer.timeout.connect(self.check)
+
+    def start(self):
+        if not self._timer.isActive():
+            self._poll()   # records the current position in the log
+            self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def check(self):
+        if self._worker is not None:
+            return
+        if REMOTE:
+            self._poll()
+            return
+        self._worker = db_executor().submit(
+            _poll_if_changed, self._version, busy=False,
+            on_result=self._checked,
+            on_error=self._failed
+        )
+
+    def _poll(self):
+        self._worker = db_executor().submit(
+            poll_changes, busy=False,
+            on_result=self._finished,
+            on_error=self._failed
+        )
+
+    def _finished(self, count):
+        self._worker = None
+
+    def _checked(self, result):
+        self._worker = None
+        self._version, _ = result
+
+    def _failed(self, error):
+        self._worker = None
+        print("Change Watch Error:", error)
+
+
+_watcher = None
+
+
+def change_watcher():
+    global _watcher
+    if _watcher is None:
+        _watcher = ChangeWatcher()
+    return _watcher
@@ -0,0 +1,106 @@
+from functools import partial
+
+from PyQt5.QtCore import QObject, QThreadPool, QTimer, Qt, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+from ui.others.worker import QueryWorker
+
+
+class DbExecutor(QObject):
+    """
+    Runs data layer calls on a small dedicated thread pool so that SQLite
+    never blocks the Qt event loop. Every window and form goes through here.
+
+        db_executor().submit(get_beneficiary_by_id, 12, on_result=self.fill)
+
+    Results and errors come back on the GUI thread. A call that takes longer
+    than its timeout is interrupted and reported as failed, and a busy cursor
+    is shown while calls are pending.
+    """
+
+    busyChanged = pyqtSignal(bool)
+
+    DEFAULT_TIMEOUT = 15000     # ms
+    BUSY_CURSOR_DELAY = 200     # ms, so quick calls don't flicker the cursor
+    THREADS = 2                 # one call can wait on a lock while reads continue
+
+    TIMEOUT_MESSAGE = "The database did not respond in time. Please try again."
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(self.THREADS)
+        self._pending = set()
+        self._cursor_shown = False
+
+        self._busy_timer = QTimer(self)
+        self._busy_timer.setSingleShot(True)
+        self._busy_timer.setInterval(self.BUSY_CURSOR_DELAY)
+        self._busy_timer.timeout.connect(self._show_busy_cursor)
+
+    @property
+    def busy(self):
+        return bool(self._pending)
+
+    def submit(self, fn, *args, on_result=None, on_error=None, timeout=DEFAULT_TIMEOUT, busy=True, **kwargs):
+        """
+        Queue fn(*args, **kwargs) and return its QueryWorker (cancel() it to drop the result).
+        Pass busy=False for background work the user isn't waiting on: no busy
+        cursor, and no timeout.
+        """
+        worker = QueryWorker(fn, *args, **kwargs)
+        if on_result is not None:
+            worker.signals.finished.connect(on_result)
+        if on_error is not None:
+            worker.signals.failed.connect(on_error)
+        else:
+            worker.signals.failed.connect(lambda error: print("Database Error:", error))
+        if busy:
+            worker.signals.done.connect(partial(self._finished, worker), Qt.QueuedConnection)
+            self._pending.add(worker)
+            if len(self._pending) == 1:
+                self._busy_timer.start()
+                self.busyChanged.emit(True)
+
+        if busy and timeout:
+            QTimer.singleShot(timeout, partial(self._timed_out, worker))
+
+        self._pool.start(worker)
+        return worker
+
+    def wait_for_done(self, msecs=-1):
+        """Block until every queued call has run (used on shutdown and in benchmarks)."""
+        return self._pool.waitForDone(msecs)
+
+    def _timed_out(self, worker):
+        if worker not in self._pending or worker.is_cancelled():
+            return
+        worker.cancel()
+        worker.signals.failed.emit(self.TIMEOUT_MESSAGE)
+        self._finished(worker)
+
+    def _finished(self, worker):
+        if worker not in self._pending:
+            return
+        self._pending.discard(worker)
+        if not self._pending:
+            self._busy_timer.stop()
+            if self._cursor_shown:
+                QApplication.restoreOverrideCursor()
+                self._cursor_shown = False
+            self.busyChanged.emit(False)
+
+    def _show_busy_cursor(self):
+        if self._pending and not self._cursor_shown:
+            QApplication.setOverrideCursor(Qt.BusyCursor)
+            self._cursor_shown = True
+
+
+_executor = None
+
+
+def db_executor():
+    global _executor
+    if _executor is None:
+        _executor = DbExecutor()
+    return _executor
@@ -0,0 +1,127 @@
+import importlib
+from functools import partial
+
+from PyQt5.QtCore import QObject
+from PyQt5.QtWidgets import QApplication
+
+# name: (module, class); imported on first use so startup doesn't pay for them
+SCREENS = {
+    "login": ("ui.login_page", "LoginWindow"),
+    "menu": ("ui.menu_page", "MenuWindow"),
+    "beneficiaries": ("ui.beneficiaries.main_beneficiaries", "BeneficiariesWindow"),
+    "projects": ("ui.projects.main_projects", "ProjectsWindow"),
+    "dashboard": ("ui.dashboard.main_dashboard", "DashboardWindow"),
+}
+FORMS = {
+    "beneficiary": ("ui.beneficiaries.addedit_beneficiary", "AddEditBeneficiaryForm"),
+    "project": ("ui.projects.addedit_project", "AddEditProjectForm"),
+}
+
+
+def _load(spec):
+    module, name = spec
+    return getattr(importlib.import_module(module), name)
+
+
+class Navigator(QObject):
+    """
+    Keeps at most one instance of each screen and form alive and switches
+    between them, so going back to a screen shows it as it was left instead
+    of building it (and re-querying its table) again.
+
+    Screens may define reset(), called when they are shown again, and trim(),
+    called when they are left, to give back memory they can rebuild cheaply.
+    Forms are reset with reset_form(key, is_edit).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._screens = {}
+        self._forms = {}
+        self._current = None
+
+    @property
+    def current(self):
+        return self._current
+
+    def screen(self, name):
+        """The live instance of a screen, built on first use."""
+        window = self._screens.get(name)
+        if window is None:
+            window = self._screens[name] = _load(SCREENS[name])()
+            # Closing a screen from its top bar deletes it; forget it then
+            window.destroyed.connect(partial(self._forget, self._screens, name, window))
+        elif hasattr(window, "reset"):
+            window.reset()
+        return window
+
+    def show(self, name):
+        """Switch to a screen, hiding (not closing) the one that was showing."""
+        previous = self._screens.get(self._current)
+        window = self.screen(name)
+        self._current = name
+        window.show()
+        window.raise_()
+        window.activateWindow()
+
+        if previous is not None and previous is not window:
+            previous.hide()
+            if hasattr(previous, "trim"):
+                previous.trim()
+        return window
+
+    def open_form(self, name, key=None, is_edit=False):
+        """Show the single instance of a form, reset for adding or for editing `key`."""
+        form = self._forms.get(name)
+        if form is None:
+            form = self._forms[name] = _load(FORMS[name])()
+            form.destroyed.connect(partial(self._forget, self._forms, name, form))
+        form.reset_form(key, is_edit)
+        form.show()
+        form.raise_()
+        return form
+
+    def release(self, name):
+        """Destroy a screen or form so its memory is freed; it is rebuilt on next use."""
+        for cache in (self._screens, self._forms):
+            widget = cache.pop(name, None)
+            if widget is not None:
+                widget.hide()
+                widget.deleteLater()
+        if self._current == name:
+            self._current = None
+
+    def footprint(self):
+        """What the navigator is holding on to, for leak checks over a long session."""
+        def children(widget):
+            return len(widget.findChildren(QObject))
+
+        model_rows = 0
+        for window in self._screens.values():
+            model = getattr(window, "model", None)
+            if model is not None:
+                model_rows += model.rowCount()
+
+        return {
+            "screens": {name: children(window) for name, window in self._screens.items()},
+            "forms": {name: children(form) for name, form in self._forms.items()},
+            "model_rows": model_rows,
+            "app_widgets": len(QApplication.allWidgets()),
+        }
+
+    def _forget(self, cache, name, widget, *args):
+        if cache.get(name) is not widget:
+            return
+        del cache[name]
+        if cache is self._screens and self._current == name:
+            self._current = None
+
+
+_navigator = None
+
+
+def navigator():
+    global _navigator
+    if _navigator is None:
+        _navigator = Navigator()
+    return _navigator
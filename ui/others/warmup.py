@@ -0,0 +1,26 @@
+from PyQt5.QtCore import QTimer
+
+from ui.others.db_executor import db_executor
+from utils.api import query_beneficiaries, get_project_catalog
+
+
+def _warm_up_failed(error):
+    print("Warm-up Error:", error)
+
+
+def _import_windows():
+    # Pay for the table windows' imports while the user is still on the menu
+    import ui.beneficiaries.main_beneficiaries   # noqa: F401
+    import ui.projects.main_projects   # noqa: F401
+    import ui.dashboard.main_dashboard   # noqa: F401
+
+
+def warm_up():
+    """
+    Called right after a successful login: read the first page of beneficiaries
+    and the project catalog in the background so the first window opens from a
+    warm cache, then import the table windows once the event loop is idle.
+    """
+    db_executor().submit(query_beneficiaries, on_error=_warm_up_failed, busy=False)
+    db_executor().submit(get_project_catalog, on_error=_warm_up_failed, busy=False)
+    QTimer.singleShot(0, _import_windows)
@@ -0,0 +1,67 @@
+import sqlite3
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from utils.api import REMOTE
+from utils.connection import get_connection
+
+
+class WorkerSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+    done = pyqtSignal()     # always emitted last, even when cancelled
+
+
+class QueryWorker(QRunnable):
+    """
+    Runs a data layer call on a thread pool thread and reports back through signals.
+    cancel() aborts the SQLite statement in progress and suppresses finished/failed.
+    """
+
+    # SQLite virtual machine steps between cancellation checks
+    CHECK_INTERVAL = 1000
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            self.signals.done.emit()
+
+    def _run(self):
+        if self._cancelled:
+            return
+
+        # Remote calls have no local statement to interrupt
+        conn = None if REMOTE else get_connection()
+        if conn is not None:
+            conn.set_progress_handler(self.is_cancelled, self.CHECK_INTERVAL)
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except sqlite3.OperationalError as e:
+            if not self._cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        finally:
+            if conn is not None:
+                conn.set_progress_handler(None, 0)
+
+        if not self._cancelled:
+            self.signals.finished.emit(result)
@@ -1,10 +1,13 @@
+from functools import partial
+
 from PyQt5.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QMessageBox
 )
 from PyQt5.QtCore import Qt, pyqtSignal
 from ui.others.window import Window
 from ui.others.uppercase import UpperCaseLineEdit
-from utils.project_calls import add_project, validate_project, edit_project, get_project_by_id
+from ui.others.db_executor import db_executor
+from utils.api import save_project, get_project_by_id
 
 
 class AddEditProjectForm(Window):
@@ -51,7 +54,7 @@ class AddEditProjectForm(Window):
 
         # Buttons
         btn_layout = QHBoxLayout()
-        self.submit_btn = QPushButton("Save" if is_edit else "Add")
+        self.submit_btn = QPushButton()
         cancel_btn = QPushButton("Cancel")
 
         self.submit_btn.setObjectName("buttons")
@@ -70,9 +73,20 @@ class AddEditProjectForm(Window):
 
         self.content.addLayout(layout)
 
+        self.reset_form(project, is_edit)
+
+    # The navigator keeps one form alive and resets it for every add/edit
+    def reset_form(self, project=None, is_edit=False):
         self.project_id = project
-        self.populate_field(self.project_id)
+        self.row_version = None   # set once the row is loaded, checked on save
         self.isEdit = is_edit
+        self.submit_btn.setText("Save" if is_edit else "Add")
+        self.submit_btn.setEnabled(True)
+
+        self.projectname_input.clear()
+        self.category_combo.setCurrentIndex(0)
+
+        self.populate_field(project)
 
     # SUBMIT HANDLER
     def handle_submit(self):
@@ -80,24 +94,40 @@ class AddEditProjectForm(Window):
         project_name = self.projectname_input.text().strip()
         category = self.category_combo.currentText()
 
-        success, msg= (validate_project(project_name, category))
+        self.submit_btn.setEnabled(False)
+        db_executor().submit(
+            save_project,
+            project_id if self.isEdit else None, project_name, category,
+            self.row_version if self.isEdit else None,
+            on_result=self.submit_finished,
+            on_error=self.submit_failed
+        )
+
+    def submit_finished(self, result):
+        self.submit_btn.setEnabled(True)
+        success, msg = result
 
         if success:
-            if self.isEdit:
-                edit_project(project_id, project_name, category)
-                self.project_added.emit()
-                self.close()
-            else:
-                add_project(project_name, category)
-                self.project_added.emit()
-                self.close()
+            self.project_added.emit()
+            self.close()
         else:
             QMessageBox.warning(self, "Notification", msg)
 
+    def submit_failed(self, error):
+        self.submit_btn.setEnabled(True)
+        QMessageBox.warning(self, "Database Error", error)
+
     def populate_field(self, project_id):
-        data = get_project_by_id(project_id)
-        if data:
-            project_name, category = data
+        if project_id is not None:
+            db_executor().submit(
+                get_project_by_id, project_id,
+                on_result=partial(self.fill_fields, project_id)
+            )
+
+    def fill_fields(self, project_id, data):
+        # The form may have been reset for another project meanwhile
+        if data and project_id == self.project_id:
+            project_name, category, self.row_version = data
 
             self.projectname_input.setText(project_name)
 
@@ -2,19 +2,23 @@ from PyQt5.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QPushButton, QTableView,
     QSizePolicy, QHeaderView, QMessageBox, QLabel
 )
-from PyQt5.QtGui import QStandardItemModel, QStandardItem, QIcon
-from PyQt5.QtCore import Qt, QSortFilterProxyModel
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtCore import Qt, QTimer
 
 from ui.others.window import Window
-from utils.project_calls import get_projects_list, delete_project
+from ui.others.change_notifier import change_notifier
+from ui.others.db_executor import db_executor
+from ui.others.navigator import navigator
+from utils.events import INSERTED, UPDATED, DELETED, RELOADED
+from utils.api import query_projects, delete_project
 from ui.others.uppercase import UpperCaseLineEdit
-from utils.helpers import resource_path
+from ui.others.assets import cached_icon
 
 class ProjectsWindow(Window):
     def __init__(self):
         super().__init__(draggable=True, topbar=True)
         self.setFixedSize(1000, 820)
-        self.setWindowIcon(QIcon(resource_path("assets/peso.ico")))
+        self.setWindowIcon(cached_icon("assets/peso.ico"))
 
         # --- Main layout ---
         main_layout = QVBoxLayout()
@@ -26,7 +30,13 @@ class ProjectsWindow(Window):
         self.search_input = UpperCaseLineEdit()
         self.search_input.setPlaceholderText("Search ...")
         self.search_input.setObjectName("inputField")
-        self.search_input.textChanged.connect(self.apply_filter)
+
+        # Wait for a pause in typing before searching
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.apply_filter)
+        self.search_input.textChanged.connect(lambda: self.search_timer.start())
         
         search_layout.addWidget(self.search_input)
 
@@ -38,20 +48,17 @@ class ProjectsWindow(Window):
         self.tableView.setSelectionBehavior(QTableView.SelectRows)
         self.tableView.setSelectionMode(QTableView.SingleSelection)
         self.tableView.setEditTriggers(QTableView.NoEditTriggers)
-        self.tableView.setSortingEnabled(True)
+        self.tableView.horizontalHeader().setSortIndicatorShown(True)
+        self.tableView.horizontalHeader().setSectionsClickable(True)
         self.tableView.verticalHeader().setVisible(False)
 
-        # Model
+        # Model (sorting and filtering are done by the database)
         self.model = QStandardItemModel()
 
-        # Proxy model for filtering
-        self.proxyModel = QSortFilterProxyModel(self)
-        self.proxyModel.setFilterCaseSensitivity(Qt.CaseInsensitive)
-        self.proxyModel.setSourceModel(self.model)
-
-        self.proxyModel.setFilterKeyColumn(-1)
-
-        self.tableView.setModel(self.proxyModel)
+        self.tableView.setModel(self.model)
+        header = self.tableView.horizontalHeader()
+        header.setSortIndicator(0, Qt.AscendingOrder)
+        header.sortIndicatorChanged.connect(self.load_projects)
 
         # --- Bottom Buttons ---
         btn_layout = QHBoxLayout()
@@ -81,9 +88,12 @@ class ProjectsWindow(Window):
         self.edit_btn.clicked.connect(self.edit_project)
         self.delete_btn.clicked.connect(self.delete_project)
 
+        self.load_worker = None
         self.setup_headers()
         self.load_projects()
 
+        change_notifier().changed.connect(self.apply_change)
+
     # Setup table headers (one time only)
     def setup_headers(self):
         headers = [
@@ -101,10 +111,25 @@ class ProjectsWindow(Window):
             header.setSectionResizeMode(col, QHeaderView.Stretch)
 
     def load_projects(self):
-        self.model.removeRows(0, self.model.rowCount())
+        # Only the newest query gets to fill the table
+        if self.load_worker is not None:
+            self.load_worker.cancel()
 
-        data = get_projects_list()
+        header = self.tableView.horizontalHeader()
+        self.load_worker = db_executor().submit(
+            query_projects,
+            self.search_input.text(),
+            header.sortIndicatorSection(),
+            header.sortIndicatorOrder() == Qt.DescendingOrder,
+            on_result=self.fill_table,
+            on_error=self.show_db_error
+        )
+
+    def fill_table(self, result):
+        self.load_worker = None
+        data, _ = result
 
+        self.model.removeRows(0, self.model.rowCount())
         self.model.setRowCount(len(data))
 
         for row_idx, row_data in enumerate(data):
@@ -114,44 +139,72 @@ class ProjectsWindow(Window):
                 item.setTextAlignment(Qt.AlignCenter)
                 self.model.setItem(row_idx, col_idx, item)
 
+    def find_row(self, project_id):
+        for row in range(self.model.rowCount()):
+            if self.model.item(row, 0).text() == str(project_id):
+                return row
+        return -1
+
+    # Patch the changed row in place instead of reloading the table
+    def apply_change(self, event):
+        if event.table != "projects":
+            return
+
+        # A search result set can't tell whether a new project matches it, and a
+        # pending query may have started before the change was committed
+        searching = self.search_input.text().strip() and event.kind == INSERTED
+        if event.kind == RELOADED or searching or self.load_worker is not None:
+            self.load_projects()
+            return
+
+        row = self.find_row(event.key)
+
+        if event.kind == DELETED:
+            if row != -1:
+                self.model.removeRow(row)
+            return
+
+        items = []
+        for col_value in event.row:
+            item = QStandardItem(str(col_value))
+            item.setEditable(False)
+            item.setTextAlignment(Qt.AlignCenter)
+            items.append(item)
+
+        if event.kind == UPDATED and row != -1:
+            for col_idx, item in enumerate(items):
+                self.model.setItem(row, col_idx, item)
+        elif event.kind == INSERTED and row == -1:
+            self.model.appendRow(items)
+
     def apply_filter(self):
-        text = self.search_input.text().strip()
-        self.proxyModel.setFilterFixedString(text)
+        self.load_projects()
+
+    def show_db_error(self, error):
+        self.load_worker = None
+        QMessageBox.warning(self, "Database Error", error)
 
     # Buttons
     def return_to_menu(self):
-        self.close()
-        from ui.menu_page import MenuWindow
-        menu_window = MenuWindow()
-        menu_window.show()
+        navigator().show("menu")
 
     def add_project(self):
-        from ui.projects.addedit_project import AddEditProjectForm
-        self.add_window = AddEditProjectForm()
-        self.add_window.show()
-        self.add_window.project_added.connect(self.load_projects)
+        navigator().open_form("project")
 
     def edit_project(self):
         selected = self.tableView.selectionModel().selectedRows()
         if selected:
-            view_index = selected[0]
-            source_index = self.proxyModel.mapToSource(view_index)
-            row = source_index.row()
+            row = selected[0].row()
             project_id = int(self.model.item(row, 0).text())
 
-            from ui.projects.addedit_project import AddEditProjectForm
-            self.editwindow = AddEditProjectForm(is_edit=True, project=project_id)
-            self.editwindow.show()
-            self.editwindow.project_added.connect(self.load_projects)
+            navigator().open_form("project", project_id, is_edit=True)
         else:
             QMessageBox.warning(self, "Warning", "Please select a project to edit.")
 
     def delete_project(self):
         selected = self.tableView.selectionModel().selectedRows()
         if selected:
-            view_index = selected[0]
-            source_index = self.proxyModel.mapToSource(view_index)
-            row = source_index.row()
+            row = selected[0].row()
             project_id = int(self.model.item(row, 0).text())
 
             confirm = QMessageBox.question(
@@ -162,10 +215,10 @@ class ProjectsWindow(Window):
             )
 
             if confirm == QMessageBox.Yes:
-                # Delete from database
-                delete_project(project_id)
-                # Remove from table
-                self.model.removeRow(row)
-                self.load_projects()
+                # Delete from database (apply_change removes the row)
+                db_executor().submit(
+                    delete_project, project_id,
+                    on_error=self.show_db_error
+                )
         else:
             QMessageBox.warning(self, "Warning", "Please select a project to delete.")
\ No newline at end of file
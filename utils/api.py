@@ -0,0 +1,30 @@
+"""
+The data layer calls the windows make. With PESO_SERVER set (e.g.
+http://records-pc:8765) they go to a PESO service over HTTP (see
+utils/server.py and utils/remote_calls.py); otherwise they run against the
+local database file as before.
+"""
+from utils.remote_calls import SERVER_URL
+
+REMOTE = bool(SERVER_URL)
+
+if REMOTE:
+    from utils.remote_calls import (   # noqa: F401
+        validate_login,
+        query_beneficiaries, get_beneficiary_by_id, save_beneficiary, delete_beneficiary,
+        export_beneficiaries_csv, import_beneficiaries_csv,
+        get_project_catalog, get_projects_list, query_projects, get_project_by_id, save_project, delete_project,
+        get_dashboard_stats, pivot, poll_changes,
+    )
+else:
+    from utils.login_calls import validate_login   # noqa: F401
+    from utils.beneficiary_calls import (   # noqa: F401
+        query_beneficiaries, get_beneficiary_by_id, save_beneficiary, delete_beneficiary,
+    )
+    from utils.csv_calls import export_beneficiaries_csv, import_beneficiaries_csv   # noqa: F401
+    from utils.project_calls import (   # noqa: F401
+        get_project_catalog, get_projects_list, query_projects, get_project_by_id, save_project, delete_project,
+    )
+    from utils.stats_calls import get_dashboard_stats   # noqa: F401
+    from utils.pivot_calls import pivot   # noqa: F401
+    from utils.change_calls import poll_changes   # noqa: F401
@@ -0,0 +1,179 @@
+import os
+import time
+import sqlite3
+from pathlib import Path
+
+from utils import connection
+from utils.connection import open_connection
+
+# Defaults to a backups folder next to the database
+BACKUP_DIR = os.environ.get("PESO_BACKUP_DIR")
+BACKUP_PREFIX = "peso-"
+BACKUP_SUFFIX = ".db"
+
+# Snapshots kept; older ones are deleted after each successful backup
+KEEP_BACKUPS = 7
+# Pages copied per step in rollback-journal mode, with a pause in between so
+# desks can save while a backup runs (a reader blocks writers there). In WAL
+# mode readers never block writers, so the copy is done in one step, which
+# also keeps other desks' commits from restarting it over and over.
+PAGES_PER_STEP = 1024
+STEP_PAUSE = 0.01   # seconds
+
+
+def backup_dir():
+    return BACKUP_DIR or os.path.join(os.path.dirname(os.path.abspath(connection.DB_PATH)), "backups")
+
+
+def list_backups():
+    """Backup files, newest first."""
+    folder = backup_dir()
+    if not os.path.isdir(folder):
+        return []
+    names = [
+        name for name in os.listdir(folder)
+        if name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX)
+    ]
+    # Names are timestamps, so they sort by age
+    return [os.path.join(folder, name) for name in sorted(names, reverse=True)]
+
+
+def latest_backup():
+    backups = list_backups()
+    return backups[0] if backups else None
+
+
+def backup_age(path=None):
+    """Seconds since the newest backup was made, or None if there is none."""
+    path = path or latest_backup()
+    if path is None:
+        return None
+    return time.time() - os.path.getmtime(path)
+
+
+def _read_only_uri(path, immutable=False):
+    # as_uri() percent-encodes the path, so ?, # and % in folder names stay part of it
+    return Path(path).resolve().as_uri() + "?mode=ro" + ("&immutable=1" if immutable else "")
+
+
+def _new_backup_path():
+    """
+    A fresh backup name, to the millisecond, with its .part file created exclusively
+    so two backups started at the same moment (the scheduler, the CLI, a --snapshot
+    export) never write to the same file.
+    """
+    while True:
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+        path = os.path.join(backup_dir(), f"{BACKUP_PREFIX}{stamp}{BACKUP_SUFFIX}")
+        try:
+            if not os.path.exists(path):
+                open(path + ".part", "x").close()
+                return path
+        except FileExistsError:
+            pass
+        time.sleep(0.001)
+
+
+def quick_check(path):
+    """Run PRAGMA quick_check on a database file. Returns (ok, message)."""
+    conn = sqlite3.connect(_read_only_uri(path), uri=True)
+    try:
+        problems = [row[0] for row in conn.execute("PRAGMA quick_check")]
+    finally:
+        conn.close()
+    ok = problems == ["ok"]
+    return ok, "ok" if ok else "; ".join(problems[:10])
+
+
+def rotate_backups(keep=KEEP_BACKUPS):
+    """Delete all but the newest keep backups. Returns the deleted paths."""
+    removed = []
+    for path in list_backups()[keep:]:
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError as e:
+            print("Backup Rotate Error:", e)
+    return removed
+
+
+def backup_database(progress=None, is_cancelled=None, keep=KEEP_BACKUPS):
+    """
+    Copy the live database to a new timestamped file in BACKUP_DIR with the SQLite
+    backup API, which reads a consistent snapshot while desks keep saving (unlike
+    copying the file). The copy is verified with quick_check before it replaces
+    anything, then old backups are rotated out. progress(done, total) is called
+    in pages. Returns (path, message); path is None if the backup failed or was
+    cancelled.
+    """
+    os.makedirs(backup_dir(), exist_ok=True)
+    target_path = _new_backup_path()
+    temp_path = target_path + ".part"
+
+    # A connection of its own: the backup can take a while and must not hold
+    # the thread's shared connection in a read transaction
+    source = open_connection()
+    target = None
+    finished = False
+    try:
+        target = sqlite3.connect(temp_path)
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+
+        def step(status, remaining, total):
+            if progress:
+                progress(total - remaining, total)
+            if is_cancelled and is_cancelled():
+                raise InterruptedError
+            if not wal:
+                time.sleep(STEP_PAUSE)
+
+        source.backup(target, pages=-1 if wal else PAGES_PER_STEP, progress=step)
+        # Backups are standalone files; don't leave them needing a -wal file
+        target.execute("PRAGMA journal_mode = DELETE")
+        finished = True
+    except InterruptedError:
+        return None, "Backup cancelled."
+    except (sqlite3.Error, OSError) as e:
+        print("Backup Error:", e)
+        return None, f"Backup failed: {e}"
+    finally:
+        source.close()
+        if target is not None:
+            target.close()
+        # Whatever stopped the copy (including a progress callback raising), no .part is left behind
+        if not finished and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    ok, message = quick_check(temp_path)
+    if not ok:
+        os.remove(temp_path)
+        return None, f"Backup failed verification: {message}"
+
+    os.replace(temp_path, target_path)
+    rotate_backups(keep)
+    return target_path, "Backup complete."
+
+
+def open_snapshot(path=None):
+    """
+    Open a backup read-only for reports and exports. Backups never change, so the
+    connection is opened immutable: no locks at all, nothing shared with the live
+    database. Pass it as conn= to export_beneficiaries_csv(), pivot(), etc.
+    The caller closes it.
+    """
+    path = path or latest_backup()
+    if path is None:
+        raise FileNotFoundError("No backup to open.")
+    return sqlite3.connect(_read_only_uri(path, immutable=True), uri=True, check_same_thread=False)
+
+
+def reporting_snapshot(max_age=3600):
+    """A read-only snapshot at most max_age seconds old, making a backup first if needed."""
+    age = backup_age()
+    if age is None or age > max_age:
+        path, message = backup_database()
+        if path is None:
+            raise RuntimeError(message)
+    return open_snapshot()
+
@@ -1,13 +1,5 @@
-import os
-import sys
-import sqlite3
-
-# DB in same folder as EXE
-app_folder = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(app_folder, "database.db")
-
-def get_connection():
-    return sqlite3.connect(DB_PATH)
+from utils.connection import get_connection, write_transaction
+from utils.events import publish, INSERTED, UPDATED, DELETED
 
 def get_beneficiaries():
     conn = get_connection()
@@ -29,25 +21,291 @@ def get_beneficiaries():
     """)
 
     beneficiaries = cursor.fetchall()
-    conn.close()
     return beneficiaries
 
+DISPLAY_HEADERS = [
+    "ID", "Last Name", "First Name", "Middle Name", "Suffix",
+    "Gender", "Street", "Barangay", "Contact No.", "Projects"
+]
+
+# Sortable SQL expression for each table column, in display order. Projects
+# sorts on the stored projects_text (see migration 11), not the aggregate.
+SORT_COLUMNS = [
+    "b.beneficiary_id", "b.lname", "b.fname", "b.mname", "b.suffix",
+    "b.gender", "b.street", "b.barangay", "b.contactno", "b.projects_text"
+]
+
+def split_terms(terms):
+    """Accept a search string or a list of strings and return the individual terms."""
+    if not terms:
+        return []
+    if isinstance(terms, str):
+        terms = [terms]
+    return [word for term in terms for word in term.split()]
+
+def fts_query(terms):
+    """
+    Turn search terms into an FTS5 query where every term must match the
+    start of a word, e.g. "DELA CRU" -> '"DELA"* "CRU"*'.
+    """
+    tokens = []
+    for term in split_terms(terms):
+        # The index tokenizer splits on punctuation, so do the same here
+        words = "".join(ch if ch.isalnum() else " " for ch in term).split()
+        tokens.extend(f'"{word}"*' for word in words)
+    return " ".join(tokens)
+
+# Search relevance, the order of a search without a sort column
+RANK_KEY = "f.rank"
+
+def _sort_key(sort_column, descending, ranked=False):
+    """Return (expression, direction) to order rows by, before beneficiary_id as the tie-break."""
+    direction = "DESC" if descending else "ASC"
+    if sort_column is None or not 0 <= sort_column < len(SORT_COLUMNS):
+        if ranked:
+            return RANK_KEY, "ASC"
+        sort_column = 0
+    return SORT_COLUMNS[sort_column], direction
+
+def _order_clause(sort_column, descending, ranked=False):
+    key, direction = _sort_key(sort_column, descending, ranked)
+    return f"ORDER BY {key} {direction}, b.beneficiary_id {direction}"
+
+# Separator between project names in the Projects column
+PROJECT_SEPARATOR = ", "
+
+# Columns of a beneficiary as shown in the table (b = beneficiaries). The
+# projects are aggregated per row by a correlated subquery on the enrollment
+# table's primary key, so a page of rows is still a single query.
+DISPLAY_COLUMNS = f"""
+    b.beneficiary_id,
+    COALESCE(NULLIF(b.lname, ''), '-'),
+    COALESCE(NULLIF(b.fname, ''), '-'),
+    COALESCE(NULLIF(b.mname, ''), '-'),
+    COALESCE(NULLIF(b.suffix, ''), '-'),
+    COALESCE(NULLIF(b.gender, ''), '-'),
+    COALESCE(NULLIF(b.street, ''), '-'),
+    COALESCE(NULLIF(b.barangay, ''), '-'),
+    COALESCE(NULLIF(b.contactno, ''), '-'),
+    COALESCE((
+        SELECT group_concat(project_name, '{PROJECT_SEPARATOR}') FROM (
+            SELECT p.project_name
+            FROM beneficiary_projects bp
+            JOIN projects p ON p.project_id = bp.project_id
+            WHERE bp.beneficiary_id = b.beneficiary_id
+            ORDER BY p.project_name
+        )
+    ), '-') AS projects
+"""
+
+def _search_source(terms):
+    """Return (from, where, params, ranked) for the search terms."""
+    match = fts_query(terms)
+    if not match:
+        return "beneficiaries b", "", [], False
+    source = """
+        beneficiaries_fts f
+        JOIN beneficiaries b ON b.beneficiary_id = f.rowid
+    """
+    return source, "WHERE beneficiaries_fts MATCH ?", [match], True
+
+def beneficiary_select(terms=None, sort_column=None, descending=False):
+    """
+    Build the SELECT behind the beneficiaries table for the given search and sort.
+    Returns (sql, params); callers stream the cursor (see beneficiary_page_select for pages).
+    """
+    source, where, params, ranked = _search_source(terms)
+    sql = f"""
+        SELECT {DISPLAY_COLUMNS}
+        FROM {source}
+        {where}
+        {_order_clause(sort_column, descending, ranked)}
+    """
+    return sql, params
+
+def beneficiary_page_select(terms=None, sort_column=None, descending=False, limit=200, offset=0, after=None):
+    """
+    Like beneficiary_select(), for one page: the ids are sorted and paged first and
+    only the rows on the page are joined to their columns, so the Projects aggregate
+    runs for those rows alone. With after = (sort key, beneficiary_id) of the last
+    row already loaded, the page starts right after it with seeks in the column's
+    index instead of skipping OFFSET rows. Returns (sql, params).
+    """
+    source, where, params, ranked = _search_source(terms)
+    key, direction = _sort_key(sort_column, descending, ranked)
+    order = f"ORDER BY {key} {direction}, b.beneficiary_id {direction}"
+
+    if after is None:
+        page = f"SELECT b.beneficiary_id, {key} AS sort_key FROM {source} {where} {order} LIMIT ? OFFSET ?"
+        page_params = params + [limit, offset]
+    else:
+        # The rest of the rows sharing the last key, then the rows with later keys.
+        # Two seeks, because SQLite only ranges on the first column of a row value.
+        op = "<" if direction == "DESC" else ">"
+        where = f"{where} AND" if where else "WHERE"
+        page = f"""
+            SELECT * FROM (
+                SELECT b.beneficiary_id, {key} AS sort_key FROM {source}
+                {where} {key} = ? AND b.beneficiary_id {op} ?
+                ORDER BY b.beneficiary_id {direction} LIMIT ?
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT b.beneficiary_id, {key} AS sort_key FROM {source}
+                {where} {key} {op} ?
+                {order} LIMIT ?
+            )
+            ORDER BY sort_key {direction}, beneficiary_id {direction} LIMIT ?
+        """
+        last_key, last_id = after
+        page_params = params + [last_key, last_id, limit] + params + [last_key, limit, limit]
+
+    sql = f"""
+        SELECT {DISPLAY_COLUMNS}
+        FROM ({page}) page
+        JOIN beneficiaries b ON b.beneficiary_id = page.beneficiary_id
+        ORDER BY page.sort_key {direction}, b.beneficiary_id {direction}
+    """
+    return sql, page_params
+
+def _seek_position(conn, terms, sort_column, descending, after):
+    """(sort key, beneficiary_id) of row after, or None when paging must use OFFSET."""
+    key, _ = _sort_key(sort_column, descending, ranked=bool(fts_query(terms)))
+    if after is None or key == RANK_KEY:
+        return None
+    row = conn.execute(f"SELECT {key} FROM beneficiaries b WHERE b.beneficiary_id = ?", (after,)).fetchone()
+    # Deleted by another desk meanwhile
+    if row is None or row[0] is None:
+        return None
+    return row[0], after
+
+def count_beneficiaries(terms=None, conn=None):
+    cursor = (conn or get_connection()).cursor()
+    match = fts_query(terms)
+    if match:
+        cursor.execute(
+            "SELECT COUNT(*) FROM beneficiaries_fts WHERE beneficiaries_fts MATCH ?",
+            (match,)
+        )
+    else:
+        # Kept current by triggers (see migration 6), so no table scan
+        cursor.execute("SELECT COALESCE(SUM(count), 0) FROM stats_counters WHERE dimension = 'total'")
+    return cursor.fetchone()[0]
+
+def query_beneficiaries(terms=None, sort_column=None, descending=False, offset=0, limit=200, with_total=True,
+                        after=None):
+    """
+    Return one page of display rows plus the number of rows matching the search terms.
+    Without a sort column, search results come back best match first.
+    The total is None when with_total is False (e.g. when fetching later pages).
+    after is the id of the last row already loaded (the row at offset - 1): the page
+    then continues from that row through the sort index, and offset is only used
+    when the row is gone or the results are in relevance order.
+    """
+    conn = get_connection()
+    position = _seek_position(conn, terms, sort_column, descending, after)
+    sql, params = beneficiary_page_select(terms, sort_column, descending, limit, offset, position)
+
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+
+    total = None
+    if with_total:
+        if offset == 0 and len(rows) < limit:
+            total = len(rows)
+        else:
+            total = count_beneficiaries(terms)
+
+    return rows, total
+
+def get_beneficiary_row(beneficiary_id):
+    """Return a single beneficiary in the same shape as the rows of query_beneficiaries()."""
+    cursor = get_connection().cursor()
+    cursor.execute(f"""
+        SELECT {DISPLAY_COLUMNS}
+        FROM beneficiaries b
+        WHERE b.beneficiary_id = ?
+    """, (beneficiary_id,))
+    return cursor.fetchone()
+
 def get_beneficiary_by_id(beneficiary_id):
     try:
         conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT lname, fname, mname, suffix, gender, street, barangay, contactno, project_id
+            SELECT lname, fname, mname, suffix, gender, street, barangay, contactno, project_id, row_version
             FROM beneficiaries
             WHERE beneficiary_id = ?
         """, (beneficiary_id,))
         result = cursor.fetchone()
-        conn.close()
         return result
     except Exception as e:
         print("Fetch Error:", e)
         return None
 
+DUPLICATE_MESSAGE = "Duplicate beneficiary exists."
+CONFLICT_MESSAGE = "This beneficiary was changed at another desk. Reopen it to see the latest details."
+DELETED_MESSAGE = "This beneficiary was deleted at another desk."
+ALREADY_ENROLLED_MESSAGE = "Beneficiary is already enrolled in this project."
+ENROLLED_MESSAGE = "Existing beneficiary enrolled in the project."
+
+def normalize_choice(value):
+    """Suffix and gender are stored as "-" when not given, the way the form saves them."""
+    value = (value or "").strip()
+    return value or "-"
+
+def find_duplicate(lname, fname, mname, suffix, exclude_id=None):
+    """Return the id of another beneficiary with the same full name, or None."""
+    query = """
+        SELECT beneficiary_id FROM beneficiaries
+        WHERE lname = ? AND fname = ? AND mname = ? AND suffix = ?
+    """
+    params = [lname, fname, mname.strip(), normalize_choice(suffix)]
+
+    if exclude_id is not None:
+        query += " AND beneficiary_id != ?"
+        params.append(exclude_id)
+
+    row = get_connection().execute(query + " LIMIT 1", params).fetchone()
+    return row[0] if row else None
+
+def find_duplicate_groups():
+    """
+    Every set of beneficiaries sharing a full name, e.g. from imports made before
+    the duplicate check existed. Returns [[beneficiary_id, ...]], lowest id first.
+    """
+    cursor = get_connection().execute("""
+        SELECT group_concat(beneficiary_id)
+        FROM beneficiaries
+        GROUP BY lname, fname, mname, suffix
+        HAVING COUNT(*) > 1
+    """)
+    return [sorted(int(i) for i in ids.split(",")) for ids, in cursor]
+
+def merge_duplicates(beneficiary_ids):
+    """
+    Keep the oldest (lowest id) of beneficiary_ids, move the others' enrollments
+    onto it and delete them. Returns the id that was kept.
+    """
+    keep, *others = sorted(beneficiary_ids)
+    if not others:
+        return keep
+
+    placeholders = ", ".join("?" * len(others))
+    with write_transaction() as conn:
+        conn.execute(f"""
+            INSERT OR IGNORE INTO beneficiary_projects (beneficiary_id, project_id)
+            SELECT ?, project_id FROM beneficiary_projects
+            WHERE beneficiary_id IN ({placeholders})
+        """, [keep, *others])
+        conn.execute(f"DELETE FROM beneficiaries WHERE beneficiary_id IN ({placeholders})", others)
+
+    for beneficiary_id in others:
+        publish("beneficiaries", DELETED, beneficiary_id)
+    publish("beneficiaries", UPDATED, keep, get_beneficiary_row(keep))
+    return keep
+
 def validate_beneficiary(lname, fname, suffix, project_id, mname="", beneficiary_id=None):
     if not lname.strip() or not fname.strip():
         return False, "Last name and First name are required."
@@ -68,80 +326,164 @@ def validate_beneficiary(lname, fname, suffix, project_id, mname="", beneficiary
             return False, "Invalid project selected."
 
         # Check for duplicates, excluding current beneficiary if editing
-        query = """
-            SELECT COUNT(*) FROM beneficiaries
-            WHERE lname = ? AND fname = ? AND mname = ? AND suffix = ?
-        """
-        params = [lname, fname, mname, suffix]
-
-        if beneficiary_id is not None:
-            query += " AND beneficiary_id != ?"
-            params.append(beneficiary_id)
-
-        cursor.execute(query, params)
-
-        if cursor.fetchone()[0] > 0:
-            conn.close()
-            return False, "Duplicate beneficiary exists."
+        if find_duplicate(lname, fname, mname, suffix, beneficiary_id) is not None:
+            return False, DUPLICATE_MESSAGE
 
-        conn.close()
         return True, ""
 
     except Exception as e:
         return False, f"Database error: {e}"
 
 
-def add_beneficiary(lname, fname, project_id, mname="", suffix="", gender="", street="", barangay="", contactno=""):
+def _insert_beneficiary(conn, lname, fname, project_id, mname="", suffix="", gender="", street="", barangay="", contactno=""):
+    cursor = conn.execute("""
+        INSERT INTO beneficiaries
+        (lname, fname, mname, suffix, gender, street, barangay, contactno, project_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (lname, fname, mname.strip(), normalize_choice(suffix), normalize_choice(gender),
+          street.strip(), barangay.strip(), contactno.strip(), project_id))
+    return cursor.lastrowid
 
-    mname = mname.strip()
-    street = street.strip()
-    barangay = barangay.strip()
-    contactno = contactno.strip()
+def _update_beneficiary(conn, beneficiary_id, lname, fname, project_id, mname="", suffix="", gender="", street="", barangay="",
+                        contactno="", row_version=None):
+    cursor = conn.execute("""
+        UPDATE beneficiaries
+        SET lname = ?, fname = ?, mname = ?, suffix = ?, gender = ?, street = ?, barangay = ?, contactno = ?, project_id = ?,
+            row_version = row_version + 1
+        WHERE beneficiary_id = ? AND (? IS NULL OR row_version = ?)
+    """, (
+        lname, fname, mname.strip(), normalize_choice(suffix), normalize_choice(gender),
+        street.strip(), barangay.strip(), contactno.strip(),
+        project_id, beneficiary_id, row_version, row_version
+    ))
+    if cursor.rowcount == 0:
+        exists = conn.execute(
+            "SELECT 1 FROM beneficiaries WHERE beneficiary_id = ?", (beneficiary_id,)
+        ).fetchone()
+        return False, CONFLICT_MESSAGE if exists else DELETED_MESSAGE
+    return True, ""
+
+def _enroll(conn, beneficiary_id, project_id):
+    cursor = conn.execute("""
+        INSERT OR IGNORE INTO beneficiary_projects (beneficiary_id, project_id)
+        SELECT b.beneficiary_id, p.project_id
+        FROM beneficiaries b, projects p
+        WHERE b.beneficiary_id = ? AND p.project_id = ?
+    """, (beneficiary_id, project_id))
+    if cursor.rowcount == 0:
+        return False, ALREADY_ENROLLED_MESSAGE
+    return True, ENROLLED_MESSAGE
 
+def add_beneficiary(lname, fname, project_id, mname="", suffix="", gender="", street="", barangay="", contactno=""):
+    """Insert a beneficiary without validating it (see save_beneficiary). Returns (success, message)."""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO beneficiaries
-            (lname, fname, mname, suffix, gender, street, barangay, contactno, project_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (lname, fname, mname, suffix, gender, street, barangay, contactno, project_id))
-        conn.commit()
-        conn.close()
+        with write_transaction() as conn:
+            beneficiary_id = _insert_beneficiary(conn, lname, fname, project_id, mname, suffix, gender, street, barangay, contactno)
     except Exception as e:
         print("Add Error:", e)
+        return False, f"Database error: {e}"
 
-def edit_beneficiary(beneficiary_id, lname, fname, project_id, mname="", suffix="", gender="", street="", barangay="", contactno=""):
-    mname = mname.strip()
-    street = street.strip()
-    barangay = barangay.strip()
-    contactno = contactno.strip()
+    publish("beneficiaries", INSERTED, beneficiary_id, get_beneficiary_row(beneficiary_id))
+    return True, ""
 
+def edit_beneficiary(beneficiary_id, lname, fname, project_id, mname="", suffix="", gender="", street="", barangay="", contactno="",
+                     row_version=None):
+    """
+    Update a beneficiary. With row_version (from get_beneficiary_by_id) the update
+    only applies if nobody saved the row since it was read. Returns (success, message).
+    """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE beneficiaries
-            SET lname = ?, fname = ?, mname = ?, suffix = ?, gender = ?, street = ?, barangay = ?, contactno = ?, project_id = ?
-            WHERE beneficiary_id = ?
-        """, (
-    lname, fname, mname, suffix, gender,
-    street, barangay, contactno,
-    project_id, beneficiary_id
-))
-        conn.commit()
-        conn.close()
+        with write_transaction() as conn:
+            ok, msg = _update_beneficiary(conn, beneficiary_id, lname, fname, project_id, mname, suffix, gender,
+                                          street, barangay, contactno, row_version)
     except Exception as e:
         print("Edit Error:", e)
+        return False, f"Database error: {e}"
+
+    if ok:
+        publish("beneficiaries", UPDATED, beneficiary_id, get_beneficiary_row(beneficiary_id))
+    return ok, msg
+
+def _save(conn, beneficiary_id, lname, fname, project_id, mname="", suffix="", gender="", street="", barangay="",
+          contactno="", enroll_duplicate=False, row_version=None):
+    """save_beneficiary() inside the caller's write_transaction. Returns (valid, message, changed id, kind)."""
+    valid, msg = validate_beneficiary(lname, fname, suffix, project_id, mname, beneficiary_id)
+    if not valid:
+        if msg != DUPLICATE_MESSAGE or not enroll_duplicate or beneficiary_id is not None:
+            return valid, msg, None, None
+        changed = find_duplicate(lname, fname, mname, suffix)
+        return (*_enroll(conn, changed, project_id), changed, UPDATED)
+    if beneficiary_id is None:
+        changed = _insert_beneficiary(conn, lname, fname, project_id, mname, suffix, gender, street, barangay, contactno)
+        return True, "", changed, INSERTED
+    valid, msg = _update_beneficiary(conn, beneficiary_id, lname, fname, project_id, mname, suffix, gender,
+                                     street, barangay, contactno, row_version)
+    return valid, msg, beneficiary_id, UPDATED
+
+def save_beneficiary(beneficiary_id, lname, fname, project_id, mname="", suffix="", gender="", street="", barangay="", contactno="",
+                     enroll_duplicate=False, row_version=None):
+    """
+    Validate and then add (beneficiary_id None) or edit a beneficiary. Returns (valid, message).
+    With enroll_duplicate, adding someone who already exists enrolls the existing
+    beneficiary in project_id instead of rejecting the form. Edits are checked
+    against row_version, see edit_beneficiary().
+    """
+    try:
+        # The duplicate check runs under the write lock, so two desks saving the
+        # same person at once can't both pass it
+        with write_transaction() as conn:
+            valid, msg, changed, kind = _save(conn, beneficiary_id, lname, fname, project_id, mname, suffix, gender,
+                                              street, barangay, contactno, enroll_duplicate, row_version)
+    except Exception as e:
+        print("Save Error:", e)
+        return False, f"Database error: {e}"
+
+    if valid:
+        publish("beneficiaries", kind, changed, get_beneficiary_row(changed))
+    return valid, msg
+
+def add_beneficiaries(records):
+    """
+    Validate and add several beneficiaries, each a tuple of save_beneficiary()'s
+    arguments from lname on, in one transaction. Returns a (valid, message) per
+    record; records that fail validation are skipped, the rest are saved together
+    or, on a database error, not at all.
+    """
+    results = []
+    saved = []
+    try:
+        with write_transaction() as conn:
+            for record in records:
+                valid, msg, changed, kind = _save(conn, None, *record)
+                results.append((valid, msg))
+                if valid:
+                    saved.append((changed, kind))
+    except Exception as e:
+        print("Save Error:", e)
+        return [(False, f"Database error: {e}")] * len(records)
+
+    for changed, kind in saved:
+        publish("beneficiaries", kind, changed, get_beneficiary_row(changed))
+    return results
 
 def delete_beneficiary(beneficiary_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("DELETE FROM beneficiaries WHERE beneficiary_id=?", (beneficiary_id,))
-    
-    conn.commit()
-    conn.close()
+    with write_transaction() as conn:
+        conn.execute("DELETE FROM beneficiaries WHERE beneficiary_id=?", (beneficiary_id,))
+
+    publish("beneficiaries", DELETED, beneficiary_id)
+
+def enroll_beneficiary(beneficiary_id, project_id):
+    """Enroll an existing beneficiary in another project. Returns (success, message)."""
+    try:
+        with write_transaction() as conn:
+            enrolled, msg = _enroll(conn, beneficiary_id, project_id)
+    except Exception as e:
+        print("Enroll Error:", e)
+        return False, f"Database error: {e}"
+
+    if enrolled:
+        publish("beneficiaries", UPDATED, beneficiary_id, get_beneficiary_row(beneficiary_id))
+    return enrolled, msg
 
 def has_livelihood_project(beneficiary_id):
     conn = get_connection()
@@ -151,8 +493,7 @@ def has_livelihood_project(beneficiary_id):
         FROM beneficiary_projects bp
         JOIN projects p ON bp.project_id = p.project_id
         WHERE bp.beneficiary_id = ?
-          AND p.category = 'LIVELIHOOD'
+          AND p.category = 'LIVELIHOOD ASSISTANCE REGISTRATION'
     """, (beneficiary_id,))
     count = cursor.fetchone()[0]
-    conn.close()
     return count > 0
@@ -0,0 +1,92 @@
+import threading
+
+from utils.connection import get_connection, change_seq, is_local_change
+from utils.events import publish, ChangeEvent, INSERTED, UPDATED, DELETED, RELOADED
+from utils.beneficiary_calls import DISPLAY_COLUMNS
+from utils.project_calls import invalidate_project_catalog
+
+# More changed rows than this in one poll and views just reload
+MAX_CHANGES = 500
+
+_last_seq = None
+_poll_lock = threading.Lock()
+
+
+def _fetch_rows(conn, table, keys):
+    if not keys:
+        return {}
+    placeholders = ", ".join("?" * len(keys))
+    if table == "beneficiaries":
+        sql = f"SELECT {DISPLAY_COLUMNS} FROM beneficiaries b WHERE b.beneficiary_id IN ({placeholders})"
+    else:
+        sql = f"SELECT project_id, project_name, category FROM projects WHERE project_id IN ({placeholders})"
+    return {row[0]: row for row in conn.execute(sql, list(keys))}
+
+
+def changes_since(seq, conn=None, skip_local=True):
+    """
+    Return (latest seq, [ChangeEvent]) for what changed after change_log entry seq,
+    skipping changes this process made itself unless skip_local is False. Rows are
+    read as they are now, so a row changed several times gives one event.
+    """
+    conn = conn or get_connection()
+    latest = change_seq(conn)
+    if latest <= seq:
+        return latest, []
+
+    oldest = conn.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+    entries = conn.execute(
+        "SELECT seq, table_name, row_key, kind FROM change_log WHERE seq > ? AND seq <= ? ORDER BY seq",
+        (seq, latest)
+    ).fetchall()
+    if skip_local:
+        entries = [entry for entry in entries if not is_local_change(entry[0])]
+
+    # Pruned past where we were, or too much to patch row by row
+    if oldest is None or oldest > seq + 1 or len(entries) > MAX_CHANGES:
+        return latest, [ChangeEvent("projects", RELOADED, None, None),
+                        ChangeEvent("beneficiaries", RELOADED, None, None)]
+
+    # table -> key -> first kind seen, in order of first change
+    touched = {"beneficiaries": {}, "projects": {}}
+    reloaded = set()
+    for _, table, key, kind in entries:
+        if kind == RELOADED:
+            reloaded.add(table)
+        else:
+            touched[table].setdefault(key, kind)
+
+    events = [ChangeEvent(table, RELOADED, None, None) for table in sorted(reloaded)]
+    for table, keys in touched.items():
+        if table in reloaded:
+            continue
+        rows = _fetch_rows(conn, table, keys)
+        for key, first_kind in keys.items():
+            if key not in rows:
+                events.append(ChangeEvent(table, DELETED, key, None))
+            else:
+                kind = INSERTED if first_kind == INSERTED else UPDATED
+                events.append(ChangeEvent(table, kind, key, rows[key]))
+    return latest, events
+
+
+def poll_changes():
+    """
+    Publish the changes other desks committed since the last poll, so open views
+    and caches catch up without reloading. The first call only records where the
+    log is. Returns the number of events published.
+    """
+    global _last_seq
+
+    with _poll_lock:
+        conn = get_connection()
+        if _last_seq is None:
+            _last_seq = change_seq(conn)
+            return 0
+        _last_seq, events = changes_since(_last_seq, conn)
+
+    if any(event.table == "projects" for event in events):
+        invalidate_project_catalog()
+    for event in events:
+        publish(event.table, event.kind, event.key, event.row)
+    return len(events)
@@ -0,0 +1,241 @@
+"""
+Beneficiary rows held column by column instead of as a list of tuples. A
+tuple of ten str objects costs several hundred bytes per row; here IDs sit in
+a flat integer array, columns with few distinct values (suffix, gender,
+barangay, the project list) keep each value once plus a 2-byte code per row,
+and the rest are packed as UTF-8 in one buffer. Surnames go with the packed
+columns: a town has thousands of them, mostly shared by a few families, so a
+table of distinct values costs more than it saves until far more rows are
+loaded than a desk scrolls through. Rows are rebuilt as tuples only when
+asked for.
+"""
+import sys
+from array import array
+from itertools import accumulate
+
+# Packed columns are rewritten once dead bytes from edits and deletes outweigh live ones
+COMPACT_MIN_BYTES = 64 * 1024
+
+
+class CodedColumn:
+    """Each distinct value stored once; rows hold its index (interned strings)."""
+
+    def __init__(self):
+        self.values = []
+        self._index = {}
+        self.codes = array("H")
+
+    def _code(self, value):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+            if code > 0xFFFF and self.codes.typecode == "H":
+                self.codes = array("I", self.codes)
+        return code
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def __setitem__(self, row, value):
+        self.codes[row] = self._code(value)
+
+    def __delitem__(self, rows):
+        del self.codes[rows]
+
+    def append(self, value):
+        self.codes.append(self._code(value))
+
+    def extend(self, values):
+        codes = [self._code(value) for value in values]
+        self.codes.extend(codes)
+
+    def insert(self, row, value):
+        self.codes.insert(row, self._code(value))
+
+    def nbytes(self):
+        return (sys.getsizeof(self.codes) + sys.getsizeof(self.values) + sys.getsizeof(self._index)
+                + sum(sys.getsizeof(value) for value in self.values))
+
+
+def _length_prefix(size):
+    """A value's byte length as a varint: 1 byte under 128, 2 under 16384."""
+    prefix = bytearray()
+    while size >= 0x80:
+        prefix.append(size & 0x7F | 0x80)
+        size >>= 7
+    prefix.append(size)
+    return prefix
+
+
+class PackedColumn:
+    """
+    Values as UTF-8 in one shared buffer, for columns where almost every value
+    differs. Each value is stored behind its length, so a row needs only its
+    start offset.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.starts = array("I")
+        self._dead = 0
+
+    def _grow(self, data):
+        self.buffer += data
+        if len(self.buffer) > 0xFFFFFFFF and self.starts.typecode == "I":
+            self.starts = array("Q", self.starts)
+
+    def _add(self, value):
+        start = len(self.buffer)
+        data = value.encode("utf-8")
+        self._grow(_length_prefix(len(data)) + data)
+        return start
+
+    def _span(self, row):
+        """(start, end) of the row's text in the buffer; the record begins before start."""
+        position = self.starts[row]
+        size = shift = 0
+        while True:
+            byte = self.buffer[position]
+            position += 1
+            size |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return position, position + size
+            shift += 7
+
+    def _record_size(self, row):
+        return self._span(row)[1] - self.starts[row]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, row):
+        start, end = self._span(row)
+        return self.buffer[start:end].decode("utf-8")
+
+    def __setitem__(self, row, value):
+        self._dead += self._record_size(row)
+        self.starts[row] = self._add(value)
+        self._compact_if_needed()
+
+    def __delitem__(self, rows):
+        if isinstance(rows, slice):
+            self._dead += sum(self._record_size(row) for row in range(len(self.starts))[rows])
+        else:
+            self._dead += self._record_size(rows)
+        del self.starts[rows]
+        self._compact_if_needed()
+
+    def append(self, value):
+        self.starts.append(self._add(value))
+
+    def extend(self, values):
+        records = []
+        for value in values:
+            data = value.encode("utf-8")
+            records.append(_length_prefix(len(data)) + data)
+        starts = list(accumulate(map(len, records), initial=len(self.buffer)))
+        self._grow(b"".join(records))
+        self.starts.extend(starts[:-1])
+
+    def insert(self, row, value):
+        self.starts.insert(row, self._add(value))
+
+    def _compact_if_needed(self):
+        if self._dead < COMPACT_MIN_BYTES or self._dead * 2 < len(self.buffer):
+            return
+        buffer = bytearray()
+        for row in range(len(self.starts)):
+            start = len(buffer)
+            buffer += self.buffer[self.starts[row]:self._span(row)[1]]
+            self.starts[row] = start
+        self.buffer = buffer
+        self._dead = 0
+
+    def nbytes(self):
+        return sys.getsizeof(self.buffer) + sys.getsizeof(self.starts)
+
+
+class IdColumn(array):
+    def __new__(cls):
+        return super().__new__(cls, "q")
+
+    def nbytes(self):
+        return sys.getsizeof(self)
+
+
+# Storage for each column of DISPLAY_COLUMNS, in order
+COLUMN_TYPES = (
+    IdColumn,       # ID
+    PackedColumn,   # Last Name
+    PackedColumn,   # First Name
+    PackedColumn,   # Middle Name
+    CodedColumn,    # Suffix
+    CodedColumn,    # Gender
+    PackedColumn,   # Street
+    CodedColumn,    # Barangay
+    PackedColumn,   # Contact No.
+    CodedColumn,    # Projects
+)
+
+
+class BeneficiaryColumns:
+    """
+    A list of beneficiary display rows (see DISPLAY_COLUMNS) stored column-wise.
+    Supports the list operations the table model uses: len, rows[i], append,
+    extend, insert, rows[i] = row, del rows[i] and del rows[i:].
+    """
+
+    def __init__(self, rows=()):
+        self._columns = [column_type() for column_type in COLUMN_TYPES]
+        self.ids = self._columns[0]
+        self.extend(rows)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        return tuple(column[row] for column in self._columns)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def __setitem__(self, row, values):
+        for column, value in zip(self._columns, values):
+            column[row] = value
+
+    def __delitem__(self, rows):
+        for column in self._columns:
+            del column[rows]
+
+    def value(self, row, column):
+        return self._columns[column][row]
+
+    def append(self, values):
+        for column, value in zip(self._columns, values):
+            column.append(value)
+
+    def extend(self, rows):
+        rows = list(rows)
+        if rows:
+            for column, values in zip(self._columns, zip(*rows)):
+                column.extend(values)
+
+    def insert(self, row, values):
+        for column, value in zip(self._columns, values):
+            column.insert(row, value)
+
+    def find(self, beneficiary_id):
+        try:
+            return self.ids.index(beneficiary_id)
+        except ValueError:
+            return -1
+
+    def nbytes(self):
+        """Approximate memory held, in bytes."""
+        return sys.getsizeof(self) + sum(column.nbytes() for column in self._columns)
+
@@ -0,0 +1,196 @@
+import os
+import sys
+import time
+import random
+import sqlite3
+import atexit
+import threading
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+from utils.tracing import connection_factory
+
+# DB in same folder as EXE
+app_folder = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(app_folder, "database.db")
+
+# Applied once per connection, right after it is opened
+PRAGMAS = {
+    "journal_mode": os.environ.get("PESO_JOURNAL_MODE", "WAL"),
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.environ.get("PESO_BUSY_TIMEOUT", 5000)),   # ms to wait on a locked database
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -16000,           # negative = KiB, so ~16 MB of page cache
+    "temp_store": "MEMORY",
+}
+
+# Number of compiled statements each connection keeps around for reuse
+STATEMENT_CACHE_SIZE = 256
+
+# Extra attempts at the write lock once busy_timeout has run out, with
+# jittered exponential backoff so desks that collided don't retry in step
+WRITE_RETRIES = 3
+RETRY_BACKOFF = 0.05   # seconds before the first retry
+
+_local = threading.local()
+_lock = threading.Lock()
+_connections = set()   # open thread connections, for close_all()
+_generation = 0   # bumped by close_all() so threads drop their old connection
+
+# (first, last] change_log sequence ranges written by this process, so the
+# change watcher doesn't publish again what the data layer already published
+_local_changes = deque(maxlen=1000)
+_local_lock = threading.Lock()
+
+
+def open_connection(path=None):
+    """Open a new, tuned connection. Most code should use get_connection() instead."""
+    conn = sqlite3.connect(
+        path or DB_PATH,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=connection_factory(),   # traced when PESO_SQL_TRACE is set
+    )
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+class _ThreadConnection:
+    """Holds a thread's connection; closes it once the thread's locals are gone."""
+
+    __slots__ = ("conn", "generation", "__weakref__")
+
+    def __init__(self, conn, generation):
+        self.conn = conn
+        self.generation = generation
+        weakref.finalize(self, _release, conn)
+
+
+def _release(conn):
+    with _lock:
+        _connections.discard(conn)
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def get_connection():
+    """
+    Return the connection bound to the calling thread, opening it on first use.
+    The connection stays open for the life of the thread and is closed when the
+    thread exits, so callers must not close it.
+    """
+    holder = getattr(_local, "holder", None)
+    if holder is None or holder.generation != _generation:
+        conn = open_connection()
+        with _lock:
+            _connections.add(conn)
+        # Replacing the old holder runs its finalizer, which takes _lock
+        holder = _local.holder = _ThreadConnection(conn, _generation)
+    return holder.conn
+
+
+_version_conn = None
+_version_generation = None
+_version_lock = threading.Lock()
+
+
+def data_version():
+    """
+    PRAGMA data_version read on one dedicated connection that never writes, so
+    the value means the same on every thread: it moves whenever any other
+    connection, in this process or at another desk, commits.
+    """
+    global _version_conn, _version_generation
+    with _version_lock:
+        if _version_conn is None or _version_generation != _generation:
+            _version_conn = open_connection()
+            _version_generation = _generation
+            with _lock:
+                _connections.add(_version_conn)
+        return _version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def is_busy(error):
+    """True for SQLITE_BUSY / SQLITE_LOCKED, i.e. another connection holds the lock."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+def begin_immediate(conn, retries=WRITE_RETRIES):
+    """Start a transaction holding the write lock, retrying while another desk has it."""
+    for attempt in range(retries + 1):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            return
+        except sqlite3.OperationalError as e:
+            if attempt == retries or not is_busy(e):
+                raise
+            time.sleep(RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+@contextmanager
+def write_transaction(conn=None):
+    """
+    Run a block as one short write transaction on the calling thread's connection:
+    the write lock is taken up front, then committed or rolled back on exit.
+
+        with write_transaction() as conn:
+            conn.execute("UPDATE ...")
+
+    Taking the lock first matters with several desks: a deferred transaction that
+    reads and then writes fails with SQLITE_BUSY straight away when another
+    connection wrote in between, without waiting for busy_timeout.
+    """
+    conn = conn or get_connection()
+    begin_immediate(conn)
+    try:
+        first = change_seq(conn)
+        yield conn
+        last = change_seq(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    if last > first:
+        with _local_lock:
+            _local_changes.append((first, last))
+
+
+def change_seq(conn):
+    """The newest change_log sequence number (see migration 9)."""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+
+def is_local_change(seq):
+    """True if change_log entry seq was written by this process."""
+    with _local_lock:
+        return any(first < seq <= last for first, last in _local_changes)
+
+
+def set_database_path(path):
+    """Point every later get_connection() call at another database file."""
+    global DB_PATH
+    close_all()
+    DB_PATH = path
+
+
+def close_all():
+    global _generation
+    with _lock:
+        connections = list(_connections)
+        _connections.clear()
+        _generation += 1
+
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+atexit.register(close_all)
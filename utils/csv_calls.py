@@ -0,0 +1,277 @@
+import csv
+import os
+
+from utils.connection import get_connection, write_transaction
+from utils.beneficiary_calls import (
+    beneficiary_select, count_beneficiaries, normalize_choice, DISPLAY_HEADERS, PROJECT_SEPARATOR
+)
+from utils.events import publish, RELOADED
+from utils.migrations import refresh_counters, refresh_projects_text
+
+# Rows pulled from the cursor per round trip
+CHUNK_SIZE = 5000
+# Size of the file write buffer
+WRITE_BUFFER = 1024 * 1024
+
+
+def export_beneficiaries_csv(path, terms=None, sort_column=None, descending=False,
+                             progress=None, is_cancelled=None, chunk_size=CHUNK_SIZE, conn=None):
+    """
+    Stream the beneficiaries matching terms, in the given sort order, to a CSV file.
+    progress(done, total) is called after every chunk and is_cancelled() is checked
+    before it. Returns the number of rows written, or None if the export was cancelled
+    (in which case no file is left behind). conn may be a read-only snapshot
+    (see backup_calls.open_snapshot) to keep a long export off the live database.
+    """
+    conn = conn or get_connection()
+    total = count_beneficiaries(terms, conn)
+    sql, params = beneficiary_select(terms, sort_column, descending)
+
+    # Write next to the target and rename at the end, so a cancelled or failed
+    # export never leaves a half-written file under the real name
+    temp_path = path + ".part"
+    written = 0
+
+    try:
+        with open(temp_path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER) as file:
+            writer = csv.writer(file)
+            writer.writerow(DISPLAY_HEADERS)
+
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+
+            while True:
+                if is_cancelled and is_cancelled():
+                    cursor.close()
+                    break
+
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+
+                writer.writerows(rows)
+                written += len(rows)
+                if progress:
+                    progress(written, total)
+
+        if is_cancelled and is_cancelled():
+            os.remove(temp_path)
+            return None
+
+        os.replace(temp_path, path)
+        return written
+
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# CSV header (lower case) -> beneficiaries column. Accepts both our own export
+# headers and the raw column names.
+IMPORT_HEADERS = {
+    "last name": "lname", "lname": "lname",
+    "first name": "fname", "fname": "fname",
+    "middle name": "mname", "mname": "mname",
+    "suffix": "suffix",
+    "gender": "gender",
+    "street": "street",
+    "barangay": "barangay",
+    "contact no.": "contactno", "contact no": "contactno", "contactno": "contactno",
+    "projects": "project", "project": "project", "project name": "project", "project_id": "project",
+}
+
+IMPORT_COLUMNS = ["lname", "fname", "mname", "suffix", "gender", "street", "barangay", "contactno", "project_id"]
+
+INSERT_SQL = f"""
+    INSERT INTO beneficiaries ({", ".join(IMPORT_COLUMNS)})
+    VALUES ({", ".join("?" * len(IMPORT_COLUMNS))})
+"""
+
+
+ENROLL_SQL = """
+    INSERT OR IGNORE INTO beneficiary_projects (beneficiary_id, project_id)
+    SELECT beneficiary_id, ? FROM beneficiaries
+    WHERE lname = ? AND fname = ? AND mname = ? AND suffix = ? AND beneficiary_id >= ?
+"""
+
+
+def _project_key(name):
+    # Project names may contain commas themselves, so spacing around them is normalized
+    return PROJECT_SEPARATOR.join(part.strip() for part in name.strip().upper().split(","))
+
+
+def _project_ids(value, lookup):
+    """
+    Resolve a Projects cell to project ids: a single name or id, or several
+    joined the way the export writes them. Names may themselves contain commas
+    (e.g. "BOTE, DYARYO, AT GARAPA"), so the cell is split on commas and the
+    longest run of pieces that names a project wins. Returns None if any part
+    is unknown.
+    """
+    pieces = _project_key(value).split(PROJECT_SEPARATOR)
+    parsed = {len(pieces): []}
+
+    # parsed[i]: ids for pieces[i:], or None when they can't be read as project names
+    for start in range(len(pieces) - 1, -1, -1):
+        parsed[start] = None
+        if not pieces[start]:
+            parsed[start] = parsed[start + 1]
+            continue
+        for end in range(len(pieces), start, -1):
+            project_id = lookup.get(PROJECT_SEPARATOR.join(pieces[start:end]))
+            if project_id is not None and parsed[end] is not None:
+                parsed[start] = [project_id] + parsed[end]
+                break
+
+    ids = parsed[0]
+    if not ids:
+        return None
+    return list(dict.fromkeys(ids))
+
+
+def _clean(value):
+    # Our own exports write "-" for empty cells
+    value = (value or "").strip()
+    return "" if value == "-" else value
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def import_beneficiaries_csv(path, progress=None, is_cancelled=None, batch_size=CHUNK_SIZE):
+    """
+    Import beneficiaries from a CSV file in a single transaction.
+    Rows are checked the same way validate_beneficiary() does, but against
+    lookups built once up front. progress(done, total) is called per batch, in characters read.
+    Returns (imported_count, rejections) where rejections is a list of
+    (row_number, reason), or None if the import was cancelled (nothing is saved).
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    total_size = os.path.getsize(path)
+    consumed = 0
+    imported = 0
+    rejections = []
+    batch = []
+    extra_enrollments = []
+
+    def counted_lines(file):
+        # file.tell() is unavailable while iterating, so track progress here
+        nonlocal consumed
+        for line in file:
+            consumed += len(line)
+            yield line
+
+    try:
+        with open(path, "r", newline="", encoding="utf-8-sig") as file:
+            reader = csv.reader(counted_lines(file))
+            header_row = next(reader, None)
+            if header_row is None:
+                return 0, [(1, "File is empty.")]
+
+            columns = [IMPORT_HEADERS.get(h.strip().lower()) for h in header_row]
+            missing = {"lname", "fname", "project"} - set(columns)
+            if missing:
+                return 0, [(1, "Missing column(s): " + ", ".join(sorted(missing)))]
+
+            # The lookups are read under the write lock, so another desk can't
+            # add the same person between the duplicate check and the insert
+            with write_transaction(conn):
+                # One lookup for projects, by id and by name
+                cursor.execute("SELECT project_id, project_name FROM projects")
+                project_ids = {}
+                for project_id, project_name in cursor.fetchall():
+                    project_ids[str(project_id)] = project_id
+                    project_ids[_project_key(project_name)] = project_id
+
+                # Existing duplicate keys (see validate_beneficiary)
+                cursor.execute("SELECT lname, fname, COALESCE(mname, ''), suffix FROM beneficiaries")
+                existing = set(cursor.fetchall())
+
+                # Index, enroll and count the new rows in one pass at the end (see migrations 4-6)
+                cursor.execute("SELECT COALESCE(MAX(beneficiary_id), 0) FROM beneficiaries")
+                first_new_id = cursor.fetchone()[0] + 1
+                cursor.execute("INSERT INTO bulk_load (active) VALUES (1)")
+
+                for row_number, row in enumerate(reader, start=2):
+                    data = {column: _clean(value) for column, value in zip(columns, row) if column}
+
+                    lname = data.get("lname", "")
+                    fname = data.get("fname", "")
+                    if not lname or not fname:
+                        rejections.append((row_number, "Last name and First name are required."))
+                        continue
+
+                    enrolled = _project_ids(data.get("project", ""), project_ids)
+                    if enrolled is None:
+                        rejections.append((row_number, "Invalid project selected."))
+                        continue
+                    project_id = enrolled[0]
+
+                    mname = data.get("mname", "")
+                    suffix = normalize_choice(data.get("suffix"))
+                    key = (lname, fname, mname, suffix)
+                    if key in existing:
+                        rejections.append((row_number, "Duplicate beneficiary exists."))
+                        continue
+                    existing.add(key)
+                    # Extra projects are enrolled after the rows exist (see ENROLL_SQL)
+                    extra_enrollments.extend((extra, *key) for extra in enrolled[1:])
+
+                    batch.append((
+                        lname, fname, mname, suffix, normalize_choice(data.get("gender")),
+                        data.get("street", ""), data.get("barangay", ""), data.get("contactno", ""),
+                        project_id
+                    ))
+
+                    if len(batch) >= batch_size:
+                        if is_cancelled and is_cancelled():
+                            raise _Cancelled
+                        cursor.executemany(INSERT_SQL, batch)
+                        imported += len(batch)
+                        batch = []
+                        if progress:
+                            progress(min(consumed, total_size), total_size)
+
+                if batch:
+                    cursor.executemany(INSERT_SQL, batch)
+                    imported += len(batch)
+
+                if is_cancelled and is_cancelled():
+                    raise _Cancelled
+
+                cursor.execute("""
+                    INSERT INTO beneficiaries_fts (rowid, lname, fname, mname, street, barangay, contactno)
+                    SELECT beneficiary_id, lname, fname, mname, street, barangay, contactno
+                    FROM beneficiaries
+                    WHERE beneficiary_id >= ?
+                """, (first_new_id,))
+                cursor.execute("""
+                    INSERT OR IGNORE INTO beneficiary_projects (beneficiary_id, project_id)
+                    SELECT beneficiary_id, project_id FROM beneficiaries
+                    WHERE beneficiary_id >= ? AND project_id IS NOT NULL
+                """, (first_new_id,))
+                cursor.executemany(ENROLL_SQL, [row + (first_new_id,) for row in extra_enrollments])
+                refresh_counters(conn, first_new_id)
+                refresh_projects_text(conn, first_new_id)
+                cursor.execute("DELETE FROM bulk_load")
+
+    except _Cancelled:
+        # write_transaction() rolled everything back
+        return None
+
+    if progress:
+        progress(total_size, total_size)
+    if imported:
+        publish("beneficiaries", RELOADED, None)
+    return imported, rejections
+
+
+def write_rejection_report(path, rejections):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Row", "Reason"])
+        writer.writerows(rejections)
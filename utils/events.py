@@ -0,0 +1,41 @@
+import threading
+from collections import namedtuple
+
+INSERTED = "inserted"
+UPDATED = "updated"
+DELETED = "deleted"
+RELOADED = "reloaded"   # many rows changed at once, e.g. a bulk import
+
+# table: "beneficiaries" or "projects"
+# kind:  INSERTED, UPDATED, DELETED or RELOADED
+# key:   primary key of the changed row (None for RELOADED)
+# row:   the row as the table views display it (None for deletes and reloads)
+ChangeEvent = namedtuple("ChangeEvent", "table kind key row")
+
+_lock = threading.Lock()
+_subscribers = []
+
+
+def subscribe(callback):
+    """Call callback(event) for every change. Callbacks run on the thread that made the change."""
+    with _lock:
+        if callback not in _subscribers:
+            _subscribers.append(callback)
+
+
+def unsubscribe(callback):
+    with _lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+
+def publish(table, kind, key, row=None):
+    event = ChangeEvent(table, kind, key, row)
+    with _lock:
+        subscribers = list(_subscribers)
+
+    for callback in subscribers:
+        try:
+            callback(event)
+        except Exception as e:
+            print("Event Error:", e)
@@ -0,0 +1,31 @@
+import os
+
+from utils import connection
+from utils.connection import get_connection
+
+
+def database_size(path=None):
+    """Bytes used by the database file and its -wal file."""
+    path = path or connection.DB_PATH
+    return sum(
+        os.path.getsize(name) for name in (path, path + "-wal") if os.path.exists(name)
+    )
+
+
+def vacuum_database():
+    """
+    Compact the database: merge the search index segments, refresh the planner
+    statistics, rebuild the file without free pages and empty the WAL.
+    VACUUM needs every other desk to be idle, so run it when nobody is saving.
+    Returns (size_before, size_after) in bytes.
+    """
+    before = database_size()
+    conn = get_connection()
+
+    with conn:
+        conn.execute("INSERT INTO beneficiaries_fts (beneficiaries_fts) VALUES ('optimize')")
+    conn.execute("ANALYZE")
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    return before, database_size()
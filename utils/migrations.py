@@ -0,0 +1,585 @@
+from utils.connection import get_connection, begin_immediate
+
+# Project names of beneficiaries.beneficiary_id, joined as the Projects column
+# shows them (see beneficiary_calls.DISPLAY_COLUMNS)
+PROJECTS_TEXT = """
+    SELECT group_concat(project_name, ', ') FROM (
+        SELECT p.project_name
+        FROM beneficiary_projects bp
+        JOIN projects p ON p.project_id = bp.project_id
+        WHERE bp.beneficiary_id = beneficiaries.beneficiary_id
+        ORDER BY p.project_name
+    )
+"""
+
+# Each entry upgrades the schema to the given PRAGMA user_version.
+# Steps are SQL strings or callables taking the connection, and run in one transaction.
+MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            password TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS projects (
+            project_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_name TEXT NOT NULL,
+            category TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS beneficiaries (
+            beneficiary_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fname TEXT NOT NULL,
+            lname TEXT NOT NULL,
+            mname TEXT,
+            suffix TEXT,
+            gender TEXT,
+            street TEXT,
+            barangay TEXT,
+            contactno TEXT,
+            project_id INTEGER,
+            FOREIGN KEY (project_id) REFERENCES projects(project_id)
+        )
+        """,
+    ]),
+    (2, [
+        # Duplicate check in validate_beneficiary
+        """
+        CREATE INDEX IF NOT EXISTS idx_beneficiaries_name
+        ON beneficiaries (lname, fname, mname, suffix)
+        """,
+        # Duplicate check in validate_project
+        """
+        CREATE INDEX IF NOT EXISTS idx_projects_name_category
+        ON projects (project_name, category)
+        """,
+        # Beneficiaries by project
+        """
+        CREATE INDEX IF NOT EXISTS idx_beneficiaries_project
+        ON beneficiaries (project_id)
+        """,
+        "ANALYZE",
+    ]),
+    (3, [
+        # Full-text index for the search box, kept in sync by the triggers below
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS beneficiaries_fts USING fts5 (
+            lname, fname, mname, street, barangay, contactno,
+            content = 'beneficiaries',
+            content_rowid = 'beneficiary_id',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS beneficiaries_fts_insert
+        AFTER INSERT ON beneficiaries BEGIN
+            INSERT INTO beneficiaries_fts (rowid, lname, fname, mname, street, barangay, contactno)
+            VALUES (new.beneficiary_id, new.lname, new.fname, new.mname, new.street, new.barangay, new.contactno);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS beneficiaries_fts_delete
+        AFTER DELETE ON beneficiaries BEGIN
+            INSERT INTO beneficiaries_fts (beneficiaries_fts, rowid, lname, fname, mname, street, barangay, contactno)
+            VALUES ('delete', old.beneficiary_id, old.lname, old.fname, old.mname, old.street, old.barangay, old.contactno);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS beneficiaries_fts_update
+        AFTER UPDATE OF lname, fname, mname, street, barangay, contactno ON beneficiaries BEGIN
+            INSERT INTO beneficiaries_fts (beneficiaries_fts, rowid, lname, fname, mname, street, barangay, contactno)
+            VALUES ('delete', old.beneficiary_id, old.lname, old.fname, old.mname, old.street, old.barangay, old.contactno);
+            INSERT INTO beneficiaries_fts (rowid, lname, fname, mname, street, barangay, contactno)
+            VALUES (new.beneficiary_id, new.lname, new.fname, new.mname, new.street, new.barangay, new.contactno);
+        END
+        """,
+        "INSERT INTO beneficiaries_fts (beneficiaries_fts) VALUES ('rebuild')",
+    ]),
+    (4, [
+        # A row in bulk_load (only ever inside the importing transaction) makes
+        # the insert trigger skip FTS, which the importer then fills in one pass
+        "CREATE TABLE IF NOT EXISTS bulk_load (active INTEGER)",
+        "DROP TRIGGER IF EXISTS beneficiaries_fts_insert",
+        """
+        CREATE TRIGGER beneficiaries_fts_insert
+        AFTER INSERT ON beneficiaries
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_load) BEGIN
+            INSERT INTO beneficiaries_fts (rowid, lname, fname, mname, street, barangay, contactno)
+            VALUES (new.beneficiary_id, new.lname, new.fname, new.mname, new.street, new.barangay, new.contactno);
+        END
+        """,
+    ]),
+    (5, [
+        # A beneficiary can be enrolled in several projects. beneficiaries.project_id
+        # stays as the project picked on the form, and the triggers below keep it enrolled.
+        """
+        CREATE TABLE IF NOT EXISTS beneficiary_projects (
+            beneficiary_id INTEGER NOT NULL REFERENCES beneficiaries(beneficiary_id),
+            project_id INTEGER NOT NULL REFERENCES projects(project_id),
+            enrolled_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (beneficiary_id, project_id)
+        ) WITHOUT ROWID
+        """,
+        # Beneficiaries of a project
+        """
+        CREATE INDEX IF NOT EXISTS idx_beneficiary_projects_project
+        ON beneficiary_projects (project_id, beneficiary_id)
+        """,
+        """
+        INSERT OR IGNORE INTO beneficiary_projects (beneficiary_id, project_id)
+        SELECT beneficiary_id, project_id FROM beneficiaries
+        WHERE project_id IS NOT NULL
+        """,
+        # Bulk loads enroll their rows in one statement instead (see migration 4)
+        """
+        CREATE TRIGGER IF NOT EXISTS beneficiary_projects_insert
+        AFTER INSERT ON beneficiaries
+        WHEN new.project_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM bulk_load) BEGIN
+            INSERT OR IGNORE INTO beneficiary_projects (beneficiary_id, project_id)
+            VALUES (new.beneficiary_id, new.project_id);
+        END
+        """,
+        # Changing the project on the form moves that enrollment; other enrollments stay
+        """
+        CREATE TRIGGER IF NOT EXISTS beneficiary_projects_update
+        AFTER UPDATE OF project_id ON beneficiaries
+        WHEN new.project_id IS NOT old.project_id BEGIN
+            DELETE FROM beneficiary_projects
+            WHERE beneficiary_id = old.beneficiary_id AND project_id = old.project_id;
+            INSERT OR IGNORE INTO beneficiary_projects (beneficiary_id, project_id)
+            SELECT new.beneficiary_id, new.project_id WHERE new.project_id IS NOT NULL;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS beneficiary_projects_delete
+        AFTER DELETE ON beneficiaries BEGIN
+            DELETE FROM beneficiary_projects WHERE beneficiary_id = old.beneficiary_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS beneficiary_projects_project_delete
+        AFTER DELETE ON projects BEGIN
+            DELETE FROM beneficiary_projects WHERE project_id = old.project_id;
+        END
+        """,
+        "ANALYZE beneficiary_projects",
+    ]),
+    (6, [
+        # Running counts behind the dashboard, so it never scans beneficiaries.
+        # dimension: 'total' (value ''), 'gender', 'barangay' or 'project' (value = project_id)
+        """
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value)
+        ) WITHOUT ROWID
+        """,
+        # Bulk loads skip these too and add their rows with refresh_counters()
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_beneficiary_insert
+        AFTER INSERT ON beneficiaries
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_load) BEGIN
+            INSERT INTO stats_counters (dimension, value, count)
+            VALUES ('total', '', 1),
+                   ('gender', COALESCE(NULLIF(new.gender, ''), '-'), 1),
+                   ('barangay', COALESCE(NULLIF(new.barangay, ''), '-'), 1)
+            ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_beneficiary_delete
+        AFTER DELETE ON beneficiaries BEGIN
+            UPDATE stats_counters SET count = count - 1
+            WHERE (dimension, value) IN (
+                VALUES ('total', ''),
+                       ('gender', COALESCE(NULLIF(old.gender, ''), '-')),
+                       ('barangay', COALESCE(NULLIF(old.barangay, ''), '-'))
+            );
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_beneficiary_update
+        AFTER UPDATE OF gender, barangay ON beneficiaries BEGIN
+            UPDATE stats_counters SET count = count - 1
+            WHERE (dimension, value) IN (
+                VALUES ('gender', COALESCE(NULLIF(old.gender, ''), '-')),
+                       ('barangay', COALESCE(NULLIF(old.barangay, ''), '-'))
+            );
+            INSERT INTO stats_counters (dimension, value, count)
+            VALUES ('gender', COALESCE(NULLIF(new.gender, ''), '-'), 1),
+                   ('barangay', COALESCE(NULLIF(new.barangay, ''), '-'), 1)
+            ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_enrollment_insert
+        AFTER INSERT ON beneficiary_projects
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_load) BEGIN
+            INSERT INTO stats_counters (dimension, value, count)
+            VALUES ('project', new.project_id, 1)
+            ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_enrollment_delete
+        AFTER DELETE ON beneficiary_projects BEGIN
+            UPDATE stats_counters SET count = count - 1
+            WHERE dimension = 'project' AND value = CAST(old.project_id AS TEXT);
+        END
+        """,
+        lambda conn: refresh_counters(conn),
+    ]),
+    (7, [
+        # Counts per (project, barangay, gender) behind the cross-tabs in
+        # utils/pivot_calls.py. project_id 0 counts beneficiaries, any other
+        # project_id counts enrollments in that project.
+        """
+        CREATE TABLE IF NOT EXISTS pivot_counts (
+            project_id INTEGER NOT NULL,
+            barangay TEXT NOT NULL,
+            gender TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (project_id, barangay, gender)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS pivot_beneficiary_insert
+        AFTER INSERT ON beneficiaries
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_load) BEGIN
+            INSERT INTO pivot_counts (project_id, barangay, gender, count)
+            VALUES (0, COALESCE(NULLIF(new.barangay, ''), '-'), COALESCE(NULLIF(new.gender, ''), '-'), 1)
+            ON CONFLICT (project_id, barangay, gender) DO UPDATE SET count = count + 1;
+        END
+        """,
+        # Enrollments are counted under the beneficiary's current barangay and gender
+        """
+        CREATE TRIGGER IF NOT EXISTS pivot_enrollment_insert
+        AFTER INSERT ON beneficiary_projects
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_load) BEGIN
+            INSERT INTO pivot_counts (project_id, barangay, gender, count)
+            SELECT new.project_id, COALESCE(NULLIF(b.barangay, ''), '-'), COALESCE(NULLIF(b.gender, ''), '-'), 1
+            FROM beneficiaries b WHERE b.beneficiary_id = new.beneficiary_id
+            ON CONFLICT (project_id, barangay, gender) DO UPDATE SET count = count + 1;
+        END
+        """,
+        # Enrollments of a deleted beneficiary are handled by beneficiary_projects_delete
+        """
+        CREATE TRIGGER IF NOT EXISTS pivot_enrollment_delete
+        AFTER DELETE ON beneficiary_projects BEGIN
+            UPDATE pivot_counts SET count = count - 1
+            WHERE (project_id, barangay, gender) IN (
+                SELECT old.project_id, COALESCE(NULLIF(b.barangay, ''), '-'), COALESCE(NULLIF(b.gender, ''), '-')
+                FROM beneficiaries b WHERE b.beneficiary_id = old.beneficiary_id
+            );
+        END
+        """,
+        # The enrollment triggers from migration 5 are replaced by ones that also
+        # move the pivot counts, so the steps run in a fixed order: counts move
+        # to the new barangay/gender first, then the enrollment changes
+        "DROP TRIGGER IF EXISTS beneficiary_projects_update",
+        """
+        CREATE TRIGGER beneficiary_projects_update
+        AFTER UPDATE OF project_id, gender, barangay ON beneficiaries BEGIN
+            UPDATE pivot_counts SET count = count - 1
+            WHERE barangay = COALESCE(NULLIF(old.barangay, ''), '-') AND gender = COALESCE(NULLIF(old.gender, ''), '-')
+              AND (project_id = 0 OR project_id IN (
+                  SELECT project_id FROM beneficiary_projects WHERE beneficiary_id = old.beneficiary_id
+              ));
+            INSERT INTO pivot_counts (project_id, barangay, gender, count)
+            SELECT 0, COALESCE(NULLIF(new.barangay, ''), '-'), COALESCE(NULLIF(new.gender, ''), '-'), 1
+            UNION ALL
+            SELECT project_id, COALESCE(NULLIF(new.barangay, ''), '-'), COALESCE(NULLIF(new.gender, ''), '-'), 1
+            FROM beneficiary_projects WHERE beneficiary_id = new.beneficiary_id
+            ON CONFLICT (project_id, barangay, gender) DO UPDATE SET count = count + 1;
+
+            DELETE FROM beneficiary_projects
+            WHERE new.project_id IS NOT old.project_id
+              AND beneficiary_id = old.beneficiary_id AND project_id = old.project_id;
+            INSERT OR IGNORE INTO beneficiary_projects (beneficiary_id, project_id)
+            SELECT new.beneficiary_id, new.project_id
+            WHERE new.project_id IS NOT NULL AND new.project_id IS NOT old.project_id;
+        END
+        """,
+        "DROP TRIGGER IF EXISTS beneficiary_projects_delete",
+        """
+        CREATE TRIGGER beneficiary_projects_delete
+        AFTER DELETE ON beneficiaries BEGIN
+            UPDATE pivot_counts SET count = count - 1
+            WHERE barangay = COALESCE(NULLIF(old.barangay, ''), '-') AND gender = COALESCE(NULLIF(old.gender, ''), '-')
+              AND (project_id = 0 OR project_id IN (
+                  SELECT project_id FROM beneficiary_projects WHERE beneficiary_id = old.beneficiary_id
+              ));
+            DELETE FROM beneficiary_projects WHERE beneficiary_id = old.beneficiary_id;
+        END
+        """,
+        lambda conn: refresh_counters(conn),
+    ]),
+    # Bumped by every edit, so a save based on a stale read is detected instead of
+    # silently overwriting another desk's change
+    (8, [
+        "ALTER TABLE beneficiaries ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1",
+        "ALTER TABLE projects ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1",
+    ]),
+    # Sequence of changed rows, so a desk can pick up what other desks wrote
+    # (utils/change_calls.py). Only keys are logged; rows are read when polled.
+    (9, [
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_key INTEGER,
+            kind TEXT NOT NULL
+        )
+        """,
+        # Keep the last 10000 changes; a desk that fell further behind reloads
+        """
+        CREATE TRIGGER IF NOT EXISTS change_log_prune
+        AFTER INSERT ON change_log
+        WHEN new.seq % 1000 = 0 BEGIN
+            DELETE FROM change_log WHERE seq <= new.seq - 10000;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_log_beneficiary_insert
+        AFTER INSERT ON beneficiaries
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_load) BEGIN
+            INSERT INTO change_log (table_name, row_key, kind) VALUES ('beneficiaries', new.beneficiary_id, 'inserted');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_log_beneficiary_update
+        AFTER UPDATE ON beneficiaries BEGIN
+            INSERT INTO change_log (table_name, row_key, kind) VALUES ('beneficiaries', new.beneficiary_id, 'updated');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_log_beneficiary_delete
+        AFTER DELETE ON beneficiaries BEGIN
+            INSERT INTO change_log (table_name, row_key, kind) VALUES ('beneficiaries', old.beneficiary_id, 'deleted');
+        END
+        """,
+        # Enrollments change the Projects column of the beneficiary
+        """
+        CREATE TRIGGER IF NOT EXISTS change_log_enrollment_insert
+        AFTER INSERT ON beneficiary_projects
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_load) BEGIN
+            INSERT INTO change_log (table_name, row_key, kind) VALUES ('beneficiaries', new.beneficiary_id, 'updated');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_log_enrollment_delete
+        AFTER DELETE ON beneficiary_projects BEGIN
+            INSERT INTO change_log (table_name, row_key, kind) VALUES ('beneficiaries', old.beneficiary_id, 'updated');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_log_project_insert
+        AFTER INSERT ON projects BEGIN
+            INSERT INTO change_log (table_name, row_key, kind) VALUES ('projects', new.project_id, 'inserted');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_log_project_update
+        AFTER UPDATE ON projects BEGIN
+            INSERT INTO change_log (table_name, row_key, kind) VALUES ('projects', new.project_id, 'updated');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_log_project_delete
+        AFTER DELETE ON projects BEGIN
+            INSERT INTO change_log (table_name, row_key, kind) VALUES ('projects', old.project_id, 'deleted');
+        END
+        """,
+        # Bulk loads log one reload instead of a row per beneficiary
+        """
+        CREATE TRIGGER IF NOT EXISTS change_log_bulk_load
+        AFTER INSERT ON bulk_load BEGIN
+            INSERT INTO change_log (table_name, row_key, kind) VALUES ('beneficiaries', NULL, 'reloaded');
+        END
+        """,
+    ]),
+    # Rows saved by older versions, the service or the CLI kept '' or NULL for a
+    # suffix or gender that wasn't given; store "-" like the form and the importer
+    # do, so the duplicate checks compare like with like (see normalize_choice)
+    (10, [
+        "UPDATE beneficiaries SET suffix = '-' WHERE suffix IS NULL OR suffix = ''",
+        "UPDATE beneficiaries SET gender = '-' WHERE gender IS NULL OR gender = ''",
+        "UPDATE beneficiaries SET mname = '' WHERE mname IS NULL",
+    ]),
+    # The Projects column as stored text, so the table can sort on it with an
+    # index instead of aggregating the enrollments of every row first
+    (11, [
+        "ALTER TABLE beneficiaries ADD COLUMN projects_text TEXT",
+        # Enrollment triggers already log changes to the Projects column, so
+        # rewriting projects_text is left out of the change log
+        "DROP TRIGGER IF EXISTS change_log_beneficiary_update",
+        """
+        CREATE TRIGGER change_log_beneficiary_update
+        AFTER UPDATE OF lname, fname, mname, suffix, gender, street, barangay, contactno, project_id
+        ON beneficiaries BEGIN
+            INSERT INTO change_log (table_name, row_key, kind) VALUES ('beneficiaries', new.beneficiary_id, 'updated');
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS projects_text_enrollment_insert
+        AFTER INSERT ON beneficiary_projects
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_load) BEGIN
+            UPDATE beneficiaries SET projects_text = ({PROJECTS_TEXT})
+            WHERE beneficiary_id = new.beneficiary_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS projects_text_enrollment_delete
+        AFTER DELETE ON beneficiary_projects BEGIN
+            UPDATE beneficiaries SET projects_text = ({PROJECTS_TEXT})
+            WHERE beneficiary_id = old.beneficiary_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS projects_text_project_rename
+        AFTER UPDATE OF project_name ON projects BEGIN
+            UPDATE beneficiaries SET projects_text = ({PROJECTS_TEXT})
+            WHERE beneficiary_id IN (
+                SELECT beneficiary_id FROM beneficiary_projects WHERE project_id = new.project_id
+            );
+        END
+        """,
+        lambda conn: refresh_projects_text(conn),
+    ]),
+    # An index per sortable column of the beneficiaries table, so a sorted page is
+    # an index range scan that starts at the last row loaded (keyset paging in
+    # query_beneficiaries). beneficiary_id is spelled out, although SQLite appends
+    # the rowid anyway, so the (key, id) row-value seek can use both columns. Sort
+    # keys are kept non-NULL because row values with a NULL never compare.
+    (12, [
+        "UPDATE beneficiaries SET street = '' WHERE street IS NULL",
+        "UPDATE beneficiaries SET barangay = '' WHERE barangay IS NULL",
+        "UPDATE beneficiaries SET contactno = '' WHERE contactno IS NULL",
+        "UPDATE beneficiaries SET projects_text = '' WHERE projects_text IS NULL",
+        *(f"DROP TRIGGER IF EXISTS {name}" for name in (
+            "projects_text_enrollment_insert", "projects_text_enrollment_delete", "projects_text_project_rename"
+        )),
+        f"""
+        CREATE TRIGGER projects_text_enrollment_insert
+        AFTER INSERT ON beneficiary_projects
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_load) BEGIN
+            UPDATE beneficiaries SET projects_text = COALESCE(({PROJECTS_TEXT}), '')
+            WHERE beneficiary_id = new.beneficiary_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER projects_text_enrollment_delete
+        AFTER DELETE ON beneficiary_projects BEGIN
+            UPDATE beneficiaries SET projects_text = COALESCE(({PROJECTS_TEXT}), '')
+            WHERE beneficiary_id = old.beneficiary_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER projects_text_project_rename
+        AFTER UPDATE OF project_name ON projects BEGIN
+            UPDATE beneficiaries SET projects_text = COALESCE(({PROJECTS_TEXT}), '')
+            WHERE beneficiary_id IN (
+                SELECT beneficiary_id FROM beneficiary_projects WHERE project_id = new.project_id
+            );
+        END
+        """,
+        *(f"CREATE INDEX IF NOT EXISTS idx_beneficiaries_sort_{column} ON beneficiaries ({column}, beneficiary_id)"
+          for column in ("lname", "fname", "mname", "suffix", "gender", "street", "barangay", "contactno", "projects_text")),
+        "ANALYZE beneficiaries",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def refresh_counters(conn, since_id=None):
+    """
+    Add beneficiaries with an id of at least since_id (and their enrollments) to
+    stats_counters and pivot_counts, for rows loaded with the counter triggers
+    off. Without since_id every counter is recomputed from scratch.
+    """
+    has_pivot = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pivot_counts'"
+    ).fetchone()
+
+    if since_id is None:
+        conn.execute("DELETE FROM stats_counters")
+        if has_pivot:
+            conn.execute("DELETE FROM pivot_counts")
+        since_id = 0
+
+    if has_pivot:
+        conn.execute("""
+            INSERT INTO pivot_counts (project_id, barangay, gender, count)
+            SELECT 0, COALESCE(NULLIF(barangay, ''), '-'), COALESCE(NULLIF(gender, ''), '-'), COUNT(*)
+            FROM beneficiaries WHERE beneficiary_id >= :since GROUP BY 2, 3
+            UNION ALL
+            SELECT bp.project_id, COALESCE(NULLIF(b.barangay, ''), '-'), COALESCE(NULLIF(b.gender, ''), '-'), COUNT(*)
+            FROM beneficiary_projects bp JOIN beneficiaries b ON b.beneficiary_id = bp.beneficiary_id
+            WHERE bp.beneficiary_id >= :since GROUP BY 1, 2, 3
+            ON CONFLICT (project_id, barangay, gender) DO UPDATE SET count = count + excluded.count
+        """, {"since": since_id})
+
+    conn.execute("""
+        INSERT INTO stats_counters (dimension, value, count)
+        SELECT 'total', '', COUNT(*) FROM beneficiaries WHERE beneficiary_id >= :since
+        UNION ALL
+        SELECT 'gender', COALESCE(NULLIF(gender, ''), '-'), COUNT(*)
+        FROM beneficiaries WHERE beneficiary_id >= :since GROUP BY 2
+        UNION ALL
+        SELECT 'barangay', COALESCE(NULLIF(barangay, ''), '-'), COUNT(*)
+        FROM beneficiaries WHERE beneficiary_id >= :since GROUP BY 2
+        UNION ALL
+        SELECT 'project', project_id, COUNT(*)
+        FROM beneficiary_projects WHERE beneficiary_id >= :since GROUP BY 2
+        ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count
+    """, {"since": since_id})
+
+
+def refresh_projects_text(conn, since_id=0):
+    """Fill beneficiaries.projects_text for ids of at least since_id, e.g. after a bulk load."""
+    conn.execute(f"""
+        UPDATE beneficiaries SET projects_text = COALESCE(({PROJECTS_TEXT}), '')
+        WHERE beneficiary_id >= ?
+    """, (since_id,))
+
+
+def current_version(conn=None):
+    conn = conn or get_connection()
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn=None):
+    """
+    Bring the database up to LATEST_VERSION, one migration per transaction.
+    Safe to call on every startup and from several desks at once.
+    Returns the version the database ended up at.
+    """
+    conn = conn or get_connection()
+
+    for version, steps in MIGRATIONS:
+        if current_version(conn) >= version:
+            continue
+
+        # Take the write lock first, then re-check in case another desk got there before us
+        begin_immediate(conn)
+        try:
+            if current_version(conn) < version:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return current_version(conn)
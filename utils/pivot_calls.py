@@ -0,0 +1,109 @@
+import csv
+import threading
+from collections import namedtuple
+
+from utils import connection
+from utils.connection import get_connection, data_version
+
+# Dimension -> SQL over pivot_counts (pc) joined with projects (p)
+DIMENSIONS = {
+    "barangay": "pc.barangay",
+    "gender": "pc.gender",
+    "project": "p.project_name",
+    "category": "p.category",
+}
+DIMENSION_LABELS = {
+    "barangay": "Barangay", "gender": "Gender", "project": "Project", "category": "Category",
+}
+PROJECT_DIMENSIONS = {"project", "category"}
+
+# cells[i][j] is the count for row_labels[i] x col_labels[j]
+PivotTable = namedtuple("PivotTable", "rows cols row_labels col_labels cells row_totals col_totals total")
+
+CACHE_SIZE = 32
+
+# (database file, data version, query) -> PivotTable
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _compute(conn, rows, cols, filters):
+    dims = [rows] + ([cols] if cols else [])
+    uses_projects = any(dim in PROJECT_DIMENSIONS for dim in dims + list(filters))
+
+    # Without a project dimension, count beneficiaries (project_id 0), not enrollments
+    where = ["pc.project_id != 0" if uses_projects else "pc.project_id = 0"]
+    params = []
+    for dim, value in sorted(filters.items()):
+        where.append(f"{DIMENSIONS[dim]} = ?")
+        params.append(value)
+
+    select = ", ".join(DIMENSIONS[dim] for dim in dims)
+    group = ", ".join(str(i + 1) for i in range(len(dims)))
+    sql = f"""
+        SELECT {select}, SUM(pc.count)
+        FROM pivot_counts pc
+        {"JOIN projects p ON p.project_id = pc.project_id" if uses_projects else ""}
+        WHERE {" AND ".join(where)}
+        GROUP BY {group}
+        HAVING SUM(pc.count) > 0
+    """
+    result = conn.execute(sql, params).fetchall()
+
+    if not cols:
+        result = [(row_label, "Beneficiaries", count) for row_label, count in result]
+
+    row_labels = sorted({row_label for row_label, _, _ in result})
+    col_labels = sorted({col_label for _, col_label, _ in result})
+    row_index = {label: i for i, label in enumerate(row_labels)}
+    col_index = {label: j for j, label in enumerate(col_labels)}
+
+    cells = [[0] * len(col_labels) for _ in row_labels]
+    for row_label, col_label, count in result:
+        cells[row_index[row_label]][col_index[col_label]] = count
+
+    row_totals = [sum(row) for row in cells]
+    col_totals = [sum(column) for column in zip(*cells)]
+    return PivotTable(rows, cols, row_labels, col_labels, cells, row_totals, col_totals, sum(row_totals))
+
+
+def pivot(rows, cols=None, filters=None, conn=None):
+    """
+    Cross-tabulate beneficiaries by two dimensions (barangay, gender, project,
+    category), e.g. pivot("barangay", "gender", {"category": "JOB REFERRAL ISSUANCE"}).
+    conn may be a read-only snapshot (see backup_calls.open_snapshot).
+    Reads the trigger-maintained pivot_counts table, so the cost depends on the
+    number of distinct values, not the number of beneficiaries. With a project or
+    category dimension the counts are enrollments. Results from the app's own
+    database are cached until it changes; an explicit conn is always queried.
+    """
+    filters = dict(filters or {})
+    for dim in [rows, cols] + list(filters):
+        if dim is not None and dim not in DIMENSIONS:
+            raise ValueError(f"Unknown pivot dimension: {dim}")
+
+    if conn is not None:
+        return _compute(conn, rows, cols, filters)
+
+    # Read before the counts, so a commit in between shows up as a new version next time
+    key = (connection.DB_PATH, data_version(), rows, cols, tuple(sorted(filters.items())))
+    conn = get_connection()
+    with _cache_lock:
+        table = _cache.get(key)
+    if table is None:
+        table = _compute(conn, rows, cols, filters)
+        with _cache_lock:
+            if len(_cache) >= CACHE_SIZE:
+                _cache.clear()
+            _cache[key] = table
+    return table
+
+
+def export_pivot_csv(path, table):
+    """Write a PivotTable as a matrix with row and column totals."""
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow([DIMENSION_LABELS[table.rows]] + table.col_labels + ["Total"])
+        for label, cells, total in zip(table.row_labels, table.cells, table.row_totals):
+            writer.writerow([label] + cells + [total])
+        writer.writerow(["Total"] + table.col_totals + [table.total])
@@ -1,87 +1,200 @@
-import os
-import sys
-import sqlite3
+import time
+import threading
+from collections import namedtuple
 
-# DB in same folder as EXE
-app_folder = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(app_folder, "database.db")
+from utils.connection import get_connection, write_transaction, data_version
+from utils.events import publish, INSERTED, UPDATED, DELETED
 
-def get_connection():
-    return sqlite3.connect(DB_PATH)
+# rows: [(project_id, project_name, category)], names/categories: project_id -> value
+ProjectCatalog = namedtuple("ProjectCatalog", "rows names categories")
 
-def get_projects_list():
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
+# Seconds between checks for changes made by other desks
+CATALOG_CHECK_INTERVAL = 2.0
+
+_catalog = None
+_catalog_version = None
+_catalog_checked = 0.0
+_catalog_lock = threading.Lock()
+
+def get_project_catalog():
+    """
+    Return the cached project catalog, reloading it only after a local change
+    or when another connection has written to the database since the last load.
+    """
+    global _catalog, _catalog_version, _catalog_checked
+
+    with _catalog_lock:
+        now = time.monotonic()
+        if _catalog is not None and now - _catalog_checked < CATALOG_CHECK_INTERVAL:
+            return _catalog
+
+        # Read before the rows, so a commit in between shows up at the next check
+        version = data_version()
+        _catalog_checked = now
+        if _catalog is not None and version == _catalog_version:
+            return _catalog
+
+        rows = get_connection().execute(
             "SELECT project_id, project_name, category FROM projects"
+        ).fetchall()
+        _catalog = ProjectCatalog(
+            rows,
+            {project_id: name for project_id, name, _ in rows},
+            {project_id: category for project_id, _, category in rows},
         )
-        return cursor.fetchall()
+        _catalog_version = version
+        return _catalog
+
+def invalidate_project_catalog():
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
+
+def get_projects_list():
+    return list(get_project_catalog().rows)
+
+# Sortable SQL expression for each table column, in display order
+SORT_COLUMNS = ["project_id", "project_name", "category"]
+
+def query_projects(terms=None, sort_column=0, descending=False, offset=0, limit=-1):
+    """Return (rows, total) for the projects matching every search term."""
+    if isinstance(terms, str):
+        terms = terms.split()
+
+    clauses = []
+    params = []
+    for term in terms or []:
+        clauses.append("(" + " OR ".join(
+            f"CAST({column} AS TEXT) LIKE ?" for column in SORT_COLUMNS
+        ) + ")")
+        params.extend([f"%{term}%"] * len(SORT_COLUMNS))
+    where = "WHERE " + " AND ".join(clauses) if clauses else ""
+
+    if not 0 <= sort_column < len(SORT_COLUMNS):
+        sort_column = 0
+    direction = "DESC" if descending else "ASC"
 
-def get_projects_map():
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "SELECT project_id, project_name FROM projects"
-        )
-        return dict(cursor.fetchall())
+        cursor.execute(f"""
+            SELECT project_id, project_name, category
+            FROM projects
+            {where}
+            ORDER BY {SORT_COLUMNS[sort_column]} {direction}, project_id {direction}
+            LIMIT ? OFFSET ?
+        """, params + [limit, offset])
+        rows = cursor.fetchall()
+
+        cursor.execute(f"SELECT COUNT(*) FROM projects {where}", params)
+        total = cursor.fetchone()[0]
+
+    return rows, total
+
+def get_projects_map():
+    return dict(get_project_catalog().names)
+
+CONFLICT_MESSAGE = "This project was changed at another desk. Reopen it to see the latest details."
+DELETED_MESSAGE = "This project was deleted at another desk."
 
 def get_project_by_id(project_id):
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT project_name, category FROM projects WHERE project_id = ?",
-            (project_id,)
-        )
-        return cursor.fetchone()
+    # Read through to the database: the edit form needs the current row_version,
+    # which the catalog (refreshed every few seconds) may not have yet
+    return get_connection().execute(
+        "SELECT project_name, category, row_version FROM projects WHERE project_id = ?",
+        (project_id,)
+    ).fetchone()
     
-def validate_project(project_name, category):
+def validate_project(project_name, category, project_id=None):
     project_name = project_name.strip()
     category = category.strip()
 
     if not project_name or not category:
         return False, "Project Name and Category are required."
 
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT 1 FROM projects
-            WHERE project_name = ? AND category = ?
-            LIMIT 1
-        """, (project_name, category))
+    # Another project with the same name and category, not the one being edited
+    duplicate = get_connection().execute("""
+        SELECT 1 FROM projects
+        WHERE project_name = ? AND category = ? AND project_id IS NOT ?
+        LIMIT 1
+    """, (project_name, category, project_id)).fetchone()
+    if duplicate:
+        return False, "Project already exists."
 
-        if cursor.fetchone():
-            return False, "Project already exists."
+    return True, ""
+
+def _insert_project(conn, project_name, category):
+    cursor = conn.execute("""
+        INSERT INTO projects (project_name, category)
+        VALUES (?, ?)
+    """, (project_name, category))
+    return cursor.lastrowid
 
+def _update_project(conn, project_id, project_name, category, row_version=None):
+    cursor = conn.execute("""
+        UPDATE projects
+        SET project_name = ?, category = ?, row_version = row_version + 1
+        WHERE project_id = ? AND (? IS NULL OR row_version = ?)
+    """, (project_name, category, project_id, row_version, row_version))
+    if cursor.rowcount == 0:
+        exists = conn.execute("SELECT 1 FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        return False, CONFLICT_MESSAGE if exists else DELETED_MESSAGE
     return True, ""
-    
+
+def _project_saved(kind, project_id, project_name, category):
+    invalidate_project_catalog()
+    publish("projects", kind, project_id, (project_id, project_name, category))
+
 def add_project(project_name, category):
     project_name = project_name.strip() or "-"
     category = category.strip() or "-"
 
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO projects (project_name, category)
-            VALUES (?, ?)
-        """, (project_name, category))
+    with write_transaction() as conn:
+        project_id = _insert_project(conn, project_name, category)
+
+    _project_saved(INSERTED, project_id, project_name, category)
 
-def edit_project(project_id, project_name, category):
+def edit_project(project_id, project_name, category, row_version=None):
+    """
+    Update a project, only if it is still at row_version when one is given.
+    Returns (success, message).
+    """
     project_name = project_name.strip() or "-"
     category = category.strip() or "-"
 
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE projects
-            SET project_name = ?, category = ?
-            WHERE project_id = ?
-        """, (project_name, category, project_id))
+    with write_transaction() as conn:
+        success, msg = _update_project(conn, project_id, project_name, category, row_version)
+
+    if success:
+        _project_saved(UPDATED, project_id, project_name, category)
+    return success, msg
+
+def save_project(project_id, project_name, category, row_version=None):
+    """Validate and then add (project_id None) or edit a project. Returns (success, message)."""
+    project_name = project_name.strip()
+    category = category.strip()
+
+    # Checked under the write lock, so two desks can't both add the same project
+    with write_transaction() as conn:
+        success, msg = validate_project(project_name, category, project_id)
+        if not success:
+            return success, msg
+        if project_id is None:
+            project_id, kind = _insert_project(conn, project_name, category), INSERTED
+        else:
+            kind = UPDATED
+            success, msg = _update_project(conn, project_id, project_name, category, row_version)
 
+    if success:
+        _project_saved(kind, project_id, project_name, category)
+    return success, msg
 
 def delete_project(project_id):
-    with get_connection() as conn:
+    with write_transaction() as conn:
         cursor = conn.cursor()
         cursor.execute(
             "DELETE FROM projects WHERE project_id = ?",
             (project_id,)
-        )
\ No newline at end of file
+        )
+
+    invalidate_project_catalog()
+    publish("projects", DELETED, project_id)
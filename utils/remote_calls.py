@@ -0,0 +1,333 @@
+"""
+The data layer calls the windows make, answered by a PESO service
+(utils/server.py) over HTTP instead of a local SQLite file. Signatures and
+return values match the local modules, so utils/api.py can hand out either.
+Changes made through the service are published here like local ones.
+"""
+import gzip
+import http.client
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlencode
+
+from utils.events import publish
+from utils.project_calls import ProjectCatalog, CATALOG_CHECK_INTERVAL
+from utils.stats_calls import DashboardStats
+from utils.pivot_calls import PivotTable
+
+SERVER_URL = os.environ.get("PESO_SERVER", "").rstrip("/")
+TIMEOUT = 30            # seconds
+STREAM_CHUNK = 64 * 1024
+# Responses kept for If-None-Match revalidation
+CACHE_SIZE = 256
+# Seconds a keep-alive connection may sit idle before it is replaced (under the service's 5)
+KEEPALIVE_IDLE = 4
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+
+class RemoteError(Exception):
+    pass
+
+
+_local = threading.local()
+# Handed out by the service's /api/login and sent with every other request
+_token = None
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _connection():
+    conn = getattr(_local, "conn", None)
+    # The service drops keep-alive connections idle for 5 s; don't send a write down one it may have closed
+    if conn is not None and time.monotonic() - _local.used > KEEPALIVE_IDLE:
+        conn.close()
+        conn = None
+    if conn is None:
+        url = urlsplit(SERVER_URL)
+        cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        conn = _local.conn = cls(url.hostname, url.port, timeout=TIMEOUT)
+    _local.used = time.monotonic()
+    return conn
+
+
+def _drop_connection():
+    _local.conn.close()
+    _local.conn = None
+
+
+def _send(method, path, body=None, headers=None):
+    headers = {"Accept-Encoding": "gzip", **(headers or {})}
+    if _token:
+        headers["Authorization"] = f"Bearer {_token}"
+    # Reads get one retry on a fresh connection. Writes don't: the service may
+    # have applied one whose response was lost, and a retry would apply it twice
+    attempts = 2 if method in IDEMPOTENT_METHODS else 1
+    for attempt in range(attempts):
+        conn = _connection()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            return conn.getresponse()
+        except (ConnectionError, http.client.HTTPException):
+            _drop_connection()
+            if attempt == attempts - 1:
+                raise
+
+
+def _request(method, path, params=None, data=None, cached=False):
+    if params:
+        path += "?" + urlencode({name: value for name, value in params.items() if value is not None})
+
+    headers = {}
+    body = None
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+
+    with _cache_lock:
+        hit = _cache.get(path) if cached else None
+    if hit:
+        headers["If-None-Match"] = hit[0]
+
+    response = _send(method, path, body, headers)
+    payload = response.read()
+    if response.status == 304 and hit:
+        return hit[1]
+    if response.getheader("Content-Encoding") == "gzip":
+        payload = gzip.decompress(payload)
+    result = json.loads(payload) if payload else {}
+    if response.status >= 400:
+        raise RemoteError(result.get("error") or f"Service error {response.status}")
+
+    etag = response.getheader("ETag")
+    if cached and etag:
+        with _cache_lock:
+            if len(_cache) >= CACHE_SIZE:
+                _cache.clear()
+            _cache[path] = (etag, result)
+    return result
+
+
+def _publish(events):
+    for table, kind, key, row in events:
+        publish(table, kind, key, tuple(row) if row else None)
+    if any(table == "projects" for table, *_ in events):
+        invalidate_project_catalog()
+
+
+def _rows(rows):
+    return [tuple(row) for row in rows]
+
+
+# Login
+
+def validate_login(username, password):
+    global _token
+    result = _request("POST", "/api/login", data={"username": username, "password": password})
+    if result["ok"]:
+        _token = result["token"]
+    return result["ok"]
+
+
+# Beneficiaries
+
+def query_beneficiaries(terms=None, sort_column=None, descending=False, offset=0, limit=200, with_total=True,
+                        after=None):
+    result = _request("GET", "/api/beneficiaries", {
+        "search": terms, "sort": sort_column, "desc": int(descending),
+        "offset": offset, "limit": limit, "total": int(with_total), "after": after,
+    }, cached=True)
+    return _rows(result["rows"]), result["total"]
+
+
+def get_beneficiary_by_id(beneficiary_id):
+    try:
+        return tuple(_request("GET", f"/api/beneficiaries/{beneficiary_id}")["beneficiary"])
+    except RemoteError as e:
+        print("Fetch Error:", e)
+        return None
+
+
+def save_beneficiary(beneficiary_id, lname, fname, project_id, mname="", suffix="", gender="", street="", barangay="", contactno="",
+                     enroll_duplicate=False, row_version=None):
+    data = {
+        "lname": lname, "fname": fname, "project_id": project_id, "mname": mname, "suffix": suffix,
+        "gender": gender, "street": street, "barangay": barangay, "contactno": contactno,
+        "enroll_duplicate": enroll_duplicate, "row_version": row_version,
+    }
+    if beneficiary_id is None:
+        result = _request("POST", "/api/beneficiaries", data=data)
+    else:
+        result = _request("PUT", f"/api/beneficiaries/{beneficiary_id}", data=data)
+    _publish(result["events"])
+    return result["ok"], result["message"]
+
+
+def delete_beneficiary(beneficiary_id):
+    _publish(_request("DELETE", f"/api/beneficiaries/{beneficiary_id}")["events"])
+
+
+def export_beneficiaries_csv(path, terms=None, sort_column=None, descending=False,
+                             progress=None, is_cancelled=None, chunk_size=STREAM_CHUNK):
+    """Same as csv_calls.export_beneficiaries_csv, streamed from the service."""
+    _, total = query_beneficiaries(terms, sort_column, descending, 0, 0)
+    query = urlencode({name: value for name, value in
+                       {"search": terms, "sort": sort_column, "desc": int(descending)}.items()
+                       if value is not None})
+
+    temp_path = path + ".part"
+    written = -1   # the header line
+    response = _send("GET", f"/api/beneficiaries.csv?{query}")
+    if response.status >= 400:
+        response.read()
+        raise RemoteError(f"Export failed ({response.status})")
+    try:
+        with open(temp_path, "wb") as file:
+            while True:
+                if is_cancelled and is_cancelled():
+                    # The rest of the stream is unread, so this connection is done
+                    _drop_connection()
+                    break
+                try:
+                    chunk = response.read(chunk_size)
+                except http.client.IncompleteRead:
+                    # The service hit an error mid-export and closed the stream early
+                    _drop_connection()
+                    raise RemoteError("Export was cut off by the service")
+                if not chunk:
+                    break
+                file.write(chunk)
+                written += chunk.count(b"\n")
+                if progress:
+                    progress(min(max(written, 0), total), total)
+
+        if is_cancelled and is_cancelled():
+            os.remove(temp_path)
+            return None
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return written
+
+
+def import_beneficiaries_csv(path, progress=None, is_cancelled=None):
+    """Same as csv_calls.import_beneficiaries_csv; the file is uploaded and imported by the service."""
+    with open(path, "rb") as file:
+        body = file.read()
+    if is_cancelled and is_cancelled():
+        return None
+
+    response = _send("POST", "/api/import", body, {"Content-Type": "text/csv"})
+    payload = response.read()
+    if response.getheader("Content-Encoding") == "gzip":
+        payload = gzip.decompress(payload)
+    result = json.loads(payload)
+    if response.status >= 400:
+        raise RemoteError(result.get("error") or f"Import failed ({response.status})")
+
+    _publish(result["events"])
+    if progress:
+        progress(len(body), len(body))
+    return result["imported"], [tuple(rejection) for rejection in result["rejections"]]
+
+
+# Projects
+
+_catalog = None
+_catalog_checked = 0.0
+_catalog_lock = threading.Lock()
+
+
+def get_project_catalog():
+    """The project catalog, revalidated against the service every CATALOG_CHECK_INTERVAL seconds."""
+    global _catalog, _catalog_checked
+
+    with _catalog_lock:
+        now = time.monotonic()
+        if _catalog is not None and now - _catalog_checked < CATALOG_CHECK_INTERVAL:
+            return _catalog
+
+        rows = _rows(_request("GET", "/api/projects", cached=True)["rows"])
+        _catalog_checked = now
+        if _catalog is None or rows != _catalog.rows:
+            _catalog = ProjectCatalog(
+                rows,
+                {project_id: name for project_id, name, _ in rows},
+                {project_id: category for project_id, _, category in rows},
+            )
+        return _catalog
+
+
+def invalidate_project_catalog():
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
+
+
+def get_projects_list():
+    return list(get_project_catalog().rows)
+
+
+def query_projects(terms=None, sort_column=0, descending=False, offset=0, limit=-1):
+    if isinstance(terms, (list, tuple)):
+        terms = " ".join(terms)
+    result = _request("GET", "/api/projects", {
+        "search": terms, "sort": sort_column, "desc": int(descending), "offset": offset, "limit": limit,
+    }, cached=True)
+    return _rows(result["rows"]), result["total"]
+
+
+def get_project_by_id(project_id):
+    try:
+        return tuple(_request("GET", f"/api/projects/{project_id}")["project"])
+    except RemoteError:
+        return None
+
+
+def save_project(project_id, project_name, category, row_version=None):
+    data = {"project_name": project_name, "category": category, "row_version": row_version}
+    if project_id is None:
+        result = _request("POST", "/api/projects", data=data)
+    else:
+        result = _request("PUT", f"/api/projects/{project_id}", data=data)
+    _publish(result["events"])
+    return result["ok"], result["message"]
+
+
+def delete_project(project_id):
+    _publish(_request("DELETE", f"/api/projects/{project_id}")["events"])
+
+
+# Reports
+
+def get_dashboard_stats():
+    data = _request("GET", "/api/stats", cached=True)
+    return DashboardStats(data["total"], *(_rows(data[name]) for name in DashboardStats._fields[1:]))
+
+
+def pivot(rows, cols=None, filters=None):
+    params = {"rows": rows, "cols": cols}
+    params.update({f"filter.{dim}": value for dim, value in (filters or {}).items()})
+    return PivotTable(**_request("GET", "/api/pivot", params, cached=True))
+
+
+# Sync
+
+_last_seq = None
+_poll_lock = threading.Lock()
+
+
+def poll_changes():
+    """Publish what other desks changed since the last poll (see change_calls.poll_changes)."""
+    global _last_seq
+
+    with _poll_lock:
+        result = _request("GET", "/api/changes", {"since": _last_seq})
+        first = _last_seq is None
+        _last_seq = result["seq"]
+    if not first:
+        _publish(result["events"])
+    return 0 if first else len(result["events"])
@@ -0,0 +1,427 @@
+"""
+HTTP/JSON service over the data layer, for desks that would otherwise open
+database.db over a network share. Only the pages a desk asks for cross the
+wire instead of every database page a query touches. Start it on the machine
+that holds the database:
+
+    python cli.py serve --port 8765
+
+and point the app at it with PESO_SERVER=http://that-machine:8765 (see
+utils/remote_calls.py). Every route but /api/login needs the session token
+that a successful login hands out, sent as "Authorization: Bearer <token>".
+Reads run on a fixed pool of threads, each with its
+own long-lived connection; writes are serialized through one lock so desks
+queue in the service instead of fighting over the SQLite write lock.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import secrets
+import tempfile
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from utils import beneficiary_calls, project_calls, csv_calls, pivot_calls, stats_calls, change_calls
+from utils.connection import get_connection, change_seq
+from utils.events import subscribe
+from utils.login_calls import validate_login
+
+DEFAULT_PORT = 8765
+DEFAULT_THREADS = 8
+# Bodies smaller than this aren't worth compressing
+GZIP_MIN_SIZE = 1024
+MAX_PAGE = 5000
+# Sessions unused for this many seconds have to log in again
+SESSION_IDLE = 12 * 60 * 60
+
+BENEFICIARY_FIELDS = ["lname", "fname", "project_id", "mname", "suffix", "gender", "street", "barangay", "contactno"]
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Events published by the data layer while a write request runs, per thread,
+# so they can be sent back and re-published on the desk that made the change
+_collected = threading.local()
+
+
+def _collect(event):
+    events = getattr(_collected, "events", None)
+    if events is not None:
+        events.append(event)
+
+
+subscribe(_collect)
+
+
+def _int(query, name, default=None):
+    values = query.get(name)
+    if not values or values[0] == "":
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise ServiceError(400, f"{name} must be a number")
+
+
+def _text(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def _flag(query, name):
+    return _text(query, name, "0").lower() in ("1", "true", "yes")
+
+
+def _beneficiary_args(body):
+    try:
+        args = [body[name] for name in ("lname", "fname", "project_id")]
+    except KeyError as e:
+        raise ServiceError(400, f"Missing field: {e.args[0]}")
+    args += [body.get(name, "") for name in BENEFICIARY_FIELDS[3:]]
+    return args
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Idle keep-alive connections give their pool thread back after this many seconds
+    timeout = 5
+    # Headers and body go out as separate writes; without this, Nagle's algorithm
+    # and the desk's delayed ACK hold every response back by ~40 ms
+    disable_nagle_algorithm = True
+    server_version = "PESOTracker"
+
+    ROUTES = [
+        ("GET", r"/api/beneficiaries", "list_beneficiaries"),
+        ("GET", r"/api/beneficiaries\.csv", "export_beneficiaries"),
+        ("POST", r"/api/beneficiaries", "add_beneficiary"),
+        ("POST", r"/api/beneficiaries/bulk", "bulk_add_beneficiaries"),
+        ("GET", r"/api/beneficiaries/(\d+)", "get_beneficiary"),
+        ("PUT", r"/api/beneficiaries/(\d+)", "edit_beneficiary"),
+        ("DELETE", r"/api/beneficiaries/(\d+)", "delete_beneficiary"),
+        ("POST", r"/api/import", "import_beneficiaries"),
+        ("GET", r"/api/projects", "list_projects"),
+        ("POST", r"/api/projects", "add_project"),
+        ("GET", r"/api/projects/(\d+)", "get_project"),
+        ("PUT", r"/api/projects/(\d+)", "edit_project"),
+        ("DELETE", r"/api/projects/(\d+)", "delete_project"),
+        ("GET", r"/api/stats", "stats"),
+        ("GET", r"/api/pivot", "pivot"),
+        ("GET", r"/api/changes", "changes"),
+        ("POST", r"/api/login", "login"),
+    ]
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        self.query = parse_qs(url.query)
+        try:
+            for route_method, pattern, name in self.ROUTES:
+                match = re.fullmatch(pattern, url.path)
+                if match and route_method == method:
+                    if name != "login":
+                        self._check_session()
+                    getattr(self, name)(*(int(group) for group in match.groups()))
+                    return
+            raise ServiceError(404, f"No such endpoint: {method} {url.path}")
+        except ServiceError as e:
+            # The request body may not have been read, so don't reuse the connection
+            self.close_connection = True
+            self._send_json({"error": str(e)}, e.status)
+        except Exception as e:
+            print("Service Error:", e)
+            self.close_connection = True
+            self._send_json({"error": str(e)}, 500)
+
+    # Plumbing
+
+    def _check_session(self):
+        scheme, _, token = self.headers.get("Authorization", "").partition(" ")
+        if scheme != "Bearer" or not self.server.touch_session(token):
+            raise ServiceError(401, "Not logged in")
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _json_body(self):
+        try:
+            return json.loads(self._body() or b"{}")
+        except ValueError:
+            raise ServiceError(400, "Body is not valid JSON")
+
+    def _send(self, status, body, content_type, headers=()):
+        if len(body) >= GZIP_MIN_SIZE and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=5)
+            headers = [*headers, ("Content-Encoding", "gzip")]
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data, status=200, headers=()):
+        self._send(status, json.dumps(data).encode("utf-8"), "application/json", headers)
+
+    def _send_cached(self, build):
+        """
+        Answer a read with an ETag. Every committed change appends to change_log,
+        so its newest sequence number says whether anything could differ since
+        the desk last asked; if not, 304 and no query at all. The tag is read
+        before the data, so a response is never older than its tag claims.
+        """
+        etag = f'"{change_seq(get_connection())}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send_json(build(), headers=[("ETag", etag)])
+
+    def _write(self, fn, *args, **kwargs):
+        """Run a data layer write under the service's write lock and return (result, events)."""
+        _collected.events = []
+        try:
+            with self.server.write_lock:
+                result = fn(*args, **kwargs)
+            return result, _collected.events
+        finally:
+            _collected.events = None
+
+    def _send_write(self, fn, *args, **kwargs):
+        result, events = self._write(fn, *args, **kwargs)
+        ok, message = result if isinstance(result, tuple) else (True, "")
+        self._send_json({"ok": ok, "message": message, "events": events})
+
+    # Beneficiaries
+
+    def list_beneficiaries(self):
+        args = (
+            _text(self.query, "search"), _int(self.query, "sort"), _flag(self.query, "desc"),
+            _int(self.query, "offset", 0), min(_int(self.query, "limit", 200), MAX_PAGE),
+            _flag(self.query, "total"), _int(self.query, "after")
+        )
+        self._send_cached(lambda: dict(zip(("rows", "total"), beneficiary_calls.query_beneficiaries(*args))))
+
+    def export_beneficiaries(self):
+        sql, params = beneficiary_calls.beneficiary_select(
+            _text(self.query, "search"), _int(self.query, "sort"), _flag(self.query, "desc")
+        )
+        cursor = get_connection().execute(sql, params)
+
+        # Streamed in chunks so a full export never sits in memory
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(beneficiary_calls.DISPLAY_HEADERS)
+        try:
+            while True:
+                rows = cursor.fetchmany(csv_calls.CHUNK_SIZE)
+                writer.writerows(rows)
+                chunk = buffer.getvalue().encode("utf-8")
+                if chunk:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                buffer.seek(0)
+                buffer.truncate()
+                if not rows:
+                    break
+        except Exception as e:
+            # The 200 is already out, so an error can't be sent. Closing without
+            # the final zero-length chunk tells the desk the file is incomplete
+            print("Export Error:", e)
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def get_beneficiary(self, beneficiary_id):
+        row = beneficiary_calls.get_beneficiary_by_id(beneficiary_id)
+        if row is None:
+            raise ServiceError(404, "No such beneficiary")
+        self._send_json({"beneficiary": row})
+
+    def add_beneficiary(self):
+        body = self._json_body()
+        self._send_write(
+            beneficiary_calls.save_beneficiary, None, *_beneficiary_args(body),
+            enroll_duplicate=bool(body.get("enroll_duplicate"))
+        )
+
+    def bulk_add_beneficiaries(self):
+        records = self._json_body().get("beneficiaries", [])
+        args = [_beneficiary_args(record) for record in records]
+        results, events = self._write(beneficiary_calls.add_beneficiaries, args)
+        self._send_json({"results": results, "events": events})
+
+    def edit_beneficiary(self, beneficiary_id):
+        body = self._json_body()
+        self._send_write(
+            beneficiary_calls.save_beneficiary, beneficiary_id, *_beneficiary_args(body),
+            row_version=body.get("row_version")
+        )
+
+    def delete_beneficiary(self, beneficiary_id):
+        self._send_write(beneficiary_calls.delete_beneficiary, beneficiary_id)
+
+    def import_beneficiaries(self):
+        # The importer reads a file, so spool the upload to one first
+        with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as file:
+            file.write(self._body())
+        try:
+            (imported, rejections), events = self._write(csv_calls.import_beneficiaries_csv, file.name)
+        finally:
+            os.remove(file.name)
+        self._send_json({"imported": imported, "rejections": rejections, "events": events})
+
+    # Projects
+
+    def list_projects(self):
+        args = (
+            _text(self.query, "search"), _int(self.query, "sort", 0), _flag(self.query, "desc"),
+            _int(self.query, "offset", 0), _int(self.query, "limit", -1)
+        )
+        self._send_cached(lambda: dict(zip(("rows", "total"), project_calls.query_projects(*args))))
+
+    def get_project(self, project_id):
+        row = project_calls.get_project_by_id(project_id)
+        if row is None:
+            raise ServiceError(404, "No such project")
+        self._send_json({"project": row})
+
+    def add_project(self):
+        body = self._json_body()
+        self._send_write(project_calls.save_project, None, body.get("project_name", ""), body.get("category", ""))
+
+    def edit_project(self, project_id):
+        body = self._json_body()
+        self._send_write(
+            project_calls.save_project, project_id, body.get("project_name", ""), body.get("category", ""),
+            body.get("row_version")
+        )
+
+    def delete_project(self, project_id):
+        self._send_write(project_calls.delete_project, project_id)
+
+    # Reports and sync
+
+    def stats(self):
+        self._send_cached(lambda: stats_calls.get_dashboard_stats()._asdict())
+
+    def pivot(self):
+        filters = {
+            name[len("filter."):]: values[0]
+            for name, values in self.query.items() if name.startswith("filter.")
+        }
+        rows, cols = _text(self.query, "rows"), _text(self.query, "cols")
+        for dim in [rows, cols, *filters]:
+            if dim is not None and dim not in pivot_calls.DIMENSIONS:
+                raise ServiceError(400, f"Unknown pivot dimension: {dim}")
+        self._send_cached(lambda: pivot_calls.pivot(rows, cols, filters)._asdict())
+
+    def changes(self):
+        since = _int(self.query, "since")
+        conn = get_connection()
+        if since is None:
+            self._send_json({"seq": change_seq(conn), "events": []})
+            return
+        # Every desk's changes, including the ones this service made for it
+        seq, events = change_calls.changes_since(since, conn, skip_local=False)
+        self._send_json({"seq": seq, "events": events})
+
+    def login(self):
+        body = self._json_body()
+        if not validate_login(body.get("username", ""), body.get("password", "")):
+            self._send_json({"ok": False})
+            return
+        self._send_json({"ok": True, "token": self.server.new_session()})
+
+
+class ServiceServer(HTTPServer):
+    """
+    Hands each connection to a fixed pool of threads rather than a new thread
+    per request, so every thread keeps its SQLite connection (and statement
+    and page caches) for the life of the service.
+    """
+
+    def __init__(self, address, threads=DEFAULT_THREADS, verbose=False):
+        super().__init__(address, ServiceHandler)
+        self.pool = ThreadPoolExecutor(threads, thread_name_prefix="peso-service")
+        self.write_lock = threading.Lock()
+        self.verbose = verbose
+        # Session token -> when it was last used
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    def new_session(self):
+        token = secrets.token_urlsafe(32)
+        with self._sessions_lock:
+            self._sessions[token] = time.monotonic()
+        return token
+
+    def touch_session(self, token):
+        now = time.monotonic()
+        with self._sessions_lock:
+            last_used = self._sessions.get(token)
+            if last_used is None:
+                return False
+            if now - last_used > SESSION_IDLE:
+                del self._sessions[token]
+                return False
+            self._sessions[token] = now
+            return True
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, threads=DEFAULT_THREADS, verbose=False):
+    server = ServiceServer((host, port), threads, verbose)
+    print(f"Serving the PESO database on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,38 @@
+"""
+Wall-clock marks along the startup path, printed by `main.py --startup-report`.
+
+For a per-module breakdown of import time in a dev checkout, run
+`python -X importtime main.py --startup-report 2> imports.txt`.
+"""
+import sys
+import time
+
+_started = time.perf_counter()
+_marks = []
+
+
+def mark(name):
+    """Record the time `name` was reached, counted from when this module was imported."""
+    _marks.append((name, (time.perf_counter() - _started) * 1000))
+
+
+def elapsed_ms():
+    return (time.perf_counter() - _started) * 1000
+
+
+def report(budget_ms=None, file=None):
+    """Print each mark with the time spent since the previous one; returns False if over budget."""
+    file = file or sys.stdout
+    previous = 0.0
+    print(f"{'step':<28} {'took ms':>9} {'at ms':>9}", file=file)
+    for name, at in _marks:
+        print(f"{name:<28} {at - previous:>9.1f} {at:>9.1f}", file=file)
+        previous = at
+    print(f"modules loaded: {len(sys.modules)}", file=file)
+
+    if budget_ms is None or not _marks:
+        return True
+    total = _marks[-1][1]
+    within = total <= budget_ms
+    print(f"startup {total:.0f} ms, budget {budget_ms} ms: {'OK' if within else 'OVER BUDGET'}", file=file)
+    return within
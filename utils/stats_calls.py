@@ -0,0 +1,50 @@
+from collections import namedtuple
+
+from utils.connection import get_connection
+from utils.project_calls import get_project_catalog
+
+# by_gender / by_barangay / by_category: [(value, count)], by_project: [(name, category, count)],
+# each sorted by count, largest first
+DashboardStats = namedtuple("DashboardStats", "total by_gender by_barangay by_category by_project")
+
+
+def _by_count(pairs):
+    return sorted(pairs, key=lambda pair: (-pair[-1], pair[0]))
+
+
+def get_dashboard_stats():
+    """
+    Beneficiary counts for the dashboard, read from the trigger-maintained
+    stats_counters table, so the cost doesn't grow with the registry.
+    Project and category counts are enrollments: a beneficiary in two
+    projects counts once for each.
+    """
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT dimension, value, count FROM stats_counters WHERE count > 0")
+
+    total = 0
+    counters = {"gender": [], "barangay": [], "project": []}
+    for dimension, value, count in cursor.fetchall():
+        if dimension == "total":
+            total = count
+        elif dimension in counters:
+            counters[dimension].append((value, count))
+
+    catalog = get_project_catalog()
+    by_project = []
+    by_category = {}
+    for project_id, count in counters["project"]:
+        project_id = int(project_id)
+        if project_id not in catalog.names:
+            continue
+        category = catalog.categories[project_id]
+        by_project.append((catalog.names[project_id], category, count))
+        by_category[category] = by_category.get(category, 0) + count
+
+    return DashboardStats(
+        total,
+        _by_count(counters["gender"]),
+        _by_count(counters["barangay"]),
+        _by_count(by_category.items()),
+        _by_count(by_project),
+    )
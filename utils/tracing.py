@@ -0,0 +1,242 @@
+"""
+Opt-in SQL instrumentation for every connection opened by utils.connection.
+
+Turn it on with environment variables before starting the app:
+
+    PESO_SQL_TRACE=1            collect per-statement stats and print a summary on exit
+    PESO_SLOW_QUERY_MS=100      log statements slower than this, with their query plan
+    PESO_SQL_TRACE_REPORT=path  also write the summary to path as JSON
+
+When PESO_SQL_TRACE is not set, connections are plain sqlite3 connections
+and nothing here runs.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import sqlite3
+import threading
+
+ENABLED = os.environ.get("PESO_SQL_TRACE", "") not in ("", "0")
+SLOW_QUERY_MS = float(os.environ.get("PESO_SLOW_QUERY_MS", "100"))
+REPORT_PATH = os.environ.get("PESO_SQL_TRACE_REPORT")
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+BUCKETS = (1, 5, 10, 50, 100, 500, 1000)
+SUMMARY_LIMIT = 20
+
+_lock = threading.Lock()
+_stats = {}
+
+
+class StatementStats:
+    __slots__ = ("sql", "count", "total_ms", "max_ms", "rows", "histogram")
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def add(self, elapsed_ms, rows):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        for i, bound in enumerate(BUCKETS):
+            if elapsed_ms <= bound:
+                self.histogram[i] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def as_dict(self):
+        labels = [f"<={bound}ms" for bound in BUCKETS] + [f">{BUCKETS[-1]}ms"]
+        return {
+            "sql": self.sql,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0,
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "histogram": dict(zip(labels, self.histogram)),
+        }
+
+
+def normalize(sql):
+    return " ".join(sql.split())
+
+
+def record(sql, elapsed_ms, rows):
+    key = normalize(sql)
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = StatementStats(key)
+        stats.add(elapsed_ms, rows)
+
+
+def query_plan(conn, sql, params=()):
+    """Return the EXPLAIN QUERY PLAN lines for sql, or [] if it has no plan."""
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+        return []
+    try:
+        # A plain cursor, so explaining a statement isn't traced itself
+        cursor = sqlite3.Cursor(conn)
+        return [row[-1] for row in cursor.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    except sqlite3.Error as e:
+        return [f"(no plan: {e})"]
+
+
+def log_slow(conn, sql, params, elapsed_ms, rows):
+    lines = [f"Slow Query: {elapsed_ms:.1f} ms, {rows} row(s): {normalize(sql)}"]
+    lines += [f"    {step}" for step in query_plan(conn, sql, params)]
+    print("\n".join(lines), file=sys.stderr)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """
+    Times each statement from execute() until its last row is fetched, so
+    lazily stepped SELECTs are charged for the rows the caller actually read.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sql = None
+
+    def _begin(self, sql, params):
+        self._finish()
+        self._sql = sql
+        self._params = params
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def _finish(self):
+        if getattr(self, "_sql", None) is None:
+            return
+        sql, self._sql = self._sql, None
+        rows = self._rows if self.description else max(self.rowcount, 0)
+        elapsed_ms = self._elapsed * 1000
+        record(sql, elapsed_ms, rows)
+        if elapsed_ms >= SLOW_QUERY_MS:
+            log_slow(self.connection, sql, self._params, elapsed_ms, rows)
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._elapsed += time.perf_counter() - started
+
+    def execute(self, sql, params=()):
+        self._begin(sql, params)
+        self._timed(super().execute, sql, params)
+        if not self.description:
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        self._begin(sql, seq_of_params[0] if seq_of_params else ())
+        self._timed(super().executemany, sql, seq_of_params)
+        self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._sql is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._sql is not None:
+            self._rows += len(rows)
+            if not rows:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._sql is not None:
+            self._rows += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._sql is not None:
+            self._rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Statements whose results were never read to the end
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class TracedConnection(sqlite3.Connection):
+    # sqlite3 doesn't route the execute() shortcuts through cursor(), so override them too
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def connection_factory():
+    """The factory= argument for sqlite3.connect()."""
+    return TracedConnection if ENABLED else sqlite3.Connection
+
+
+def summary(limit=None):
+    """Per-statement stats, slowest total time first."""
+    with _lock:
+        stats = sorted(_stats.values(), key=lambda s: s.total_ms, reverse=True)
+        return [s.as_dict() for s in stats[:limit]]
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def print_summary(limit=SUMMARY_LIMIT, file=None):
+    file = file or sys.stderr
+    rows = summary()
+    if not rows:
+        return
+    total_ms = sum(row["total_ms"] for row in rows)
+    print(f"SQL summary: {sum(row['count'] for row in rows)} statement(s), "
+          f"{total_ms:.1f} ms total, {len(rows)} distinct", file=file)
+    print(f"{'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'rows':>9}  sql", file=file)
+    for row in rows[:limit]:
+        sql = row["sql"] if len(row["sql"]) <= 100 else row["sql"][:97] + "..."
+        print(f"{row['count']:>7} {row['total_ms']:>10.1f} {row['mean_ms']:>9.2f} "
+              f"{row['max_ms']:>9.1f} {row['rows']:>9}  {sql}", file=file)
+
+    if REPORT_PATH:
+        with open(REPORT_PATH, "w") as report:
+            json.dump({"slow_query_ms": SLOW_QUERY_MS, "statements": rows}, report, indent=2)
+
+
+if ENABLED:
+    atexit.register(print_summary)